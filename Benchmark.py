@@ -0,0 +1,341 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import platform
+import sys
+import time
+
+from PartA import basic, Runner
+from PartA.Lexen import Lexer
+from PartA.Parser import Parser
+from PartA.Resolver import Resolver
+from PartA.Interpreter import Interpreter
+
+with contextlib.redirect_stdout(io.StringIO()):
+    # PartB prints its examples when imported
+    import PartB
+
+
+#######################################
+# BENCHMARKS
+#######################################
+
+# A benchmark is a workload run at several sizes: make(param) does the
+# set-up for one size and returns the function to time, called with no
+# arguments. Only that call is timed.
+
+class Benchmark:
+    def __init__(self, group, name, param_name, params, quick_params, make):
+        self.group = group
+        self.name = name
+        self.param_name = param_name
+        self.params = params
+        self.quick_params = quick_params
+        self.make = make
+
+    def __repr__(self):
+        return f'<benchmark {self.group}.{self.name}>'
+
+
+def sum_text(width):
+    return ' + '.join(str(i) for i in range(1, width + 1))
+
+
+def nested_text(depth):
+    return '(' * depth + '1' + ' * 2 + 1)' * depth
+
+
+def program_context(source):
+    context = basic.Context('<program>')
+    context.symbol_table = basic.global_symbol_table
+    context.source = source
+    return context
+
+
+def parsed(text):
+    lexer = Lexer('<bench>', text)
+    tokens, error = lexer.make_tokens()
+    ast = Parser(tokens, lexer.source).parse()
+    if error or ast.error:
+        raise Exception(f'Benchmark program does not parse: {text[:40]}')
+    return Resolver().resolve(ast.node), lexer.source
+
+
+def define(text, engine):
+    result, error = Runner.run('<bench>', text, engine)
+    if error:
+        raise Exception(error.as_string())
+
+
+def define_functions(engine='interpreter'):
+    # Defines the functions the benchmarks call with engine, since the
+    # engine that defines a FUNC is the one that runs its body. Without
+    # memo caches, so that fib(20) times twenty thousand calls.
+    basic.MEMO_SIZE, memo_size = 0, basic.MEMO_SIZE
+    try:
+        define('FUNC fact(n) -> IF n == 0 THEN 1 ELSE n * fact(n - 1)', engine)
+        define('FUNC fib(n) -> IF n < 2 THEN n ELSE fib(n - 1) + fib(n - 2)', engine)
+        define('VAR inc = LAMBDA x . x + 1', engine)
+        define('FUNC calls(n, acc) -> IF n == 0 THEN acc ELSE calls(n - 1, inc(acc))', engine)
+        define('FUNC guarded(n) -> n > 0 && guarded(n - 1)', engine)
+    finally:
+        basic.MEMO_SIZE = memo_size
+
+
+###################################
+# PartA
+
+def lex(text):
+    def bench():
+        Lexer('<bench>', text).make_tokens()
+    return bench
+
+
+def parse(text):
+    lexer = Lexer('<bench>', text)
+    tokens, error = lexer.make_tokens()
+
+    def bench():
+        Parser(tokens, lexer.source).parse()
+    return bench
+
+
+def interpret(text):
+    define_functions('interpreter')
+    node, source = parsed(text)
+    context = program_context(source)
+
+    def bench():
+        Interpreter().visit(node, context)
+    return bench
+
+
+def run_cold(text, engine):
+    # Runner.run from source text, with nothing in the parse cache
+    define_functions(engine)
+
+    def bench():
+        Runner.parse_cache.clear()
+        Runner.run('<bench>', text, engine)
+    return bench
+
+
+def run_warm(text, engine):
+    define_functions(engine)
+    Runner.run('<bench>', text, engine)
+
+    def bench():
+        Runner.run('<bench>', text, engine)
+    return bench
+
+
+###################################
+# PartB
+
+def partb(func, make_input):
+    def make(n):
+        args = make_input(n)
+        return lambda: func(*args)
+    return make
+
+
+def sublists(n):
+    return [list(range(i, i + n)) for i in range(n)]
+
+
+def palindrome_lists(n):
+    return [['level', 'world', 'madam' * (i % 3 + 1)] for i in range(n)]
+
+
+BENCHMARKS = [
+    Benchmark('lexer', 'width', 'terms', [10, 100, 1000, 10000], [10, 1000], lambda n: lex(sum_text(n))),
+    Benchmark('lexer', 'nesting', 'depth', [5, 10, 25, 50], [5, 50], lambda n: lex(nested_text(n))),
+    Benchmark('parser', 'width', 'terms', [10, 100, 1000, 10000], [10, 1000], lambda n: parse(sum_text(n))),
+    Benchmark('parser', 'nesting', 'depth', [5, 10, 25, 50], [5, 50], lambda n: parse(nested_text(n))),
+    Benchmark('interpreter', 'width', 'terms', [10, 100, 1000, 10000], [10, 1000],
+              lambda n: interpret(sum_text(n))),
+    Benchmark('interpreter', 'nesting', 'depth', [5, 10, 25, 50], [5, 50], lambda n: interpret(nested_text(n))),
+    Benchmark('interpreter', 'factorial', 'n', [20, 40, 80, 120], [20, 80], lambda n: interpret(f'fact({n})')),
+    Benchmark('interpreter', 'fib', 'n', [8, 12, 16, 20], [8, 14], lambda n: interpret(f'fib({n})')),
+    Benchmark('interpreter', 'lambda_calls', 'calls', [100, 1000, 10000], [100, 1000],
+              lambda n: interpret(f'calls({n}, 0)')),
+    Benchmark('interpreter', 'short_circuit', 'n', [20, 40, 80, 120], [20, 80], lambda n: interpret(f'guarded({n})')),
+    Benchmark('run', 'cold', 'terms', [10, 100, 1000], [10, 1000], lambda n: run_cold(sum_text(n), 'interpreter')),
+    Benchmark('run', 'warm', 'terms', [10, 100, 1000], [10, 1000], lambda n: run_warm(sum_text(n), 'interpreter')),
+    Benchmark('run', 'fib_interpreter', 'n', [12, 16], [12], lambda n: run_warm(f'fib({n})', 'interpreter')),
+    Benchmark('run', 'fib_compiler', 'n', [12, 16], [12], lambda n: run_warm(f'fib({n})', 'compiler')),
+    Benchmark('run', 'fib_vm', 'n', [12, 16], [12], lambda n: run_warm(f'fib({n})', 'vm')),
+    Benchmark('run', 'unused_arg_lazy', 'n', [12, 16], [12],
+              lambda n: run_warm(f'(LAMBDA a, b . a)(1, fib({n}))', 'lazy')),
+    Benchmark('partb', 'fibonacci', 'n', [10, 100, 400], [10, 100], partb(PartB.fibonacci, lambda n: (n,))),
+    Benchmark('partb', 'concatenate', 'strings', [10, 100, 1000, 10000], [10, 1000],
+              partb(PartB.concatenate, lambda n: (['word'] * n,))),
+    Benchmark('partb', 'cumulative_sum_of_squares', 'n', [10, 30, 100, 300], [10, 100],
+              partb(PartB.cumulative_sum_of_squares, lambda n: (sublists(n),))),
+    Benchmark('partb', 'factorial', 'n', [10, 100, 1000], [10, 100], partb(PartB.factorial, lambda n: (n,))),
+    Benchmark('partb', 'exponentiation', 'exp', [10, 100, 1000], [10, 100],
+              partb(PartB.exponentiation, lambda n: (3, n))),
+    Benchmark('partb', 'count_palindromes', 'lists', [10, 100, 1000, 10000], [10, 1000],
+              partb(PartB.count_palindromes, lambda n: (palindrome_lists(n),))),
+    Benchmark('partb', 'get_primes_desc', 'n', [100, 1000, 10000], [100, 1000],
+              partb(PartB.get_primes_desc, lambda n: (range(n),))),
+]
+
+
+#######################################
+# TIMING
+#######################################
+
+def measure(func, repeat, min_time):
+    # Best time of one call of func: calls are timed in loops, grown until a
+    # loop takes min_time, and the fastest of repeat loops counts
+    number = 1
+    while True:
+        elapsed = time_loop(func, number)
+        if elapsed >= min_time: break
+        number *= 10 if elapsed * 10 < min_time else 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, time_loop(func, number))
+    return best / number, number
+
+
+def time_loop(func, number):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled: gc.enable()
+
+
+def scaling_exponent(points):
+    # Slope of log(seconds) against log(param), fitted by least squares: about
+    # 1 for a linear workload, 2 for a quadratic one
+    if len(points) < 2: return None
+    xs = [math.log(param) for param, seconds in points]
+    ys = [math.log(seconds) for param, seconds in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if not var_x: return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+#######################################
+# RUN
+#######################################
+
+def run_benchmarks(benchmarks, quick=False, repeat=5, min_time=0.02, out=sys.stderr):
+    # Returns the JSON report: every timing, and per benchmark its scaling
+    # exponent
+    results = []
+    scaling = {}
+
+    for benchmark in benchmarks:
+        key = f'{benchmark.group}.{benchmark.name}'
+        points = []
+
+        for param in benchmark.quick_params if quick else benchmark.params:
+            seconds, number = measure(benchmark.make(param), repeat, min_time)
+            points.append((param, seconds))
+            results.append({
+                'benchmark': key,
+                'param_name': benchmark.param_name,
+                'param': param,
+                'seconds': seconds,
+                'loops': number,
+            })
+            print(f'{key:42} {benchmark.param_name}={param:<7} {format_seconds(seconds):>10}', file=out)
+
+        scaling[key] = scaling_exponent(points)
+        if scaling[key] is not None:
+            print(f'{key:42} scaling exponent {scaling[key]:.2f}', file=out)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'quick': quick,
+            'repeat': repeat,
+        },
+        'results': results,
+        'scaling': scaling,
+    }
+
+
+def compare(report, baseline, threshold, out=sys.stderr):
+    # Prints every timing next to the baseline's; returns the list of
+    # (benchmark, param, ratio) that got slower by more than threshold
+    # (0.25: 25%)
+    old = {(result['benchmark'], result['param']): result['seconds'] for result in baseline['results']}
+    regressions = []
+
+    for result in report['results']:
+        key = (result['benchmark'], result['param'])
+        if key not in old: continue
+
+        ratio = result['seconds'] / old[key]
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append((result['benchmark'], result['param'], ratio))
+            flag = '  REGRESSION'
+        elif ratio < 1 / (1 + threshold):
+            flag = '  faster'
+        print(f"{result['benchmark']:42} {result['param_name']}={result['param']:<7} "
+              f"{format_seconds(old[key]):>10} -> {format_seconds(result['seconds']):>10} ({ratio:.2f}x){flag}",
+              file=out)
+
+    return regressions
+
+
+def format_seconds(seconds):
+    if seconds < 1e-3: return f'{seconds * 1e6:.1f} us'
+    if seconds < 1: return f'{seconds * 1e3:.2f} ms'
+    return f'{seconds:.3f} s'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time the PartA interpreter and the PartB helpers.")
+    parser.add_argument('-o', '--output', help="write the JSON report to this file (default: stdout)")
+    parser.add_argument('-b', '--baseline', help="JSON report of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown against the baseline reported as a regression (default: 0.25)")
+    parser.add_argument('-k', '--filter', default='', help="only run benchmarks whose name contains this")
+    parser.add_argument('--quick', action='store_true', help="fewer sizes per benchmark")
+    parser.add_argument('--repeat', type=int, default=5, help="timed loops per size, the best counts (default: 5)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    benchmarks = [benchmark for benchmark in BENCHMARKS if args.filter in f'{benchmark.group}.{benchmark.name}']
+    report = run_benchmarks(benchmarks, args.quick, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+from PartA import basic
+
+
+#######################################
+# OPERATOR CHAINS
+#######################################
+
+def binop_chain(node):
+    # Splits a left-nested run of operations such as a + b + c + d into the
+    # innermost left operand and the BinOpNodes from the inside out, so a
+    # pass can walk long generated sums in a loop instead of recursing
+    chain = []
+    while isinstance(node, basic.BinOpNode):
+        chain.append(node)
+        node = node.left_node
+    chain.reverse()
+    return node, chain
+
+
+#######################################
+# GLOBAL NAMES
+#######################################
+
+def global_names(node):
+    # Returns (defined, read): the globals a program assigns or defines with
+    # a named FUNC, and every name it reads, FUNC and LAMBDA bodies
+    # included. Local reads are counted too, since a local read before its
+    # VAR falls back to the global of that name.
+    defined, read = set(), set()
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+
+        if isinstance(node, basic.VarAccessNode):
+            read.add(node.var_name_tok.value)
+        elif isinstance(node, basic.VarAssignNode):
+            if node.address is None:
+                defined.add(node.var_name_tok.value)
+            nodes.append(node.value_node)
+        elif isinstance(node, basic.FuncDefNode):
+            if node.var_name_tok and node.address is None:
+                defined.add(node.var_name_tok.value)
+            nodes.append(node.body_node)
+        elif isinstance(node, basic.LambdaNode):
+            nodes.append(node.body_node)
+        elif isinstance(node, basic.BinOpNode):
+            nodes.append(node.left_node)
+            nodes.append(node.right_node)
+        elif isinstance(node, basic.UnaryOpNode):
+            nodes.append(node.node)
+        elif isinstance(node, basic.IfNode):
+            for condition, expr in node.cases:
+                nodes.append(condition)
+                nodes.append(expr)
+            if node.else_case:
+                nodes.append(node.else_case)
+        elif isinstance(node, basic.CallNode):
+            nodes.append(node.node_to_call)
+            nodes.extend(node.arg_nodes)
+
+    return defined, read
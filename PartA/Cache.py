@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+
+
+#######################################
+# LRU CACHE
+#######################################
+
+# The caches are shared by every thread evaluating code (see
+# PartA/Server.py), so each operation holds the cache's lock.
+
+class LRUCache:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.tag = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def resize(self, maxsize):
+        with self.lock:
+            self.maxsize = maxsize
+            while self.entries and len(self.entries) > max(maxsize, 0):
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def validate(self, tag):
+        # The entries are only good for one value of tag (e.g. a version
+        # counter); drop them all once it changes
+        if tag != self.tag:
+            with self.lock:
+                self.entries.clear()
+                self.tag = tag
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f'<LRUCache {self.stats()}>'
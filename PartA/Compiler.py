@@ -0,0 +1,312 @@
+from PartA import basic
+from PartA.Lexen import TT_KEYWORD, TT_MINUS
+from PartA.Interpreter import BINARY_OPERATIONS, SHORT_CIRCUITS, operation_key, short_circuit
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# COMPILER
+#######################################
+
+# The compiler turns an AST into nested Python closures once, so that
+# evaluating it again does no method lookup and no operator dispatch.
+# Every compiled closure takes a Context and returns (value, error),
+# the same convention the Value operations use.
+
+class Compiler:
+    def compile(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        return method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    ###################################
+
+    def compile_NumberNode(self, node):
+        value = basic.make_number(node.tok.value)
+
+        def number(context):
+            return value, None
+
+        return number
+
+    def compile_VarAccessNode(self, node):
+        return self.compile_var_access(node, True)
+
+    def compile_var_access(self, node, copy_values):
+        # With copy_values False the value is returned as stored: a call
+        # copies the function it calls anyway, so its callee is not copied
+        # twice
+        Number, RTError = basic.Number, basic.RTError
+        var_name = node.var_name_tok.value
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def not_defined(context):
+            return None, RTError(
+                pos_start, pos_end,
+                f"'{var_name}' is not defined",
+                context
+            )
+
+        if not node.address:
+            def var_access(context):
+                value = context.symbol_table.get(var_name)
+                if not value: return not_defined(context)
+                if type(value) is Number or not copy_values: return value, None
+                return value.copy().set_pos(pos_start, pos_end, context.source), None
+
+        elif node.address[0] == basic.LOCAL:
+            slot = node.address[1]
+
+            def var_access(context):
+                value = context.frame[slot]
+                if value is None:
+                    value = context.symbol_table.get(var_name)
+                    if not value: return not_defined(context)
+                if type(value) is Number or not copy_values: return value, None
+                return value.copy().set_pos(pos_start, pos_end, context.source), None
+
+        elif node.address[0] == basic.FREE:
+            index = node.address[1]
+
+            def var_access(context):
+                value = context.closure[index]
+                if value is None:
+                    value = context.symbol_table.get(var_name)
+                    if not value: return not_defined(context)
+                if type(value) is Number or not copy_values: return value, None
+                return value.copy().set_pos(pos_start, pos_end, context.source), None
+
+        else:
+            address = node.address
+
+            def var_access(context):
+                value = context.lookup(address, var_name)
+                if not value: return not_defined(context)
+                if type(value) is Number or not copy_values: return value, None
+                return value.copy().set_pos(pos_start, pos_end, context.source), None
+
+        return var_access
+
+    def compile_VarAssignNode(self, node):
+        var_name = node.var_name_tok.value
+        value_code = self.compile(node.value_node)
+
+        if node.address:
+            address = node.address
+
+            def var_assign(context):
+                value, error = value_code(context)
+                if error: return None, error
+
+                context.store(address, value)
+                return value, None
+
+        else:
+            def var_assign(context):
+                value, error = value_code(context)
+                if error: return None, error
+
+                context.symbol_table.set(var_name, value)
+                return value, None
+
+        return var_assign
+
+    def compile_BinOpNode(self, node):
+        locate_error = basic.locate_error
+        leftmost, chain = binop_chain(node)
+
+        if len(chain) > 1:
+            return self.compile_bin_op_chain(leftmost, chain)
+
+        left_code = self.compile(node.left_node)
+        right_code = self.compile(node.right_node)
+        method_name = BINARY_OPERATIONS[operation_key(node.op_tok)]
+
+        if method_name in SHORT_CIRCUITS:
+            def short_circuit_op(context):
+                left, error = left_code(context)
+                if error: return None, error
+                decided = short_circuit(method_name, left)
+                if decided is not None: return decided, None
+                right, error = right_code(context)
+                if error: return None, error
+
+                result, error = getattr(left, method_name)(right)
+                if error: return None, locate_error(error, node, context)
+                return result, None
+
+            return short_circuit_op
+
+        def bin_op(context):
+            left, error = left_code(context)
+            if error: return None, error
+            right, error = right_code(context)
+            if error: return None, error
+
+            result, error = getattr(left, method_name)(right)
+            if error: return None, locate_error(error, node, context)
+            return result, None
+
+        return bin_op
+
+    def compile_bin_op_chain(self, leftmost, chain):
+        # a + b + c + ... as one closure looping over the operands, so long
+        # sums neither compile nor run recursively
+        locate_error = basic.locate_error
+        left_code = self.compile(leftmost)
+        steps = []
+        for bin_op in chain:
+            method_name = BINARY_OPERATIONS[operation_key(bin_op.op_tok)]
+            steps.append((self.compile(bin_op.right_node), method_name, method_name in SHORT_CIRCUITS, bin_op))
+
+        def bin_op_chain(context):
+            left, error = left_code(context)
+            if error: return None, error
+
+            for right_code, method_name, is_short_circuit, bin_op in steps:
+                if is_short_circuit:
+                    decided = short_circuit(method_name, left)
+                    if decided is not None:
+                        left = decided
+                        continue
+
+                right, error = right_code(context)
+                if error: return None, error
+
+                left, error = getattr(left, method_name)(right)
+                if error: return None, locate_error(error, bin_op, context)
+
+            return left, None
+
+        return bin_op_chain
+
+    def compile_UnaryOpNode(self, node):
+        minus_one, locate_error = basic.Number.minus_one, basic.locate_error
+        operand_code = self.compile(node.node)
+
+        if node.op_tok.type == TT_MINUS:
+            def unary_op(context):
+                number, error = operand_code(context)
+                if error: return None, error
+
+                number, error = number.multed_by(minus_one)
+                if error: return None, locate_error(error, node, context)
+                return number, None
+
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            def unary_op(context):
+                number, error = operand_code(context)
+                if error: return None, error
+
+                number, error = number.notted()
+                if error: return None, locate_error(error, node, context)
+                return number, None
+
+        else:
+            return operand_code
+
+        return unary_op
+
+    def compile_IfNode(self, node):
+        cases = [(self.compile(condition), self.compile(expr)) for condition, expr in node.cases]
+        else_code = self.compile(node.else_case) if node.else_case else None
+
+        def if_expr(context):
+            for condition_code, expr_code in cases:
+                condition_value, error = condition_code(context)
+                if error: return None, error
+
+                if condition_value.is_true():
+                    return expr_code(context)
+
+            if else_code:
+                return else_code(context)
+
+            return None, None
+
+        return if_expr
+
+    def compile_FuncDefNode(self, node):
+        Function = basic.Function
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        body_node = node.body_node
+        body_code = self.compile(body_node)
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        free_names, frame_size, address = node.free_names, node.frame_size, node.address
+        captures, cell_slots, prefill = node.captures, node.cell_slots, node.prefill
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def func_def(context):
+            func_value = Function(func_name, body_node, arg_names, body_code, frame_size).set_closure(
+                context, captures, cell_slots, prefill).set_pos(pos_start, pos_end, context.source)
+            func_value.enable_memo(free_names)
+
+            if address:
+                context.store(address, func_value)
+            elif func_name:
+                context.symbol_table.set(func_name, func_value)
+
+            return func_value, None
+
+        return func_def
+
+    def compile_CallNode(self, node):
+        Function, Lambda, RTError, TailCall = basic.Function, basic.Lambda, basic.RTError, basic.TailCall
+        is_tail = node.is_tail
+        if type(node.node_to_call) is basic.VarAccessNode:
+            callee_code = self.compile_var_access(node.node_to_call, False)
+        else:
+            callee_code = self.compile(node.node_to_call)
+        arg_codes = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def call(context):
+            value_to_call, error = callee_code(context)
+            if error: return None, error
+            value_to_call = value_to_call.copy().set_pos(pos_start, pos_end, context.source)
+
+            args = []
+            for arg_code in arg_codes:
+                arg_value, error = arg_code(context)
+                if error: return None, error
+                args.append(arg_value)
+
+            if isinstance(value_to_call, Lambda):
+                if len(args) != len(value_to_call.param_names):
+                    return None, RTError(
+                        pos_start, pos_end,
+                        f"Lambdas take exactly {len(value_to_call.param_names)} arguments",
+                        context
+                    )
+            elif not isinstance(value_to_call, Function):
+                return None, RTError(
+                    pos_start, pos_end,
+                    "Can only call functions or lambdas",
+                    context
+                )
+
+            if is_tail:
+                return TailCall(value_to_call, args), None
+
+            res = value_to_call.execute(args)
+            return res.value, res.error
+
+        return call
+
+    def compile_LambdaNode(self, node):
+        Lambda = basic.Lambda
+        param_names = node.param_names
+        body_node = node.body_node
+        body_code = self.compile(body_node)
+        frame_size, captures, cell_slots = node.frame_size, node.captures, node.cell_slots
+        prefill = node.prefill
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def lambda_expr(context):
+            return Lambda(param_names, body_node, body_code, frame_size).set_closure(
+                context, captures, cell_slots, prefill).set_pos(pos_start, pos_end, context.source), None
+
+        return lambda_expr
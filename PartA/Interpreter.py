@@ -1,5 +1,60 @@
 from PartA import basic
-import PartA.Lexen
+from PartA.Lexen import (
+    TT_AND, TT_DIV, TT_EE, TT_GT, TT_GTE, TT_KEYWORD, TT_LT, TT_LTE, TT_MINUS, TT_MODULO, TT_MUL,
+    TT_NE, TT_OR, TT_PLUS, TT_POW
+)
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# OPERATIONS
+#######################################
+
+# Maps an operator token to the name of the Value method implementing it.
+# Keyword operators (AND, OR) are keyed by their value, the rest by type.
+BINARY_OPERATIONS = {
+    TT_PLUS: 'added_to',
+    TT_MINUS: 'subbed_by',
+    TT_MUL: 'multed_by',
+    TT_DIV: 'dived_by',
+    TT_POW: 'powed_by',
+    TT_MODULO: 'moded_by',
+    TT_EE: 'get_comparison_eq',
+    TT_NE: 'get_comparison_ne',
+    TT_LT: 'get_comparison_lt',
+    TT_GT: 'get_comparison_gt',
+    TT_LTE: 'get_comparison_lte',
+    TT_GTE: 'get_comparison_gte',
+    TT_AND: 'anded_by',
+    TT_OR: 'ored_by',
+    'AND': 'anded_by',
+    'OR': 'ored_by',
+}
+
+
+def operation_key(op_tok):
+    if op_tok.type == TT_KEYWORD:
+        return op_tok.value
+    return op_tok.type
+
+
+# AND and OR only evaluate their right operand when the left one does not
+# decide the result. Every engine (and the Optimizer) asks short_circuit()
+# before evaluating it.
+SHORT_CIRCUITS = {'anded_by', 'ored_by'}
+
+
+def short_circuit(method_name, left):
+    # The value of left AND right, or left OR right, when left alone decides
+    # it: a false Number for AND, a true one for OR. None when the right
+    # operand is needed; an operand that is no Number then still fails in
+    # anded_by or ored_by, as it always did.
+    if type(left) is basic.Number:
+        if method_name == 'anded_by':
+            if not left.value: return basic.Number.false
+        elif left.value:
+            return basic.make_number(int(left.value))
+    return None
 
 
 #######################################
@@ -7,10 +62,15 @@ import PartA.Lexen
 #######################################
 
 class Interpreter:
+    visitors = {}  # node type -> visit method, filled in as node types are met; one per subclass
+
     def visit(self, node, context):
-        method_name = f'visit_{type(node).__name__}'
-        method = getattr(self, method_name, self.no_visit_method)
-        return method(node, context)
+        method = self.visitors.get(type(node))
+        if method is None:
+            method = getattr(type(self), f'visit_{type(node).__name__}', None)
+            if method is None: return self.no_visit_method(node, context)
+            self.visitors[type(node)] = method
+        return method(self, node, context)
 
     def no_visit_method(self, node, context):
         raise Exception(f'No visit_{type(node).__name__} method defined')
@@ -18,14 +78,20 @@ class Interpreter:
     ###################################
 
     def visit_NumberNode(self, node, context):
-        return basic.RTResult().success(
-            basic.Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return basic.RTResult().success(basic.make_number(node.tok.value))
 
     def visit_VarAccessNode(self, node, context):
         res = basic.RTResult()
         var_name = node.var_name_tok.value
-        value = context.symbol_table.get(var_name)
+        address = node.address
+        if not address:
+            value = context.symbol_table.get(var_name)
+        elif address[0] == basic.LOCAL:
+            value = context.frame[address[1]]
+            if value is None:
+                value = context.symbol_table.get(var_name)
+        else:
+            value = context.lookup(address, var_name)
 
         if not value:
             return res.failure(basic.RTError(
@@ -34,7 +100,8 @@ class Interpreter:
                 context
             ))
 
-        value = value.copy().set_pos(node.pos_start, node.pos_end)
+        if type(value) is not basic.Number:
+            value = value.copy().set_pos(node.pos_start, node.pos_end, context.source)
         return res.success(value)
 
     def visit_VarAssignNode(self, node, context):
@@ -43,49 +110,34 @@ class Interpreter:
         value = res.register(self.visit(node.value_node, context))
         if res.error: return res
 
-        context.symbol_table.set(var_name, value)
+        if node.address:
+            context.store(node.address, value)
+        else:
+            context.symbol_table.set(var_name, value)
         return res.success(value)
 
     def visit_BinOpNode(self, node, context):
         res = basic.RTResult()
-        left = res.register(self.visit(node.left_node, context))
-        if res.error: return res
-        right = res.register(self.visit(node.right_node, context))
+        leftmost, chain = binop_chain(node)
+        left = res.register(self.visit(leftmost, context))
         if res.error: return res
 
-        if node.op_tok.type == PartA.Lexen.TT_PLUS:
-            result, error = left.added_to(right)
-        elif node.op_tok.type == PartA.Lexen.TT_MINUS:
-            result, error = left.subbed_by(right)
-        elif node.op_tok.type == PartA.Lexen.TT_MUL:
-            result, error = left.multed_by(right)
-        elif node.op_tok.type == PartA.Lexen.TT_DIV:
-            result, error = left.dived_by(right)
-        elif node.op_tok.type == PartA.Lexen.TT_POW:
-            result, error = left.powed_by(right)
-        elif node.op_tok.type == PartA.Lexen.TT_MODULO:
-            result, error = left.moded_by(right)
-        elif node.op_tok.type == PartA.Lexen.TT_EE:
-            result, error = left.get_comparison_eq(right)
-        elif node.op_tok.type == PartA.Lexen.TT_NE:
-            result, error = left.get_comparison_ne(right)
-        elif node.op_tok.type == PartA.Lexen.TT_LT:
-            result, error = left.get_comparison_lt(right)
-        elif node.op_tok.type == PartA.Lexen.TT_GT:
-            result, error = left.get_comparison_gt(right)
-        elif node.op_tok.type == PartA.Lexen.TT_LTE:
-            result, error = left.get_comparison_lte(right)
-        elif node.op_tok.type == PartA.Lexen.TT_GTE:
-            result, error = left.get_comparison_gte(right)
-        elif node.op_tok.matches(PartA.Lexen.TT_KEYWORD, 'AND') or node.op_tok.type == PartA.Lexen.TT_AND:
-            result, error = left.anded_by(right)
-        elif node.op_tok.matches(PartA.Lexen.TT_KEYWORD, 'OR') or node.op_tok.type == PartA.Lexen.TT_OR:
-            result, error = left.ored_by(right)
+        # a + b + c is evaluated in this loop, not by recursing on a + b
+        for bin_op in chain:
+            method_name = BINARY_OPERATIONS[operation_key(bin_op.op_tok)]
+            if method_name in SHORT_CIRCUITS:
+                decided = short_circuit(method_name, left)
+                if decided is not None:
+                    left = decided
+                    continue
 
-        if error:
-            return res.failure(error)
-        else:
-            return res.success(result.set_pos(node.pos_start, node.pos_end))
+            right = res.register(self.visit(bin_op.right_node, context))
+            if res.error: return res
+
+            left, error = getattr(left, method_name)(right)
+            if error: return res.failure(basic.locate_error(error, bin_op, context))
+
+        return res.success(left)
 
     def visit_UnaryOpNode(self, node, context):
         res = basic.RTResult()
@@ -94,15 +146,15 @@ class Interpreter:
 
         error = None
 
-        if node.op_tok.type == PartA.Lexen.TT_MINUS:
-            number, error = number.multed_by(basic.Number(-1))
-        elif node.op_tok.matches(PartA.Lexen.TT_KEYWORD, 'NOT'):
+        if node.op_tok.type == TT_MINUS:
+            number, error = number.multed_by(basic.Number.minus_one)
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
             number, error = number.notted()
 
         if error:
-            return res.failure(error)
+            return res.failure(basic.locate_error(error, node, context))
         else:
-            return res.success(number.set_pos(node.pos_start, node.pos_end))
+            return res.success(number)
 
     def visit_IfNode(self, node, context):
         res = basic.RTResult()
@@ -129,11 +181,15 @@ class Interpreter:
         func_name = node.var_name_tok.value if node.var_name_tok else None
         body_node = node.body_node
         arg_names = [arg_name.value for arg_name in node.arg_name_toks]
-        func_value = basic.Function(func_name, body_node, arg_names).set_context(context).set_pos(node.pos_start,
-                                                                                                  node.pos_end)
-
-        # Store function in the symbol table
-        if node.var_name_tok:
+        func_value = basic.Function(func_name, body_node, arg_names, None, node.frame_size).set_closure(
+            context, node.captures, node.cell_slots, node.prefill
+        ).set_pos(node.pos_start, node.pos_end, context.source)
+        func_value.enable_memo(node.free_names)
+
+        # Store function in the symbol table, or the frame of the enclosing call
+        if node.address:
+            context.store(node.address, func_value)
+        elif node.var_name_tok:
             context.symbol_table.set(func_name, func_value)
 
         return res.success(func_value)
@@ -145,7 +201,7 @@ class Interpreter:
         # Get the value to call (function or lambda)
         value_to_call = res.register(self.visit(node.node_to_call, context))
         if res.error: return res
-        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end, context.source)
 
         # Evaluate arguments
         for arg_node in node.arg_nodes:
@@ -154,12 +210,7 @@ class Interpreter:
             args.append(arg_value)
 
         # Handle function or lambda call
-        if isinstance(value_to_call, basic.Function):
-            return_value = res.register(value_to_call.execute(args))
-            if res.error: return res
-            return res.success(return_value)
-
-        elif isinstance(value_to_call, basic.Lambda):
+        if isinstance(value_to_call, basic.Lambda):
             # Check if the number of arguments matches the number of parameters
             if len(args) != len(value_to_call.param_names):
                 return res.failure(basic.RTError(
@@ -167,18 +218,29 @@ class Interpreter:
                     f"Lambdas take exactly {len(value_to_call.param_names)} arguments",
                     context
                 ))
-            return_value = res.register(value_to_call.execute(args))
-            if res.error: return res
-            return res.success(return_value)
 
-        else:
+        elif not isinstance(value_to_call, basic.Function):
             return res.failure(basic.RTError(
                 node.pos_start, node.pos_end,
                 "Can only call functions or lambdas",
                 context
             ))
 
+        # Let the caller's execute() make calls in tail position
+        if node.is_tail:
+            return res.success(basic.TailCall(value_to_call, args))
+
+        return_value = res.register(value_to_call.execute(args))
+        if res.error: return res
+        return res.success(return_value)
+
     def visit_LambdaNode(self, node, context):
         return basic.RTResult().success(
-            basic.Lambda(node.param_names, node.body_node).set_context(context).set_pos(node.pos_start, node.pos_end)
+            basic.Lambda(node.param_names, node.body_node, None, node.frame_size).set_closure(
+                context, node.captures, node.cell_slots, node.prefill
+            ).set_pos(node.pos_start, node.pos_end, context.source)
         )
+
+
+# Lets BaseFunction.execute run the bodies of the functions defined here
+basic.body_interpreter = Interpreter
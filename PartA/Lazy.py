@@ -0,0 +1,263 @@
+from PartA import basic
+from PartA.Interpreter import Interpreter, BINARY_OPERATIONS, SHORT_CIRCUITS, operation_key
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# THUNKS
+#######################################
+
+# The lazy engine passes arguments by need: a FUNC or LAMBDA the program
+# defines gets each argument as a Thunk, the argument's node together
+# with the caller's context, and the body evaluates it the first time it
+# reads the parameter. The value (or error) is kept, so a parameter read
+# many times is evaluated once, and one never read is never evaluated.
+
+class Thunk:
+    def __init__(self, node, context):
+        self.node = node
+        self.context = context
+        self.value = None
+        self.error = None
+
+    def force(self):
+        if self.node is not None:
+            res = LazyInterpreter().visit(self.node, self.context)
+            self.value, self.error = res.value, res.error
+            self.node = self.context = None  # the caller's frame is not needed any more
+        return self.value, self.error
+
+    def __repr__(self):
+        return '<thunk>' if self.node is not None else f'<thunk {self.value}>'
+
+
+#######################################
+# STRICTNESS
+#######################################
+
+# A parameter the body reads on every run is evaluated before the call
+# instead: a Thunk would only cost time there. strict_slots() finds them
+# conservatively: only the first condition of an IF is always evaluated,
+# a slot used by the branches counts when every branch (and the ELSE) uses
+# it, the right operand of AND and OR and the arguments of calls do not
+# count, nor do the bodies of nested FUNCs and LAMBDAs.
+
+def strict_slots(body_node, param_count):
+    assigned = set()
+    used = used_slots(body_node, assigned)
+    return frozenset(slot for slot in used if slot < param_count and slot not in assigned)
+
+
+def used_slots(node, assigned):
+    # The frame slots node always reads; the slots it assigns go to assigned
+    kind = type(node)
+
+    if kind is basic.VarAccessNode:
+        address = node.address
+        return {address[1]} if address and address[0] == basic.LOCAL else set()
+    if kind is basic.VarAssignNode:
+        if node.address:
+            assigned.add(node.address[1])
+        return used_slots(node.value_node, assigned)
+    if kind is basic.BinOpNode:
+        leftmost, chain = binop_chain(node)
+        used = used_slots(leftmost, assigned)
+        for bin_op in chain:
+            right = used_slots(bin_op.right_node, assigned)
+            if BINARY_OPERATIONS[operation_key(bin_op.op_tok)] not in SHORT_CIRCUITS:
+                used |= right
+        return used
+    if kind is basic.UnaryOpNode:
+        return used_slots(node.node, assigned)
+    if kind is basic.IfNode:
+        used = used_slots(node.else_case, assigned) if node.else_case else set()
+        for condition, expr in reversed(node.cases):
+            used = used_slots(condition, assigned) | (used_slots(expr, assigned) & used)
+        return used
+    if kind is basic.CallNode:
+        used = used_slots(node.node_to_call, assigned)
+        for arg_node in node.arg_nodes:
+            used_slots(arg_node, assigned)
+        return used
+    if kind is basic.FuncDefNode:
+        if node.address:
+            assigned.add(node.address[1])
+    return set()
+
+
+#######################################
+# LAZY INTERPRETER
+#######################################
+
+# The body of a FUNC or LAMBDA defined in the lazy engine, run by
+# BaseFunction.execute like the compiled bodies. Since it stays with the
+# function, a function defined here passes its arguments by need even
+# when another engine calls it; the arguments that engine passes are then
+# already evaluated.
+
+class LazyBody:
+    def __init__(self, body_node, param_count):
+        self.body_node = body_node
+        self.strict = strict_slots(body_node, param_count)
+
+    def __call__(self, context):
+        res = LazyInterpreter().visit(self.body_node, context)
+        return res.value, res.error
+
+
+def lazy_body(node, param_count):
+    # The LazyBody of a FuncDefNode or LambdaNode, made once per node
+    body = node.lazy_body
+    if body is None or body.body_node is not node.body_node:
+        body = node.lazy_body = LazyBody(node.body_node, param_count)
+    return body
+
+
+class LazyInterpreter(Interpreter):
+    visitors = {}
+
+    def lookup(self, node, context):
+        # The variable of a VarAccessNode as it is stored: a parameter not
+        # read yet is still its Thunk
+        var_name = node.var_name_tok.value
+        address = node.address
+        if not address:
+            return context.symbol_table.get(var_name)
+        if address[0] == basic.LOCAL:
+            value = context.frame[address[1]]
+            return context.symbol_table.get(var_name) if value is None else value
+        return context.lookup(address, var_name)
+
+    def visit_VarAccessNode(self, node, context):
+        res = basic.RTResult()
+        value = self.lookup(node, context)
+
+        if not value:
+            return res.failure(basic.RTError(
+                node.pos_start, node.pos_end,
+                f"'{node.var_name_tok.value}' is not defined",
+                context
+            ))
+
+        if type(value) is Thunk:
+            value, error = value.force()
+            if error: return res.failure(error)
+            if node.address[0] == basic.LOCAL:
+                context.frame[node.address[1]] = value
+            if value is None:
+                # An argument of no value, such as IF 0 THEN 1, leaves the
+                # variable unset, as in the other engines
+                value = context.symbol_table.get(node.var_name_tok.value)
+                if not value:
+                    return res.failure(basic.RTError(
+                        node.pos_start, node.pos_end,
+                        f"'{node.var_name_tok.value}' is not defined",
+                        context
+                    ))
+
+        if type(value) is not basic.Number:
+            value = value.copy().set_pos(node.pos_start, node.pos_end, context.source)
+        return res.success(value)
+
+    def visit_FuncDefNode(self, node, context):
+        res = super().visit_FuncDefNode(node, context)
+        res.value.body_code = lazy_body(node, len(node.arg_name_toks))
+        return res
+
+    def visit_LambdaNode(self, node, context):
+        res = super().visit_LambdaNode(node, context)
+        res.value.body_code = lazy_body(node, len(node.param_names))
+        return res
+
+    def visit_CallNode(self, node, context):
+        res = basic.RTResult()
+
+        value_to_call = res.register(self.visit(node.node_to_call, context))
+        if res.error: return res
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end, context.source)
+
+        # Checked before the arguments, which may not be evaluated at all
+        if isinstance(value_to_call, basic.Lambda):
+            if len(node.arg_nodes) != len(value_to_call.param_names):
+                return res.failure(basic.RTError(
+                    node.pos_start, node.pos_end,
+                    f"Lambdas take exactly {len(value_to_call.param_names)} arguments",
+                    context
+                ))
+
+        elif not isinstance(value_to_call, basic.Function):
+            return res.failure(basic.RTError(
+                node.pos_start, node.pos_end,
+                "Can only call functions or lambdas",
+                context
+            ))
+
+        # Built-ins and functions of the other engines get evaluated arguments
+        body_code = value_to_call.body_code
+        strict = body_code.strict if type(body_code) is LazyBody else None
+
+        args = []
+        for slot, arg_node in enumerate(node.arg_nodes):
+            if strict is None or slot in strict:
+                arg_value = res.register(self.visit(arg_node, context))
+                if res.error: return res
+            else:
+                arg_value = self.delay(arg_node, context)
+            args.append(arg_value)
+
+        if node.is_tail:
+            return res.success(basic.TailCall(value_to_call, args))
+
+        return_value = res.register(value_to_call.execute(args))
+        if res.error: return res
+        return res.success(return_value)
+
+    def delay(self, node, context):
+        # An argument as a call by need passes it. LAMBDAs cost less to
+        # evaluate than to delay, and a variable is passed on as it is, so
+        # a Thunk handed down to further calls is still evaluated once
+        kind = type(node)
+        if kind is basic.LambdaNode:
+            return self.visit(node, context).value
+
+        if kind is basic.VarAccessNode:
+            value = self.lookup(node, context)
+            if type(value) is Thunk:
+                return value
+            if value:
+                return self.visit(node, context).value
+
+        elif self.is_cheap(node, context):
+            # Arithmetic on values at hand, such as the acc + n of an
+            # accumulating recursion: evaluated now, or each call would
+            # wrap the last one's Thunk in a new one. Its error, if any,
+            # is kept for when the parameter is read.
+            res = self.visit(node, context)
+            if not res.error:
+                return res.value
+
+        return Thunk(node, context)
+
+    def is_cheap(self, node, context):
+        # Whether node only does arithmetic on numbers and on variables
+        # that are defined and already evaluated
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            kind = type(node)
+
+            if kind is basic.NumberNode:
+                pass
+            elif kind is basic.VarAccessNode:
+                value = self.lookup(node, context)
+                if not value or type(value) is Thunk:
+                    return False
+            elif kind is basic.BinOpNode:
+                nodes.append(node.left_node)
+                nodes.append(node.right_node)
+            elif kind is basic.UnaryOpNode:
+                nodes.append(node.node)
+            else:
+                return False
+
+        return True
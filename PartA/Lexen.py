@@ -1,3 +1,6 @@
+import decimal
+import re
+
 from PartA import basic
 
 #######################################
@@ -31,7 +34,7 @@ TT_LAMBDA = 'LAMBDA'
 TT_DOT = 'DOT'
 TT_EOF = 'EOF'
 
-KEYWORDS = [
+KEYWORDS = {
     'VAR',
     'AND',
     'OR',
@@ -42,21 +45,45 @@ KEYWORDS = [
     'ELSE',
     'FUNC',
     'LAMBDA'
-]
+}
+
+OPERATORS = {
+    '+': TT_PLUS,
+    '-': TT_MINUS,
+    '*': TT_MUL,
+    '/': TT_DIV,
+    '%': TT_MODULO,
+    '^': TT_POW,
+    '(': TT_LPAREN,
+    ')': TT_RPAREN,
+    '=': TT_EQ,
+    '==': TT_EE,
+    '!=': TT_NE,
+    '<': TT_LT,
+    '>': TT_GT,
+    '<=': TT_LTE,
+    '>=': TT_GTE,
+    ',': TT_COMMA,
+    '->': TT_ARROW,
+    '||': TT_OR,
+    '&&': TT_AND,
+    'λ': TT_LAMBDA,
+    '.': TT_DOT,
+}
 
 
 class Token:
+    __slots__ = ('type', 'value', 'pos_start', 'pos_end')
+
     def __init__(self, type_, value=None, pos_start=None, pos_end=None):
         self.type = type_
         self.value = value
 
-        if pos_start:
-            self.pos_start = pos_start.copy()
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance()
-
-        if pos_end:
-            self.pos_end = pos_end.copy()
+        # Offsets into the Source; a token given only its start is one character long
+        if pos_start is not None and pos_end is None:
+            pos_end = pos_start + 1
+        self.pos_start = pos_start
+        self.pos_end = pos_end
 
     def matches(self, type_, value):
         return self.type == type_ and self.value == value
@@ -70,188 +97,68 @@ class Token:
 # LEXER
 #######################################
 
-class Lexer:
-    def __init__(self, fn, text):
-        self.fn = fn
-        self.text = text
-        self.pos = basic.Position(-1, 0, -1, fn, text)
-        self.current_char = None
-        self.advance()
+# One pass over the text with a single pattern: every match is a token,
+# a run of blanks, or (the last alternative) a character that starts no
+# token. Operators are matched longest first.
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>[ \t]+)
+  | (?P<number>[0-9]+(?:\.[0-9]*)?)
+  | (?P<identifier>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<operator>->|==|!=|<=|>=|&&|\|\||[-+*/%^()=<>,.λ])
+  | (?P<error>.)
+""", re.VERBOSE | re.DOTALL)
+
 
-    def advance(self):
-        self.pos.advance(self.current_char)
-        self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
+def int_value(lexeme):
+    # int() refuses literals of more than sys.get_int_max_str_digits()
+    # digits, such as a large result printed before; Decimal does not
+    try:
+        return int(lexeme)
+    except ValueError:
+        return int(decimal.Decimal(lexeme))
+
+
+class Lexer:
+    def __init__(self, fn, text, first_line=0):
+        self.source = basic.Source(fn, text, first_line)
 
     def make_tokens(self):
         tokens = []
 
-        while self.current_char is not None:
-            if self.current_char in ' \t':
-                self.advance()
-            elif self.current_char in basic.DIGITS:
-                tokens.append(self.make_number())
-            elif self.current_char in basic.LETTERS:
-                tokens.append(self.make_identifier())
-            elif self.current_char == '+':
-                tokens.append(Token(TT_PLUS, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '-':
-                tokens.append(self.make_minus_or_arrow())
-            elif self.current_char == '*':
-                tokens.append(Token(TT_MUL, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '/':
-                tokens.append(Token(TT_DIV, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '%':
-                tokens.append(Token(TT_MODULO, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '^':
-                tokens.append(Token(TT_POW, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '(':
-                tokens.append(Token(TT_LPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ')':
-                tokens.append(Token(TT_RPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '!':
-                token, error = self.make_not_equals()
-                if error: return [], error
-                tokens.append(token)
-            elif self.current_char == '=':
-                tokens.append(self.make_equals())
-            elif self.current_char == '<':
-                tokens.append(self.make_less_than())
-            elif self.current_char == '>':
-                tokens.append(self.make_greater_than())
-            elif self.current_char == ',':
-                tokens.append(Token(TT_COMMA, pos_start=self.pos))
-                self.advance()
-            elif self.current_char =='&':
-                token, error = self.make_and()
-                if error: return [], error
-                tokens.append(token)
-            elif self.current_char =='|':
-                token, error = self.make_or()
-                if error: return [], error
-                tokens.append(token)
-            elif self.current_char == 'λ' or self.current_char.lower() == 'lambda':
-                tokens.append(Token(TT_LAMBDA, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '.':
-                tokens.append(Token(TT_DOT, pos_start=self.pos))
-                self.advance()
-
+        for match in TOKEN_PATTERN.finditer(self.source.text):
+            kind = match.lastgroup
+            if kind == 'space':
+                continue
+
+            start, end = match.span()
+            lexeme = match.group()
+
+            if kind == 'operator':
+                tokens.append(Token(OPERATORS[lexeme], None, start, end))
+            elif kind == 'identifier':
+                tok_type = TT_KEYWORD if lexeme in KEYWORDS else TT_IDENTIFIER
+                tokens.append(Token(tok_type, lexeme, start, end))
+            elif kind == 'number':
+                if '.' in lexeme:
+                    tokens.append(Token(TT_FLOAT, float(lexeme), start, end))
+                else:
+                    tokens.append(Token(TT_INT, int_value(lexeme), start, end))
             else:
-                pos_start = self.pos.copy()
-                char = self.current_char
-                self.advance()
-                return [], basic.IllegalCharError(pos_start, self.pos, "'" + char + "'")
+                return [], self.make_error(start).set_source(self.source)
 
-        tokens.append(Token(TT_EOF, pos_start=self.pos))
+        end = len(self.source.text)
+        tokens.append(Token(TT_EOF, None, end, end + 1))
         return tokens, None
 
-    def make_number(self):
-        num_str = ''
-        dot_count = 0
-        pos_start = self.pos.copy()
-
-        while self.current_char is not None and self.current_char in basic.DIGITS + '.':
-            if self.current_char == '.':
-                if dot_count == 1: break
-                dot_count += 1
-            num_str += self.current_char
-            self.advance()
-
-        if dot_count == 0:
-            return Token(TT_INT, int(num_str), pos_start, self.pos)
-        else:
-            return Token(TT_FLOAT, float(num_str), pos_start, self.pos)
-
-    def make_identifier(self):
-        id_str = ''
-        pos_start = self.pos.copy()
-
-        while self.current_char is not None and self.current_char in basic.LETTERS_DIGITS + '_':
-            id_str += self.current_char
-            self.advance()
-
-        tok_type = TT_KEYWORD if id_str in KEYWORDS else TT_IDENTIFIER
-        return Token(tok_type, id_str, pos_start, self.pos)
-
-    def make_minus_or_arrow(self):
-        tok_type = TT_MINUS
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '>':
-            self.advance()
-            tok_type = TT_ARROW
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_and(self):
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '&':
-            self.advance()
-            return Token(TT_AND, pos_start=pos_start, pos_end=self.pos), None
-
-        return None, basic.ExpectedCharError(pos_start, self.pos, "'&' (after '&')")
-
-    def make_or(self):
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '|':
-            self.advance()
-            return Token(TT_OR, pos_start=pos_start, pos_end=self.pos), None
-
-        return None, basic.ExpectedCharError(pos_start, self.pos, "'|' (after '|')")
-
-    def make_not_equals(self):
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            return Token(TT_NE, pos_start=pos_start, pos_end=self.pos), None
-
-        self.advance()
-        return None, basic.ExpectedCharError(pos_start, self.pos, "'=' (after '!')")
-
-    def make_equals(self):
-        tok_type = TT_EQ
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = TT_EE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_less_than(self):
-        tok_type = TT_LT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = TT_LTE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_greater_than(self):
-        tok_type = TT_GT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = TT_GTE
+    def make_error(self, idx):
+        char = self.source.text[idx]
 
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+        if char == '!':
+            # The character after the '!' is taken as part of the error
+            return basic.ExpectedCharError(idx, idx + 2, "'=' (after '!')")
+        if char == '&':
+            return basic.ExpectedCharError(idx, idx + 1, "'&' (after '&')")
+        if char == '|':
+            return basic.ExpectedCharError(idx, idx + 1, "'|' (after '|')")
 
+        return basic.IllegalCharError(idx, idx + 1, "'" + char + "'")
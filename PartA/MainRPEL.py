@@ -1,4 +1,13 @@
-from PartA import basic
+import argparse
+import os
+import sys
+import time
+
+if __package__ in (None, ''):
+    # Run as a script (python PartA/MainRPEL.py): make the PartA package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PartA import basic, Runner
 
 
 def main():
@@ -25,7 +34,7 @@ def main():
 
         try:
             # Run the RPEL expression
-            result, error = basic.run('<stdin>', text)
+            result, error = Runner.run('<stdin>', text)
 
             if error:
                 print(f"Error: {error}")
@@ -37,6 +46,7 @@ def main():
 
 
 def tryRPEL():
+    governor = basic.Governor(basic.COMMAND_MAX_STEPS)
     try:
         while True:
             text = input('Main > ')
@@ -45,15 +55,175 @@ def tryRPEL():
             if text.lower() in ('exit', 'quit'):
                 print("Exiting the program...")
                 break
-            result, error = basic.run('<stdin>', text)
-            if error:
-                print(error.as_string())
-            else:
-                print(repr(result))
+
+            # ':profile <command>' runs the command under the profiler and
+            # prints where its time went, per FUNC
+            profiler = None
+            if text.startswith(':profile'):
+                text = text[len(':profile'):].strip()
+                profiler = new_profiler().start()
+
+            try:
+                result, error = Runner.run('<stdin>', text, governor=governor)
+                output = error.as_string() if error else repr(result)
+            except Exception as e:
+                output = f"An error occurred: {str(e)}"
+            finally:
+                if profiler: profiler.stop()
+
+            print(output)
+            if profiler:
+                print(profiler.report())
     except KeyboardInterrupt:
         print("\nProgram interrupted. Exiting...")
 
 
+#######################################
+# BATCH MODE
+#######################################
+
+def new_profiler():
+    # PartA/Profiler.py is only imported when a profile is asked for
+    from PartA.Profiler import Profiler
+    return Profiler()
+
+
+def read_commands(file):
+    # Yields (line number, text) for every non-blank line, reading the file
+    # as it goes so that it is never held in memory whole
+    for line_no, line in enumerate(file, 1):
+        text = line.rstrip('\r\n')
+        if text.strip():
+            yield line_no, text
+
+
+def run_batch(file, out, fn, engine='interpreter', timing=True, jobs=1, governor=None, script_cache=None):
+    # Runs every command of file against the shared global context and
+    # writes each result or error to out as soon as it is known. With jobs
+    # other than 1, commands that only read globals run on that many
+    # processes (see PartA/Parallel.py). governor holds the limits of each
+    # command; with jobs 1, script_cache gives the parsed commands (see
+    # PartA/ScriptCache.py). Returns (commands, errors, seconds).
+    # Only batch mode imports PartA/Parallel.py, the REPL starts without it
+    from PartA.Parallel import ParallelBatch, run_command
+
+    count = errors = 0
+    total_time = 0.0
+
+    commands = read_commands(file)
+    if script_cache and jobs == 1:
+        results = (
+            (line_no,) + run_cached(fn, line_no, text, engine, governor, script_cache) for line_no, text in commands
+        )
+    elif jobs == 1:
+        results = (
+            (line_no,) + run_command(fn, text, engine, governor=governor, line_no=line_no)
+            for line_no, text in commands
+        )
+    else:
+        results = ParallelBatch(fn, engine, jobs or None, governor=governor).run(commands)
+
+    for line_no, output, failed, elapsed in results:
+        count += 1
+        total_time += elapsed
+        if failed: errors += 1
+
+        if timing:
+            out.write(f"[line {line_no}, {elapsed * 1000:.3f} ms] {output}\n")
+        else:
+            out.write(output + '\n')
+
+    return count, errors, total_time
+
+
+def run_cached(fn, line_no, text, engine, governor, script_cache):
+    from PartA.Parallel import run_command
+
+    start = time.perf_counter()
+    program = script_cache.program(text, line_no - 1)
+    output, failed, seconds = run_command(fn, text, engine, governor=governor, program=program, line_no=line_no)
+    return output, failed, time.perf_counter() - start
+
+
+def batch_main(args):
+    from PartA.ScriptCache import ScriptCache
+
+    # A script or output file that cannot be opened is reported in one line,
+    # with exit status 2 as for other command line errors
+    try:
+        file = sys.stdin if args.script == '-' else open(args.script, encoding='utf-8')
+    except OSError as error:
+        print(f"Cannot read {args.script}: {error.strerror}", file=sys.stderr)
+        return 2
+    try:
+        out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    except OSError as error:
+        if file is not sys.stdin: file.close()
+        print(f"Cannot write {args.output}: {error.strerror}", file=sys.stderr)
+        return 2
+    fn = '<stdin>' if args.script == '-' else args.script
+
+    profiler = new_profiler() if args.profile else None
+    max_steps = basic.COMMAND_MAX_STEPS if args.max_steps is None else args.max_steps
+    governor = basic.Governor(max_steps, args.max_depth, args.time_limit)
+    use_cache = args.script != '-' and not args.no_cache and args.jobs == 1
+    script_cache = ScriptCache(args.script, fn) if use_cache else None
+
+    try:
+        if profiler: profiler.start()
+        start = time.perf_counter()
+        count, errors, eval_time = run_batch(
+            file, out, fn, args.engine, not args.no_timing, args.jobs, governor, script_cache
+        )
+        wall_time = time.perf_counter() - start
+        if script_cache: script_cache.save()
+    finally:
+        if profiler: profiler.stop()
+        if script_cache: script_cache.close()
+        if file is not sys.stdin: file.close()
+        if out is not sys.stdout: out.close()
+
+    if profiler:
+        profiler.write_collapsed(args.profile)
+        print(profiler.report(), file=sys.stderr)
+
+    rate = count / wall_time if wall_time else 0.0
+    print(
+        f"{count} commands, {errors} errors in {wall_time:.3f} s "
+        f"({eval_time:.3f} s evaluating, {rate:.1f} commands/s)",
+        file=sys.stderr
+    )
+    return 1 if errors else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run RPEL interactively, or a file of commands one per line.")
+    parser.add_argument('script', nargs='?', help="file with one RPEL command per line ('-' for stdin)")
+    parser.add_argument('-o', '--output', help="write results to this file instead of stdout")
+    parser.add_argument('-e', '--engine', default='interpreter', choices=('interpreter', 'compiler', 'vm', 'lazy'),
+                        help="how to evaluate the commands (default: interpreter)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="run commands that only read globals on this many processes (0: one per CPU)")
+    parser.add_argument('--no-timing', action='store_true', help="leave out the per-command timings")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="neither read nor write the parsed script cache (<script>.rpelc)")
+    parser.add_argument('--time-limit', type=float, help="seconds each command may run")
+    parser.add_argument('--max-steps', type=int,
+                        help=f"FUNC and LAMBDA calls each command may make (default: {basic.COMMAND_MAX_STEPS}, 0: no limit)")
+    parser.add_argument('--max-depth', type=int,
+                        help=f"how deeply calls may nest (default: {basic.MAX_DEPTH})")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="profile the commands, writing collapsed stacks for flame graphs to FILE")
+    args = parser.parse_args(argv)
+    if args.profile and args.jobs != 1:
+        parser.error("--profile only sees the main process, use it with -j 1")
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.script:
+        sys.exit(batch_main(args))
+
     main()
     tryRPEL()
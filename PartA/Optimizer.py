@@ -0,0 +1,155 @@
+from PartA import basic
+from PartA.Lexen import TT_FLOAT, TT_INT, TT_MINUS, TT_MUL, TT_PLUS, TT_POW, Token
+from PartA.Interpreter import BINARY_OPERATIONS, SHORT_CIRCUITS, operation_key, short_circuit
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# OPTIMIZER
+#######################################
+
+# Rewrites the AST before it is run: folds operations on literals, and
+# ANDs and ORs whose left operand is a literal deciding them, drops IF
+# cases whose condition is a literal and removes x*1, x+0, x-0 and x^1
+# when x can only be a number.
+# Folded nodes keep the positions of the expression they replace, and an
+# operation whose folding fails (such as 1/0) is left for the runtime so
+# it still reports its error.
+
+class Optimizer:
+    def visit(self, node):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node)
+
+    def no_visit_method(self, node):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    ###################################
+
+    def visit_NumberNode(self, node):
+        return node
+
+    def visit_VarAccessNode(self, node):
+        return node
+
+    def visit_VarAssignNode(self, node):
+        node.value_node = self.visit(node.value_node)
+        return node
+
+    def visit_BinOpNode(self, node):
+        leftmost, chain = binop_chain(node)
+        left = self.visit(leftmost)
+        for bin_op in chain:
+            bin_op.left_node = left
+            bin_op.right_node = self.visit(bin_op.right_node)
+            left = self.simplify_bin_op(bin_op)
+        return left
+
+    def simplify_bin_op(self, node):
+        left, right = node.left_node, node.right_node
+        op_type = node.op_tok.type
+        method_name = BINARY_OPERATIONS[operation_key(node.op_tok)]
+
+        if isinstance(left, basic.NumberNode) and method_name in SHORT_CIRCUITS:
+            # The right operand would never be evaluated, whatever it is
+            decided = short_circuit(method_name, basic.Number(left.tok.value))
+            if decided is not None:
+                return make_number_node(decided.value, node)
+
+        if isinstance(left, basic.NumberNode) and isinstance(right, basic.NumberNode):
+            method = getattr(basic.Number(left.tok.value), method_name, None)
+            if method:
+                result, error = method(basic.Number(right.tok.value))
+                if not error:
+                    return make_number_node(result.value, node)
+
+        # x+0 is only x when x is a number; for a function it is an error
+        if is_int_literal(right, 0) and op_type in (TT_PLUS, TT_MINUS) and is_numeric(left):
+            return left
+        if is_int_literal(left, 0) and op_type == TT_PLUS and is_numeric(right):
+            return right
+        if is_int_literal(right, 1) and op_type in (TT_MUL, TT_POW) and is_numeric(left):
+            return left
+        if is_int_literal(left, 1) and op_type == TT_MUL and is_numeric(right):
+            return right
+
+        return node
+
+    def visit_UnaryOpNode(self, node):
+        node.node = operand = self.visit(node.node)
+
+        if node.op_tok.type == TT_PLUS:
+            return operand
+
+        if isinstance(operand, basic.NumberNode):
+            number = basic.Number(operand.tok.value)
+            if node.op_tok.type == TT_MINUS:
+                result, error = number.multed_by(basic.Number(-1))
+            else:
+                result, error = number.notted()
+
+            if not error:
+                return make_number_node(result.value, node)
+
+        return node
+
+    def visit_IfNode(self, node):
+        cases = []
+        else_case = self.visit(node.else_case) if node.else_case else None
+
+        for condition, expr in node.cases:
+            condition = self.visit(condition)
+            expr = self.visit(expr)
+
+            if isinstance(condition, basic.NumberNode):
+                if condition.tok.value == 0:
+                    continue
+
+                # Always taken: later cases and the ELSE can never run
+                else_case = expr
+                break
+
+            cases.append((condition, expr))
+
+        if not cases:
+            if else_case:
+                return else_case
+
+            # Nothing can match, but the IF still has to produce its empty result
+            node.cases = node.cases[:1]
+            return node
+
+        new_node = basic.IfNode(cases, else_case)
+        new_node.pos_start, new_node.pos_end = node.pos_start, node.pos_end
+        return new_node
+
+    def visit_FuncDefNode(self, node):
+        node.body_node = self.visit(node.body_node)
+        node.analyze_body()
+        return node
+
+    def visit_CallNode(self, node):
+        node.node_to_call = self.visit(node.node_to_call)
+        node.arg_nodes = [self.visit(arg_node) for arg_node in node.arg_nodes]
+        return node
+
+    def visit_LambdaNode(self, node):
+        node.body_node = self.visit(node.body_node)
+        node.analyze_body()
+        return node
+
+
+def is_numeric(node):
+    # Whether node can only evaluate to a Number: literals, and operations,
+    # which fail rather than give anything else (unary + is gone by now)
+    return isinstance(node, (basic.NumberNode, basic.BinOpNode, basic.UnaryOpNode))
+
+
+def is_int_literal(node, value):
+    return isinstance(node, basic.NumberNode) and type(node.tok.value) is int and node.tok.value == value
+
+
+def make_number_node(value, node):
+    tok_type = TT_INT if type(value) is int else TT_FLOAT
+    return basic.NumberNode(Token(tok_type, value, node.pos_start, node.pos_end))
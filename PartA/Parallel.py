@@ -0,0 +1,235 @@
+import os
+import time
+from collections import deque
+
+from PartA import basic, Runner
+from PartA.Analysis import global_names
+from PartA.Cache import LRUCache
+
+
+#######################################
+# COMMANDS
+#######################################
+
+def run_command(fn, text, engine='interpreter', symbol_table=None, governor=None, program=None, line_no=1):
+    # Runs one command, line line_no of fn, against the global context (or
+    # the globals of symbol_table), within the limits of governor; returns
+    # (output, failed, seconds), output being what the REPL prints for it.
+    # program is the text already parsed, if it is.
+    start = time.perf_counter()
+    try:
+        if program is None:
+            result, error = Runner.run(
+                fn, text, engine, symbol_table=symbol_table, governor=governor, first_line=line_no - 1
+            )
+        else:
+            result, error = Runner.run_program(program, engine, symbol_table, governor)
+        output = error.as_string() if error else repr(result)
+        failed = error is not None
+    except Exception as e:
+        output = f"An error occurred: {str(e)}"
+        failed = True
+    return output, failed, time.perf_counter() - start
+
+
+#######################################
+# DEFINITIONS
+#######################################
+
+# How a worker process gets a global the batch defined
+DEF_FUNC = 'func'      # run payload, (line number, text) of a line that is only this FUNC
+DEF_NUMBER = 'number'  # bind the name to Number(payload)
+DEF_LOCAL = 'local'    # the value cannot be copied; commands that need it run in the main process
+
+
+class Definition:
+    def __init__(self, def_id, kind, payload, reads):
+        self.def_id = def_id
+        self.kind = kind
+        self.payload = payload
+        self.reads = reads  # names a FUNC body reads, needed wherever the FUNC is
+
+    def __repr__(self):
+        return f'<definition {self.def_id} {self.kind}>'
+
+
+#######################################
+# PARALLEL BATCH
+#######################################
+
+# Commands that define globals (a top-level VAR or named FUNC) run in the
+# main process, in order. The other commands only read globals, so they
+# are independent of each other: they are sent to a pool of processes in
+# chunks, each chunk with the definitions its commands need (following the
+# names FUNC bodies read). Results come back in input order.
+
+class ParallelBatch:
+    def __init__(self, fn, engine='interpreter', jobs=None, chunk_size=64, governor=None):
+        self.fn = fn
+        self.engine = engine
+        self.governor = governor  # limits of every command, in whichever process
+        self.jobs = jobs or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.definitions = {}  # name -> Definition, for the globals defined so far
+        self.next_def_id = 0
+        self.analyses = LRUCache(1024)  # text -> (defined, read, is_func_line)
+
+    def run(self, commands):
+        # commands yields (line number, text); yields (line number, output,
+        # failed, seconds) for each of them in the same order. The process
+        # pool is imported here, as it takes longer to import than the rest
+        # of PartA together and only -j needs it.
+        from concurrent.futures import Future, ProcessPoolExecutor
+
+        pending = deque()  # (line numbers, Future of their results), in input order
+        max_pending = self.jobs * 4
+        chunk, chunk_reads = [], set()
+        initial_symbols = dict(basic.global_symbol_table.symbols)
+
+        with ProcessPoolExecutor(self.jobs, initializer=init_worker, initargs=(initial_symbols,)) as pool:
+            for line_no, text in commands:
+                defined, read, is_func_line = self.analyze(text)
+
+                if not defined and self.can_replicate(read):
+                    chunk.append((line_no, text))
+                    chunk_reads |= read
+                    if len(chunk) >= self.chunk_size:
+                        pending.append(self.submit(pool, chunk, chunk_reads))
+                        chunk, chunk_reads = [], set()
+                else:
+                    if chunk:
+                        pending.append(self.submit(pool, chunk, chunk_reads))
+                        chunk, chunk_reads = [], set()
+
+                    future = Future()
+                    result = run_command(self.fn, text, self.engine, governor=self.governor, line_no=line_no)
+                    future.set_result([result])
+                    pending.append(([line_no], future))
+                    if defined:
+                        self.record(defined, read, is_func_line, line_no, text)
+
+                yield from self.finished(pending, max_pending)
+
+            if chunk:
+                pending.append(self.submit(pool, chunk, chunk_reads))
+            yield from self.finished(pending, 0)
+
+    def analyze(self, text):
+        analysis = self.analyses.get(text)
+        if analysis is not None:
+            return analysis
+
+        program, error = Runner.parse(self.fn, text)
+        if error:
+            # Fails the same way wherever it runs
+            analysis = (set(), set(), False)
+        else:
+            defined, read = global_names(program.node)
+            analysis = (defined, read, isinstance(program.node, basic.FuncDefNode))
+
+        self.analyses.put(text, analysis)
+        return analysis
+
+    def needed(self, names):
+        # name -> Definition (None if the batch has not defined it) for names
+        # and everything the FUNCs among them read
+        env = {}
+        names = list(names)
+
+        while names:
+            name = names.pop()
+            if name in env: continue
+
+            definition = self.definitions.get(name)
+            env[name] = definition
+            if definition is not None:
+                names.extend(definition.reads)
+
+        return env
+
+    def can_replicate(self, names):
+        for definition in self.needed(names).values():
+            if definition is not None and definition.kind == DEF_LOCAL:
+                return False
+        return True
+
+    def record(self, defined, read, is_func_line, line_no, text):
+        # Notes how a worker can recreate the globals a command just defined here
+        for name in defined:
+            value = basic.global_symbol_table.get(name)
+            if value is None: continue
+
+            if is_func_line and isinstance(value, basic.Function):
+                definition = Definition(self.next_def_id, DEF_FUNC, (line_no, text), frozenset(read))
+            elif type(value) is basic.Number:
+                definition = Definition(self.next_def_id, DEF_NUMBER, value.value, frozenset())
+            else:
+                definition = Definition(self.next_def_id, DEF_LOCAL, None, frozenset())
+
+            self.definitions[name] = definition
+            self.next_def_id += 1
+
+    def submit(self, pool, chunk, reads):
+        env = {}
+        for name, definition in self.needed(reads).items():
+            env[name] = (definition.def_id, definition.kind, definition.payload) if definition else None
+
+        future = pool.submit(run_chunk, self.fn, self.engine, env, chunk, self.governor)
+        return [line_no for line_no, text in chunk], future
+
+    def finished(self, pending, max_pending):
+        # Yields the results at the head of pending that are ready, waiting
+        # for them while more than max_pending entries are queued
+        while pending and (pending[0][1].done() or len(pending) > max_pending):
+            line_nos, future = pending.popleft()
+            for line_no, result in zip(line_nos, future.result()):
+                yield (line_no,) + result
+
+
+#######################################
+# WORKER
+#######################################
+
+# In a worker process: the def_id of every batch definition installed in the
+# global table, and the bindings the table started with
+installed = {}
+original_symbols = {}
+
+
+def init_worker(symbols):
+    global original_symbols
+    original_symbols = symbols
+    basic.global_symbol_table.symbols = dict(symbols)
+    installed.clear()
+
+
+def run_chunk(fn, engine, env, chunk, governor=None):
+    # chunk holds the (line number, text) of the commands to run
+    install(fn, engine, env)
+    return [run_command(fn, text, engine, governor=governor, line_no=line_no) for line_no, text in chunk]
+
+
+def install(fn, engine, env):
+    # Brings the globals in env to the state the main process had when the
+    # chunk was sent: (def_id, kind, payload) to define, None for not defined
+    symbol_table = basic.global_symbol_table
+
+    for name, definition in env.items():
+        if definition is None:
+            if name in installed:
+                del installed[name]
+                if name in original_symbols:
+                    symbol_table.set(name, original_symbols[name])
+                else:
+                    symbol_table.remove(name)
+            continue
+
+        def_id, kind, payload = definition
+        if installed.get(name) == def_id: continue
+
+        if kind == DEF_FUNC:
+            line_no, text = payload
+            Runner.run(fn, text, engine, first_line=line_no - 1)
+        else:
+            symbol_table.set(name, basic.make_number(payload))
+        installed[name] = def_id
@@ -1,5 +1,9 @@
 from PartA import basic
-import PartA.Lexen
+from PartA.Lexen import (
+    TT_AND, TT_ARROW, TT_COMMA, TT_DIV, TT_DOT, TT_EE, TT_EOF, TT_EQ, TT_FLOAT, TT_GT, TT_GTE,
+    TT_IDENTIFIER, TT_INT, TT_KEYWORD, TT_LPAREN, TT_LT, TT_LTE, TT_MINUS, TT_MODULO, TT_MUL,
+    TT_NE, TT_OR, TT_PLUS, TT_POW, TT_RPAREN
+)
 
 
 #######################################
@@ -38,9 +42,29 @@ class ParseResult:
 # PARSER
 #######################################
 
+# Operators of comp_expr, arith_expr and term (see Grammer-BNF.txt), which
+# Parser.climb parses in one loop; a higher number binds tighter
+BINARY_PRECEDENCE = {
+    TT_EE: 1,
+    TT_NE: 1,
+    TT_LT: 1,
+    TT_GT: 1,
+    TT_LTE: 1,
+    TT_GTE: 1,
+    TT_PLUS: 2,
+    TT_MINUS: 2,
+    TT_MUL: 3,
+    TT_DIV: 3,
+    TT_MODULO: 3,
+}
+
+SIMPLE_OPERANDS = (TT_INT, TT_FLOAT, TT_IDENTIFIER)
+
+
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, source=None):
         self.tokens = tokens
+        self.source = source  # what the token offsets point into, for errors
         self.tok_idx = -1
         self.advance()
 
@@ -52,20 +76,21 @@ class Parser:
 
     def parse(self):
         res = self.expr()
-        if not res.error and self.current_tok.type != PartA.Lexen.TT_EOF:
-            return res.failure(basic.InvalidSyntaxError(
+        if not res.error and self.current_tok.type != TT_EOF:
+            res.failure(basic.InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 "Expected '+', '-', '*', '/', '^', '==', '!=', '<', '>', '<=', '>=', 'AND(&&)', or 'OR(||)'"
             ))
+        if res.error:
+            res.error.set_source(self.source)
         return res
 
     def parse_lambda_expr(self):
         res = ParseResult()
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         # Check if the current token is 'LAMBDA' or 'λ'
-        if self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'LAMBDA') or self.current_tok.matches(
-                PartA.Lexen.TT_KEYWORD, 'λ'):
+        if self.current_tok.matches(TT_KEYWORD, 'LAMBDA') or self.current_tok.matches(TT_KEYWORD, 'λ'):
             self.advance()
         else:
             return res.failure(
@@ -74,14 +99,14 @@ class Parser:
         param_names = []
 
         # Parse parameters (multiple parameters separated by commas)
-        while self.current_tok.type == PartA.Lexen.TT_IDENTIFIER:
+        while self.current_tok.type == TT_IDENTIFIER:
             param_names.append(self.current_tok.value)
             self.advance()
 
             # Check if the next token is a comma or dot
-            if self.current_tok.type == PartA.Lexen.TT_COMMA:
+            if self.current_tok.type == TT_COMMA:
                 self.advance()
-            elif self.current_tok.type == PartA.Lexen.TT_DOT:
+            elif self.current_tok.type == TT_DOT:
                 self.advance()
                 break
             else:
@@ -100,7 +125,7 @@ class Parser:
         body_node = expr_result.node
 
         # Return a LambdaNode with parameters and body
-        return res.success(basic.LambdaNode(param_names, body_node, pos_start, self.current_tok.pos_end.copy()))
+        return res.success(basic.LambdaNode(param_names, body_node, pos_start, self.current_tok.pos_end))
 
     ###################################
 
@@ -109,7 +134,7 @@ class Parser:
         cases = []
         else_case = None
 
-        if not self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'IF'):
+        if not self.current_tok.matches(TT_KEYWORD, 'IF'):
             return res.failure(basic.InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'IF'"
@@ -121,7 +146,7 @@ class Parser:
         condition = res.register(self.expr())
         if res.error: return res
 
-        if not self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'THEN'):
+        if not self.current_tok.matches(TT_KEYWORD, 'THEN'):
             return res.failure(basic.InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'THEN'"
@@ -134,14 +159,14 @@ class Parser:
         if res.error: return res
         cases.append((condition, expr))
 
-        while self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'ELIF'):
+        while self.current_tok.matches(TT_KEYWORD, 'ELIF'):
             res.register_advancement()
             self.advance()
 
             condition = res.register(self.expr())
             if res.error: return res
 
-            if not self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'THEN'):
+            if not self.current_tok.matches(TT_KEYWORD, 'THEN'):
                 return res.failure(basic.InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     f"Expected 'THEN'"
@@ -154,7 +179,7 @@ class Parser:
             if res.error: return res
             cases.append((condition, expr))
 
-        if self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'ELSE'):
+        if self.current_tok.matches(TT_KEYWORD, 'ELSE'):
             res.register_advancement()
             self.advance()
 
@@ -168,27 +193,27 @@ class Parser:
         tok = self.current_tok
 
         # Check for lambda expressions first
-        if tok.matches(PartA.Lexen.TT_KEYWORD, 'LAMBDA') or tok.matches(PartA.Lexen.TT_KEYWORD, 'λ'):
+        if tok.matches(TT_KEYWORD, 'LAMBDA') or tok.matches(TT_KEYWORD, 'λ'):
             lambda_expr = res.register(self.parse_lambda_expr())
             if res.error: return res
             return res.success(lambda_expr)
 
-        elif tok.type in (PartA.Lexen.TT_INT, PartA.Lexen.TT_FLOAT):
+        elif tok.type in (TT_INT, TT_FLOAT):
             res.register_advancement()
             self.advance()
             return res.success(basic.NumberNode(tok))
 
-        elif tok.type == PartA.Lexen.TT_IDENTIFIER:
+        elif tok.type == TT_IDENTIFIER:
             res.register_advancement()
             self.advance()
             return res.success(basic.VarAccessNode(tok))
 
-        elif tok.type == PartA.Lexen.TT_LPAREN:
+        elif tok.type == TT_LPAREN:
             res.register_advancement()
             self.advance()
             expr = res.register(self.expr())
             if res.error: return res
-            if self.current_tok.type == PartA.Lexen.TT_RPAREN:
+            if self.current_tok.type == TT_RPAREN:
                 res.register_advancement()
                 self.advance()
                 return res.success(expr)
@@ -198,12 +223,12 @@ class Parser:
                     "Expected ')'"
                 ))
 
-        elif tok.matches(PartA.Lexen.TT_KEYWORD, 'IF'):
+        elif tok.matches(TT_KEYWORD, 'IF'):
             if_expr = res.register(self.if_expr())
             if res.error: return res
             return res.success(if_expr)
 
-        elif tok.matches(PartA.Lexen.TT_KEYWORD, 'FUNC'):
+        elif tok.matches(TT_KEYWORD, 'FUNC'):
             func_def = res.register(self.func_def())
             if res.error: return res
             return res.success(func_def)
@@ -214,13 +239,13 @@ class Parser:
         ))
 
     def power(self):
-        return self.bin_op(self.call, (PartA.Lexen.TT_POW,), self.factor)
+        return self.bin_op(self.call, (TT_POW,), self.factor)
 
     def factor(self):
         res = ParseResult()
         tok = self.current_tok
 
-        if tok.type in (PartA.Lexen.TT_PLUS, PartA.Lexen.TT_MINUS):
+        if tok.type in (TT_PLUS, TT_MINUS):
             res.register_advancement()
             self.advance()
             factor = res.register(self.factor())
@@ -229,16 +254,16 @@ class Parser:
 
         return self.power()
 
-    def term(self):
-        return self.bin_op(self.factor, (PartA.Lexen.TT_MUL, PartA.Lexen.TT_DIV, PartA.Lexen.TT_MODULO))
-
-    def arith_expr(self):
-        return self.bin_op(self.term, (PartA.Lexen.TT_PLUS, PartA.Lexen.TT_MINUS))
+    def binary_expr(self):
+        res = ParseResult()
+        node = self.climb(res, 1)
+        if res.error: return res
+        return res.success(node)
 
     def comp_expr(self):
         res = ParseResult()
 
-        if self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'NOT'):
+        if self.current_tok.matches(TT_KEYWORD, 'NOT'):
             op_tok = self.current_tok
             res.register_advancement()
             self.advance()
@@ -247,8 +272,7 @@ class Parser:
             if res.error: return res
             return res.success(basic.UnaryOpNode(op_tok, node))
 
-        node = res.register(self.bin_op(self.arith_expr, (PartA.Lexen.TT_EE, PartA.Lexen.TT_NE, PartA.Lexen.TT_LT,
-                                                          PartA.Lexen.TT_GT, PartA.Lexen.TT_LTE, PartA.Lexen.TT_GTE)))
+        node = res.register(self.binary_expr())
 
         if res.error:
             return res.failure(basic.InvalidSyntaxError(
@@ -261,11 +285,11 @@ class Parser:
     def expr(self):
         res = ParseResult()
 
-        if self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'VAR'):
+        if self.current_tok.matches(TT_KEYWORD, 'VAR'):
             res.register_advancement()
             self.advance()
 
-            if self.current_tok.type != PartA.Lexen.TT_IDENTIFIER:
+            if self.current_tok.type != TT_IDENTIFIER:
                 return res.failure(basic.InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     "Expected identifier"
@@ -275,7 +299,7 @@ class Parser:
             res.register_advancement()
             self.advance()
 
-            if self.current_tok.type != PartA.Lexen.TT_EQ:
+            if self.current_tok.type != TT_EQ:
                 return res.failure(basic.InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     "Expected '='"
@@ -287,9 +311,7 @@ class Parser:
             if res.error: return res
             return res.success(basic.VarAssignNode(var_name, expr))
 
-        node = res.register(self.bin_op(self.comp_expr, ((PartA.Lexen.TT_KEYWORD, 'AND'), (PartA.Lexen.TT_KEYWORD,
-                                                                                           'OR'), PartA.Lexen.TT_AND,
-                                                         PartA.Lexen.TT_OR)))
+        node = res.register(self.bin_op(self.comp_expr, ((TT_KEYWORD, 'AND'), (TT_KEYWORD, 'OR'), TT_AND, TT_OR)))
 
         if res.error:
             return res.failure(basic.InvalidSyntaxError(
@@ -301,7 +323,7 @@ class Parser:
 
     def parse_call_expr(self):
         res = ParseResult()
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         # Parse the function (lambda or other callable)
         func_expr = res.register(self.expr())
@@ -309,32 +331,32 @@ class Parser:
 
         # Parse the arguments
         args = []
-        if self.current_tok.type == PartA.Lexen.TT_LPAREN:
+        if self.current_tok.type == TT_LPAREN:
             self.advance()
-            if self.current_tok.type != PartA.Lexen.TT_RPAREN:
+            if self.current_tok.type != TT_RPAREN:
                 args.append(res.register(self.expr()))
                 if res.error: return res
-                while self.current_tok.type == PartA.Lexen.TT_COMMA:
+                while self.current_tok.type == TT_COMMA:
                     self.advance()
                     args.append(res.register(self.expr()))
                     if res.error: return res
-            if self.current_tok.type != PartA.Lexen.TT_RPAREN:
+            if self.current_tok.type != TT_RPAREN:
                 return res.failure(basic.InvalidSyntaxError(pos_start, self.current_tok.pos_end, "Expected ')'"))
             self.advance()
 
-        return res.success(basic.CallNode(func_expr, args, pos_start, self.current_tok.pos_end.copy()))
+        return res.success(basic.CallNode(func_expr, args, pos_start, self.current_tok.pos_end))
 
     def call(self):
         res = ParseResult()
         atom = res.register(self.atom())
         if res.error: return res
 
-        if self.current_tok.type == PartA.Lexen.TT_LPAREN:
+        if self.current_tok.type == TT_LPAREN:
             res.register_advancement()
             self.advance()
             arg_nodes = []
 
-            if self.current_tok.type == PartA.Lexen.TT_RPAREN:
+            if self.current_tok.type == TT_RPAREN:
                 res.register_advancement()
                 self.advance()
             else:
@@ -345,14 +367,14 @@ class Parser:
                         "Expected ')', 'VAR', 'IF', 'FOR', 'WHILE', 'FUNC', int, float, identifier, '+', '-', '(' or 'NOT'"
                     ))
 
-                while self.current_tok.type == PartA.Lexen.TT_COMMA:
+                while self.current_tok.type == TT_COMMA:
                     res.register_advancement()
                     self.advance()
 
                     arg_nodes.append(res.register(self.expr()))
                     if res.error: return res
 
-                if self.current_tok.type != PartA.Lexen.TT_RPAREN:
+                if self.current_tok.type != TT_RPAREN:
                     return res.failure(basic.InvalidSyntaxError(
                         self.current_tok.pos_start, self.current_tok.pos_end,
                         f"Expected ',' or ')'"
@@ -366,7 +388,7 @@ class Parser:
     def func_def(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(PartA.Lexen.TT_KEYWORD, 'FUNC'):
+        if not self.current_tok.matches(TT_KEYWORD, 'FUNC'):
             return res.failure(basic.InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'FUNC'"
@@ -375,18 +397,18 @@ class Parser:
         res.register_advancement()
         self.advance()
 
-        if self.current_tok.type == PartA.Lexen.TT_IDENTIFIER:
+        if self.current_tok.type == TT_IDENTIFIER:
             var_name_tok = self.current_tok
             res.register_advancement()
             self.advance()
-            if self.current_tok.type != PartA.Lexen.TT_LPAREN:
+            if self.current_tok.type != TT_LPAREN:
                 return res.failure(basic.InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     f"Expected '('"
                 ))
         else:
             var_name_tok = None
-            if self.current_tok.type != PartA.Lexen.TT_LPAREN:
+            if self.current_tok.type != TT_LPAREN:
                 return res.failure(basic.InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     f"Expected identifier or '('"
@@ -396,16 +418,16 @@ class Parser:
         self.advance()
         arg_name_toks = []
 
-        if self.current_tok.type == PartA.Lexen.TT_IDENTIFIER:
+        if self.current_tok.type == TT_IDENTIFIER:
             arg_name_toks.append(self.current_tok)
             res.register_advancement()
             self.advance()
 
-            while self.current_tok.type == PartA.Lexen.TT_COMMA:
+            while self.current_tok.type == TT_COMMA:
                 res.register_advancement()
                 self.advance()
 
-                if self.current_tok.type != PartA.Lexen.TT_IDENTIFIER:
+                if self.current_tok.type != TT_IDENTIFIER:
                     return res.failure(basic.InvalidSyntaxError(
                         self.current_tok.pos_start, self.current_tok.pos_end,
                         f"Expected identifier"
@@ -415,13 +437,13 @@ class Parser:
                 res.register_advancement()
                 self.advance()
 
-            if self.current_tok.type != PartA.Lexen.TT_RPAREN:
+            if self.current_tok.type != TT_RPAREN:
                 return res.failure(basic.InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     f"Expected ',' or ')'"
                 ))
         else:
-            if self.current_tok.type != PartA.Lexen.TT_RPAREN:
+            if self.current_tok.type != TT_RPAREN:
                 return res.failure(basic.InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     f"Expected identifier or ')'"
@@ -430,7 +452,7 @@ class Parser:
         res.register_advancement()
         self.advance()
 
-        if self.current_tok.type != PartA.Lexen.TT_ARROW:
+        if self.current_tok.type != TT_ARROW:
             return res.failure(basic.InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected '->'"
@@ -449,6 +471,37 @@ class Parser:
 
     ###################################
 
+    def climb(self, res, min_precedence):
+        # Precedence climbing over BINARY_PRECEDENCE: parses factors joined
+        # by operators binding at least as tightly as min_precedence. The
+        # operators are left-associative, so the right operand only takes
+        # tighter ones. Advancements and errors are registered on res.
+        tok = self.current_tok
+
+        if tok.type in SIMPLE_OPERANDS and self.tokens[self.tok_idx + 1].type not in (TT_LPAREN,
+                                                                                      TT_POW):
+            # A lone number or name: going through factor, power, call and
+            # atom would only wrap it
+            res.register_advancement()
+            self.advance()
+            left = basic.VarAccessNode(tok) if tok.type == TT_IDENTIFIER else basic.NumberNode(tok)
+        else:
+            left = res.register(self.factor())
+            if res.error: return None
+
+        while True:
+            precedence = BINARY_PRECEDENCE.get(self.current_tok.type)
+            if precedence is None or precedence < min_precedence:
+                return left
+
+            op_tok = self.current_tok
+            res.register_advancement()
+            self.advance()
+
+            right = self.climb(res, precedence + 1)
+            if res.error: return None
+            left = basic.BinOpNode(left, op_tok, right)
+
     def bin_op(self, func_a, ops, func_b=None):
         if func_b is None:
             func_b = func_a
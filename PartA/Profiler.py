@@ -0,0 +1,190 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from PartA import basic
+from PartA.VM import VM
+
+
+#######################################
+# CONSTANTS
+#######################################
+
+DEFAULT_INTERVAL = 0.005  # seconds between samples
+OUTSIDE_RPEL = '<outside RPEL code>'  # samples taken while lexing, parsing or compiling
+
+
+#######################################
+# STACKS
+#######################################
+
+# The RPEL call stack of a thread is read off its Python stack: the engines
+# evaluate every body with the call's Context in a local named context, so
+# the distinct contexts found walking the Python frames are the RPEL
+# frames. The VM runs calls in its own loop instead, and keeps the callers'
+# contexts in its frames list.
+
+VM_RUN_CODE = VM.run.__code__
+
+
+def rpel_stack(frame):
+    # Display names of the contexts active in frame and its callers,
+    # outermost first
+    contexts = []
+
+    while frame is not None:
+        code = frame.f_code
+        if code is VM_RUN_CODE:
+            frame_locals = frame.f_locals
+            found = [frame_locals.get('context')]
+            found.extend(entry[2] for entry in reversed(frame_locals.get('frames') or ()))
+        elif 'context' in code.co_varnames:
+            found = [frame.f_locals.get('context')]
+        else:
+            found = ()
+
+        for context in found:
+            if isinstance(context, basic.Context) and (not contexts or contexts[-1] is not context):
+                contexts.append(context)
+
+        frame = frame.f_back
+
+    return tuple(context.display_name for context in reversed(contexts))
+
+
+#######################################
+# PROFILER
+#######################################
+
+# Samples the RPEL call stack of the thread that started it every interval
+# seconds, from a thread of its own. Calls are counted by wrapping the
+# make_context of FUNCs and LAMBDAs while a profiler runs; nothing is
+# changed or sampled otherwise. Only one profiler runs at a time.
+#
+#     with Profiler() as profiler:
+#         Runner.run('<stdin>', 'fib(20)')
+#     print(profiler.report())
+
+class Profiler:
+    active = None
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # tuple of display names, outermost first -> samples
+        self.calls = Counter()   # display name -> calls
+        self.samples = 0
+        self.elapsed = 0.0
+        self.thread_id = None
+        self.sampler = None
+        self.stopping = threading.Event()
+        self.started = None
+
+    def start(self):
+        if Profiler.active is not None:
+            raise Exception('A profiler is already running')
+        Profiler.active = self
+
+        self.thread_id = threading.get_ident()
+        self.stopping.clear()
+        count_calls(self)
+
+        self.started = time.perf_counter()
+        self.sampler = threading.Thread(target=self.sample, name='rpel-profiler', daemon=True)
+        self.sampler.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.sampler.join()
+        self.elapsed += time.perf_counter() - self.started
+
+        uncount_calls()
+        Profiler.active = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def sample(self):
+        while not self.stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None: continue
+
+            stack = rpel_stack(frame)
+            del frame
+            self.stacks[stack or (OUTSIDE_RPEL,)] += 1
+            self.samples += 1
+
+    ###################################
+
+    def collapsed(self):
+        # One 'outer;inner;leaf samples' line per stack, as flame graph tools
+        # (flamegraph.pl, speedscope, inferno) read them
+        return '\n'.join(
+            f"{';'.join(stack)} {count}" for stack, count in sorted(self.stacks.items())
+        )
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.collapsed() + '\n')
+
+    def function_stats(self):
+        # display name -> (calls, inclusive seconds, exclusive seconds); the
+        # seconds are samples times the mean time between samples
+        sample_time = self.elapsed / self.samples if self.samples else 0.0
+        inclusive = Counter()
+        exclusive = Counter()
+
+        for stack, count in self.stacks.items():
+            exclusive[stack[-1]] += count
+            for name in set(stack):
+                inclusive[name] += count
+
+        names = set(inclusive) | set(self.calls)
+        return {
+            name: (self.calls[name], inclusive[name] * sample_time, exclusive[name] * sample_time)
+            for name in names
+        }
+
+    def report(self):
+        stats = self.function_stats()
+        lines = [
+            f"{self.samples} samples in {self.elapsed:.3f} s",
+            f"{'function':30} {'calls':>10} {'inclusive s':>12} {'exclusive s':>12}",
+        ]
+        for name, (calls, inclusive, exclusive) in sorted(stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:30} {calls:>10} {inclusive:>12.4f} {exclusive:>12.4f}")
+        return '\n'.join(lines)
+
+
+###################################
+
+# The make_context methods the running profiler replaced
+counted_methods = {}
+
+
+def count_calls(profiler):
+    thread_id = profiler.thread_id
+    calls = profiler.calls
+
+    for cls in (basic.Function, basic.Lambda):
+        make_context = cls.make_context
+        counted_methods[cls] = make_context
+
+        def counted_make_context(self, args, make_context=make_context):
+            new_context, error = make_context(self, args)
+            if new_context is not None and threading.get_ident() == thread_id:
+                calls[new_context.display_name] += 1
+            return new_context, error
+
+        cls.make_context = counted_make_context
+
+
+def uncount_calls():
+    for cls, make_context in counted_methods.items():
+        cls.make_context = make_context
+    counted_methods.clear()
@@ -0,0 +1,230 @@
+from PartA import basic
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# RESOLVER
+#######################################
+
+# Gives every variable a lexical address when the program is parsed.
+# Inside a FUNC or LAMBDA body, arguments and the names the body assigns
+# (VAR, named FUNC) live in a slot of the call's frame list. A name of an
+# enclosing body is captured instead: the function gets a closure, a
+# tuple of the values of the outer variables its body uses, taken when it
+# is defined, and the name is addressed by its index there. Addresses are
+# (kind, index) pairs, see LOCAL, LOCAL_CELL, FREE and FREE_CELL in
+# basic. A local that is assigned and also used by a nested body is kept
+# in a Cell, which the closures capture instead of its value, so they
+# see later assignments. A local the body reads that an enclosing body
+# also binds starts out with the enclosing variable's value (see prefill
+# in basic), since it reads that one until the body assigns its own.
+# Names that are not local to any enclosing body get no address (None)
+# and are looked up by name in the global SymbolTable.
+
+class Scope:
+    # A FUNC or LAMBDA body being resolved
+    def __init__(self, slots, cells):
+        self.slots = slots  # name -> frame slot
+        self.cells = cells  # names whose slot holds a Cell
+        self.free = {}  # captured name -> its address in the body
+        self.captures = []  # address in the enclosing body of every closure entry
+
+
+class Resolver:
+    def __init__(self):
+        self.scopes = []  # one Scope per enclosing body, innermost last
+
+    def resolve(self, node):
+        self.visit(node)
+        return node
+
+    def visit(self, node):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        method(node)
+
+    def no_visit_method(self, node):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    def lookup(self, name, level=None):
+        # The address of name in the body at level (the innermost by
+        # default), adding it to the closures of the bodies between the
+        # one it is local to and this one
+        if level is None:
+            level = len(self.scopes) - 1
+        if level < 0:
+            return None
+
+        scope = self.scopes[level]
+        slot = scope.slots.get(name)
+        if slot is not None:
+            return basic.LOCAL_CELL if name in scope.cells else basic.LOCAL, slot
+
+        address = scope.free.get(name)
+        if address is None:
+            outer = self.lookup(name, level - 1)
+            if outer is None:
+                return None
+            kind = basic.FREE_CELL if outer[0] in (basic.LOCAL_CELL, basic.FREE_CELL) else basic.FREE
+            address = scope.free[name] = (kind, len(scope.captures))
+            scope.captures.append(outer)
+        return address
+
+    def local_address(self, name):
+        if not self.scopes:
+            return None
+        scope = self.scopes[-1]
+        return basic.LOCAL_CELL if name in scope.cells else basic.LOCAL, scope.slots[name]
+
+    def resolve_body(self, node, param_names):
+        slots = {}
+        for slot, name in enumerate(param_names):
+            slots[name] = slot
+        frame_size = len(param_names)
+
+        # A name the body assigns anywhere is local for the whole body
+        assigned = assigned_names(node.body_node)
+        for name in assigned:
+            if name not in slots:
+                slots[name] = frame_size
+                frame_size += 1
+
+        read, captured = body_names(node.body_node)
+        cells = set(assigned) & captured
+        scope = Scope(slots, cells)
+
+        # Until the body assigns it, such a local is the enclosing variable
+        prefill = []
+        for name in sorted(set(assigned) & (read | captured), key=slots.get):
+            if slots[name] < len(param_names):
+                continue
+            outer = self.lookup(name)
+            if outer is not None:
+                is_cell = outer[0] in (basic.LOCAL_CELL, basic.FREE_CELL)
+                prefill.append((slots[name], len(scope.captures), is_cell))
+                scope.captures.append(outer)
+
+        self.scopes.append(scope)
+        self.visit(node.body_node)
+        self.scopes.pop()
+
+        node.frame_size = frame_size
+        node.captures = tuple(scope.captures)
+        node.cell_slots = tuple(sorted(slots[name] for name in cells))
+        node.prefill = tuple(prefill)
+
+    ###################################
+
+    def visit_NumberNode(self, node):
+        pass
+
+    def visit_VarAccessNode(self, node):
+        node.address = self.lookup(node.var_name_tok.value)
+
+    def visit_VarAssignNode(self, node):
+        self.visit(node.value_node)
+        node.address = self.local_address(node.var_name_tok.value)
+
+    def visit_BinOpNode(self, node):
+        leftmost, chain = binop_chain(node)
+        self.visit(leftmost)
+        for bin_op in chain:
+            self.visit(bin_op.right_node)
+
+    def visit_UnaryOpNode(self, node):
+        self.visit(node.node)
+
+    def visit_IfNode(self, node):
+        for condition, expr in node.cases:
+            self.visit(condition)
+            self.visit(expr)
+        if node.else_case:
+            self.visit(node.else_case)
+
+    def visit_FuncDefNode(self, node):
+        if node.var_name_tok:
+            node.address = self.local_address(node.var_name_tok.value)
+        self.resolve_body(node, [arg_name_tok.value for arg_name_tok in node.arg_name_toks])
+
+    def visit_CallNode(self, node):
+        self.visit(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.visit(arg_node)
+
+    def visit_LambdaNode(self, node):
+        self.resolve_body(node, node.param_names)
+
+
+def assigned_names(node):
+    # Names a body binds in its own frame, not counting nested bodies
+    names = []
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+
+        if isinstance(node, basic.VarAssignNode):
+            names.append(node.var_name_tok.value)
+            nodes.append(node.value_node)
+        elif isinstance(node, basic.FuncDefNode):
+            if node.var_name_tok:
+                names.append(node.var_name_tok.value)
+        elif isinstance(node, basic.BinOpNode):
+            nodes.append(node.left_node)
+            nodes.append(node.right_node)
+        elif isinstance(node, basic.UnaryOpNode):
+            nodes.append(node.node)
+        elif isinstance(node, basic.IfNode):
+            for condition, expr in node.cases:
+                nodes.append(condition)
+                nodes.append(expr)
+            if node.else_case:
+                nodes.append(node.else_case)
+        elif isinstance(node, basic.CallNode):
+            nodes.append(node.node_to_call)
+            nodes.extend(node.arg_nodes)
+
+    return names
+
+
+def body_names(node):
+    # (read, captured): the names a body reads itself, and the names the
+    # FUNC and LAMBDA bodies nested in it use without binding them
+    read, captured = set(), set()
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+
+        if isinstance(node, basic.VarAccessNode):
+            read.add(node.var_name_tok.value)
+        elif isinstance(node, basic.VarAssignNode):
+            nodes.append(node.value_node)
+        elif isinstance(node, basic.FuncDefNode):
+            captured |= free_names(node.body_node, [arg_name_tok.value for arg_name_tok in node.arg_name_toks])
+        elif isinstance(node, basic.LambdaNode):
+            captured |= free_names(node.body_node, node.param_names)
+        elif isinstance(node, basic.BinOpNode):
+            nodes.append(node.left_node)
+            nodes.append(node.right_node)
+        elif isinstance(node, basic.UnaryOpNode):
+            nodes.append(node.node)
+        elif isinstance(node, basic.IfNode):
+            for condition, expr in node.cases:
+                nodes.append(condition)
+                nodes.append(expr)
+            if node.else_case:
+                nodes.append(node.else_case)
+        elif isinstance(node, basic.CallNode):
+            nodes.append(node.node_to_call)
+            nodes.extend(node.arg_nodes)
+
+    return read, captured
+
+
+def free_names(body_node, param_names):
+    # Names a FUNC or LAMBDA body may use from the enclosing bodies: all
+    # but its parameters, since it reads the enclosing variable of a name
+    # it assigns until it does
+    read, captured = body_names(body_node)
+    return (read | captured) - set(param_names)
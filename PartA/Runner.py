@@ -0,0 +1,130 @@
+from PartA import basic
+from PartA.Cache import LRUCache
+from PartA.Lexen import Lexer
+from PartA.Parser import Parser
+from PartA.Resolver import Resolver
+from PartA.Optimizer import Optimizer
+from PartA.Interpreter import Interpreter
+
+
+#######################################
+# CONSTANTS
+#######################################
+
+PARSE_CACHE_SIZE = 256  # programs kept by parse(), 0 turns the cache off
+
+
+#######################################
+# RUN
+#######################################
+
+class ParsedProgram:
+    def __init__(self, node, source):
+        self.node = node
+        self.source = source
+        self.compiled = {}  # engine name -> compiled form of node
+
+    def at_line(self, first_line):
+        # The same program as the text of another line of its file: it
+        # shares the AST and compiled code, only the line numbers differ
+        if first_line == self.source.first_line:
+            return self
+        program = ParsedProgram(self.node, basic.Source(self.source.fn, self.source.text, first_line))
+        program.compiled = self.compiled
+        return program
+
+
+# Source text -> ParsedProgram. The key includes the file name, since
+# errors from the cached AST name the file of its Source; use parse_cache.stats(),
+# parse_cache.resize() and parse_cache.clear() to inspect and control it
+parse_cache = LRUCache(PARSE_CACHE_SIZE)
+
+
+def parse(fn, text, optimize=True, first_line=0):
+    # first_line is the number of lines of fn before text, so that errors
+    # give the line of the file they are on
+    key = (fn, text, optimize)
+    program = parse_cache.get(key)
+    if program is not None:
+        return program.at_line(first_line), None
+
+    # Generate tokens
+    lexer = Lexer(fn, text, first_line)
+    tokens, error = lexer.make_tokens()
+    if error: return None, error
+
+    try:
+        # Generate AST
+        parser = Parser(tokens, lexer.source)
+        ast = parser.parse()
+        if ast.error: return None, ast.error
+
+        # Resolve variables to addresses
+        node = Resolver().resolve(ast.node)
+
+        # Optimize AST
+        if optimize:
+            node = Optimizer().visit(node)
+    except RecursionError:
+        return None, basic.InvalidSyntaxError(0, len(text), "Expression is nested too deeply").set_source(lexer.source)
+
+    program = ParsedProgram(node, lexer.source)
+    parse_cache.put(key, program)
+    return program, None
+
+
+def compile_program(program, engine):
+    # The compilers are only imported by the first program compiled with them
+    code = program.compiled.get(engine)
+    if code is None:
+        if engine == 'compiler':
+            from PartA.Compiler import Compiler
+            code = Compiler().compile(program.node)
+        else:
+            from PartA.VM import BytecodeCompiler
+            code = BytecodeCompiler().compile(program.node)
+        program.compiled[engine] = code
+    return code
+
+
+def run(fn, text, engine='interpreter', optimize=True, symbol_table=None, governor=None, first_line=0):
+    # engine is 'interpreter' to walk the AST, 'compiler' to compile it into
+    # closures first (see PartA/Compiler.py) or 'vm' to compile it to bytecode
+    # for the stack machine (see PartA/VM.py), or 'lazy' to walk it passing
+    # arguments by need (see PartA/Lazy.py). optimize runs the Optimizer
+    # over the AST before that. Programs seen before come from parse_cache.
+    # The globals are those of symbol_table, basic.global_symbol_table by
+    # default. governor limits the run (see basic.Governor); by default
+    # basic.MAX_DEPTH applies. first_line is as for parse().
+    program, error = parse(fn, text, optimize, first_line)
+    if error: return None, error
+
+    return run_program(program, engine, symbol_table, governor)
+
+
+def run_program(program, engine='interpreter', symbol_table=None, governor=None):
+    # Runs a ParsedProgram, from parse() or PartA/ScriptCache.py, as run() does
+    context = basic.Context('<program>')
+    context.symbol_table = basic.global_symbol_table if symbol_table is None else symbol_table
+    context.source = program.source
+
+    previous = basic.governed.current
+    basic.governed.current = (governor or basic.Governor()).start()
+    try:
+        if engine in ('compiler', 'vm'):
+            code = compile_program(program, engine)
+            return code(context)
+
+        if engine == 'lazy':
+            from PartA.Lazy import LazyInterpreter
+            interpreter = LazyInterpreter()
+        else:
+            interpreter = Interpreter()
+        result = interpreter.visit(program.node, context)
+
+        return result.value, result.error
+    except RecursionError:
+        node = program.node
+        return None, basic.RTError(node.pos_start, node.pos_end, "Maximum recursion depth exceeded", context)
+    finally:
+        basic.governed.current = previous
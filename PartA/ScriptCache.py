@@ -0,0 +1,308 @@
+import hashlib
+import marshal
+import os
+import zlib
+
+from PartA import basic, Runner
+from PartA.Lexen import Token, TT_FLOAT, TT_IDENTIFIER, TT_INT
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# CONSTANTS
+#######################################
+
+# Bump CACHE_VERSION whenever the nodes, the Resolver or the Optimizer
+# change what a parsed program looks like: caches of other versions are
+# then ignored, like .pyc files of another Python
+CACHE_VERSION = 4
+MAGIC = b'RPELC' + CACHE_VERSION.to_bytes(2, 'little') + marshal.version.to_bytes(1, 'little')
+CHUNK_SIZE = 1 << 16  # bytes of the cache file read at a time
+
+NUMBER, VAR_ACCESS, VAR_ASSIGN, BIN_OP, UNARY_OP, IF, FUNC_DEF, CALL, LAMBDA = range(9)
+
+
+#######################################
+# SCRIPT CACHE
+#######################################
+
+# A batch script's parsed programs, one per non-blank line, saved next to
+# it as <script>.rpelc. When the script has not changed since, its lines
+# are rebuilt from the cache instead of being lexed and parsed. When the
+# cache is missing or stale, lines are parsed as usual and the cache is
+# written again at the end; a corrupt one is deleted when the damage is
+# reached, the rest of the lines are parsed, and the next run writes it.
+
+def cache_path(script_path):
+    return os.path.splitext(script_path)[0] + '.rpelc'
+
+
+def source_digest(script_path):
+    digest = hashlib.sha256()
+    with open(script_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class ScriptCache:
+    def __init__(self, script_path, fn, optimize=True):
+        self.path = cache_path(script_path)
+        self.fn = fn
+        self.optimize = optimize
+        self.header = MAGIC + source_digest(script_path) + bytes([int(optimize)])
+        self.reader = open_reader(self.path, self.header)  # None unless the cache is of this script
+        self.writer = None if self.reader else open_writer(self.path, self.header)  # for a new cache
+
+    def program(self, text, first_line=0):
+        # The ParsedProgram of the next non-blank line of the script, None
+        # when that line does not parse (run() then reports the error).
+        # first_line is the number of lines before it, as for Runner.parse()
+        if self.reader is not None:
+            try:
+                record = self.reader.next_record()
+                if record is None: return None
+                return Runner.ParsedProgram(decode(record), basic.Source(self.fn, text, first_line))
+            except Exception:
+                # Passed the header checks, yet does not read: parse the rest
+                # of the script, and leave the cache to be written next time
+                self.reader.close()
+                self.reader = None
+                remove(self.path)
+
+        program, error = Runner.parse(self.fn, text, self.optimize, first_line)
+        if self.writer is not None:
+            try:
+                self.writer.write(None if error else encode(program.node))
+            except (OSError, ValueError):
+                self.writer.discard()
+                self.writer = None
+        return program
+
+    def save(self):
+        # Puts the new cache in place, if one was written; a directory that
+        # cannot be written to only means there is no cache next time
+        if self.writer is not None:
+            try:
+                self.writer.commit()
+            except OSError:
+                self.writer.discard()
+            self.writer = None
+        self.close()
+
+    def close(self):
+        # Drops what save() did not keep
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        if self.writer is not None:
+            self.writer.discard()
+            self.writer = None
+
+    def __repr__(self):
+        return f'<script cache {self.path}>'
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+#######################################
+# RECORDS
+#######################################
+
+# After the header, a cache file is one zlib stream of records, one per
+# non-blank line: the length and crc32 of the marshalled record, then the
+# record. It is written and read a record at a time, so that a script of
+# any length takes no more memory with the cache than without it.
+
+class CorruptCache(Exception):
+    pass
+
+
+def open_reader(path, header):
+    # A RecordReader over the cache file at path, or None when it is
+    # missing, of another version or of another script
+    try:
+        file = open(path, 'rb')
+    except OSError:
+        return None
+
+    if file.read(len(header)) != header:
+        file.close()
+        return None
+    return RecordReader(file)
+
+
+def open_writer(path, header):
+    try:
+        return RecordWriter(path, header)
+    except OSError:
+        return None
+
+
+class RecordReader:
+    def __init__(self, file):
+        self.file = file
+        self.decompressor = zlib.decompressobj()
+        self.buffer = b''
+        self.offset = 0  # of the first byte of buffer not read yet
+
+    def next_record(self):
+        head = self.read(8)
+        data = self.read(int.from_bytes(head[:4], 'little'))
+        if zlib.crc32(data) != int.from_bytes(head[4:], 'little'):
+            raise CorruptCache('record does not match its checksum')
+        return marshal.loads(data)
+
+    def read(self, size):
+        # The next size bytes of the stream
+        while len(self.buffer) - self.offset < size:
+            chunk = self.file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CorruptCache('cache ends before the script')
+            self.buffer = self.buffer[self.offset:] + self.decompressor.decompress(chunk)
+            self.offset = 0
+
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class RecordWriter:
+    def __init__(self, path, header):
+        # Written aside and renamed by commit(), so a reader never sees half a file
+        self.path = path
+        self.temp_path = f'{path}.{os.getpid()}.tmp'
+        self.file = open(self.temp_path, 'wb')
+        self.file.write(header)
+        self.compressor = zlib.compressobj()
+
+    def write(self, record):
+        data = marshal.dumps(record)
+        self.file.write(self.compressor.compress(
+            len(data).to_bytes(4, 'little') + zlib.crc32(data).to_bytes(4, 'little') + data
+        ))
+
+    def commit(self):
+        self.file.write(self.compressor.flush())
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def discard(self):
+        self.file.close()
+        remove(self.temp_path)
+
+
+#######################################
+# ENCODING
+#######################################
+
+# Nodes become nested tuples marshal can store. Every record starts with the
+# node kind and its position; the addresses, frame sizes and captures the
+# Resolver set are kept, and what FuncDefNode and LambdaNode derive from
+# their body is derived again when they are rebuilt. Tokens are kept only
+# as far as the node does not give them already: a number token is its
+# value, a name its text. A chain of binary operations is one flat record,
+# so that long sums neither encode nor decode recursively.
+
+def encode(node):
+    kind = type(node)
+    pos_start, pos_end = node.pos_start, node.pos_end
+
+    if kind is basic.NumberNode:
+        return (NUMBER, pos_start, pos_end, node.tok.value)
+    if kind is basic.VarAccessNode:
+        return (VAR_ACCESS, pos_start, pos_end, node.var_name_tok.value, node.address)
+    if kind is basic.VarAssignNode:
+        return (VAR_ASSIGN, pos_start, pos_end, node.var_name_tok.value, encode(node.value_node), node.address)
+    if kind is basic.BinOpNode:
+        leftmost, chain = binop_chain(node)
+        steps = []
+        for bin_op in chain:
+            steps += (bin_op.pos_start, bin_op.pos_end, encode_op(bin_op.op_tok), encode(bin_op.right_node))
+        return (BIN_OP, pos_start, pos_end, encode(leftmost), tuple(steps))
+    if kind is basic.UnaryOpNode:
+        return (UNARY_OP, pos_start, pos_end, encode_op(node.op_tok), encode(node.node))
+    if kind is basic.IfNode:
+        cases = []
+        for condition, expr in node.cases:
+            cases += (encode(condition), encode(expr))
+        else_case = encode(node.else_case) if node.else_case else None
+        return (IF, pos_start, pos_end, tuple(cases), else_case)
+    if kind is basic.FuncDefNode:
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        return (
+            FUNC_DEF, pos_start, pos_end, func_name, tuple(tok.value for tok in node.arg_name_toks),
+            encode(node.body_node), node.address, node.frame_size, node.captures, node.cell_slots, node.prefill
+        )
+    if kind is basic.CallNode:
+        return (CALL, pos_start, pos_end, encode(node.node_to_call), tuple(encode(arg) for arg in node.arg_nodes))
+    if kind is basic.LambdaNode:
+        return (
+            LAMBDA, pos_start, pos_end, tuple(node.param_names), encode(node.body_node), node.frame_size,
+            node.captures, node.cell_slots, node.prefill
+        )
+
+    raise Exception(f'Cannot encode {kind.__name__}')
+
+
+def encode_op(tok):
+    # Operator tokens are their type, keywords (AND, OR, NOT) the pair
+    return tok.type if tok.value is None else (tok.type, tok.value)
+
+
+def decode(record):
+    kind, pos_start, pos_end = record[0], record[1], record[2]
+
+    if kind == NUMBER:
+        value = record[3]
+        node = basic.NumberNode(Token(TT_INT if type(value) is int else TT_FLOAT, value, pos_start, pos_end))
+    elif kind == VAR_ACCESS:
+        node = basic.VarAccessNode(Token(TT_IDENTIFIER, record[3], pos_start, pos_end))
+        node.address = record[4]
+    elif kind == VAR_ASSIGN:
+        var_name = record[3]
+        var_name_tok = Token(TT_IDENTIFIER, var_name, pos_start, pos_start + len(var_name))
+        node = basic.VarAssignNode(var_name_tok, decode(record[4]))
+        node.address = record[5]
+    elif kind == BIN_OP:
+        node = decode(record[3])
+        steps = record[4]
+        for idx in range(0, len(steps), 4):
+            node = basic.BinOpNode(node, decode_op(steps[idx + 2]), decode(steps[idx + 3]))
+            node.pos_start, node.pos_end = steps[idx], steps[idx + 1]
+    elif kind == UNARY_OP:
+        node = basic.UnaryOpNode(decode_op(record[3]), decode(record[4]))
+    elif kind == IF:
+        cases = record[3]
+        node = basic.IfNode(
+            [(decode(cases[idx]), decode(cases[idx + 1])) for idx in range(0, len(cases), 2)],
+            decode(record[4]) if record[4] else None
+        )
+    elif kind == FUNC_DEF:
+        func_name = record[3]
+        var_name_tok = Token(TT_IDENTIFIER, func_name, pos_start, pos_start + len(func_name)) if func_name else None
+        arg_name_toks = [Token(TT_IDENTIFIER, arg_name) for arg_name in record[4]]
+        node = basic.FuncDefNode(var_name_tok, arg_name_toks, decode(record[5]))
+        node.address, node.frame_size, node.captures, node.cell_slots, node.prefill = record[6:11]
+    elif kind == CALL:
+        node = basic.CallNode(decode(record[3]), [decode(arg_node) for arg_node in record[4]])
+    elif kind == LAMBDA:
+        node = basic.LambdaNode(list(record[3]), decode(record[4]), pos_start, pos_end)
+        node.frame_size, node.captures, node.cell_slots, node.prefill = record[5:9]
+    else:
+        raise Exception(f'Unknown node kind {kind}')
+
+    node.pos_start, node.pos_end = pos_start, pos_end
+    return node
+
+
+def decode_op(op):
+    return Token(*op) if type(op) is tuple else Token(op)
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+if __package__ in (None, ''):
+    # Run as a script (python PartA/Server.py): make the PartA package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PartA import basic
+from PartA.Parallel import run_command
+
+
+#######################################
+# CONSTANTS
+#######################################
+
+MAX_LINE = 1 << 20  # longest request line, in bytes
+TIMEOUT_GRACE = 1.0  # seconds past the time limit before a command is given up on
+SERVER_FN = '<server>'  # file name of the commands, the same for all sessions so they share parse_cache
+
+
+#######################################
+# SESSION
+#######################################
+
+# Every connection is a session with its own globals, an Environment over
+# the prelude: a frozen table all sessions read and none changes.
+
+class Session:
+    def __init__(self, session_id, timeout, prelude=None):
+        self.session_id = session_id
+        self.environment = basic.Environment(prelude)
+        self.governor = basic.Governor(time_limit=timeout)
+
+    def __repr__(self):
+        return f'<session {self.session_id}>'
+
+
+#######################################
+# SERVER
+#######################################
+
+# The protocol is one command per line, as in batch mode. Each command gets
+# one line back, a JSON object: {"ok": true/false, "output": what the REPL
+# prints for it, "ms": evaluation time}. A session's commands run in order.
+#
+# Commands are evaluated on a pool of threads, so a slow one does not hold
+# up the other sessions. At most max_pending commands are submitted at a
+# time; a session waiting for a slot reads no more of its socket, which
+# pushes back on its client. A command running for timeout seconds is
+# stopped by its session's Governor, with an RTError. One that still has
+# not finished TIMEOUT_GRACE seconds later (the governor only looks at the
+# clock on calls) is answered with an error and its session is closed; the
+# command keeps its slot until it finishes.
+
+class EvalServer:
+    def __init__(self, engine='interpreter', workers=None, max_pending=None, timeout=10.0, prelude=None):
+        self.engine = engine
+        self.prelude = prelude  # frozen SymbolTable the sessions start from, see load_prelude()
+        # Threads mostly take turns holding the GIL, so there are more of
+        # them than CPUs (as ThreadPoolExecutor picks) to keep a few slow
+        # commands from taking them all
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='rpel-eval')
+        self.slots = None  # asyncio.Semaphore of max_pending, made in the server's loop
+        self.next_session_id = 0
+
+    async def start(self, host='127.0.0.1', port=7878, path=None):
+        # Listens on the Unix socket path if given, else on host:port
+        self.slots = asyncio.Semaphore(self.max_pending)
+        if path:
+            return await asyncio.start_unix_server(self.handle, path, limit=MAX_LINE)
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        self.next_session_id += 1
+        session = Session(self.next_session_id, self.timeout, self.prelude)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self.respond(writer, False, f"Line longer than {MAX_LINE} bytes", 0.0)
+                    break
+                if not line: break
+
+                text = line.decode('utf-8', 'replace').rstrip('\r\n')
+                if not text.strip(): continue
+
+                output, failed, seconds, timed_out = await self.evaluate(session, text)
+                await self.respond(writer, not failed, output, seconds)
+                if timed_out: break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def evaluate(self, session, text):
+        # Returns (output, failed, seconds, timed out)
+        loop = asyncio.get_running_loop()
+        await self.slots.acquire()
+
+        def release(future):
+            try:
+                loop.call_soon_threadsafe(self.slots.release)
+            except RuntimeError:  # the loop is gone
+                pass
+
+        future = self.executor.submit(
+            run_command, SERVER_FN, text, self.engine, session.environment.symbol_table, session.governor
+        )
+        future.add_done_callback(release)
+
+        try:
+            output, failed, seconds = await asyncio.wait_for(
+                asyncio.wrap_future(future), self.timeout + TIMEOUT_GRACE
+            )
+        except asyncio.TimeoutError:
+            return f"Timed out after {self.timeout:g} s, closing the session", True, self.timeout, True
+        return output, failed, seconds, False
+
+    async def respond(self, writer, ok, output, seconds):
+        response = {'ok': ok, 'output': output, 'ms': round(seconds * 1000, 3)}
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        await writer.drain()
+
+
+#######################################
+# MAIN
+#######################################
+
+def load_prelude(path, engine):
+    # Runs every command of the file in a new Environment; returns its
+    # snapshot and the number of errors, which are printed to stderr
+    environment = basic.Environment()
+    errors = 0
+    with open(path, encoding='utf-8') as file:
+        for line_no, line in enumerate(file, 1):
+            text = line.rstrip('\r\n')
+            if not text.strip(): continue
+
+            output, failed, seconds = run_command(path, text, engine, environment.symbol_table)
+            if failed:
+                errors += 1
+                print(f"{path}, line {line_no}: {output}", file=sys.stderr)
+    return environment.snapshot(), errors
+
+
+async def serve(args, prelude=None):
+    server = EvalServer(args.engine, args.workers, args.max_pending, args.timeout, prelude)
+    listener = await server.start(args.host, args.port, args.unix)
+
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Serving RPEL on {where} ({server.workers} workers, engine {args.engine})", file=sys.stderr)
+
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve RPEL sessions over a socket, one command per line.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=7878, help="TCP port to listen on (default: 7878)")
+    parser.add_argument('--unix', help="listen on this Unix socket instead of TCP")
+    parser.add_argument('-e', '--engine', default='interpreter', choices=('interpreter', 'compiler', 'vm', 'lazy'),
+                        help="how to evaluate the commands (default: interpreter)")
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help="threads evaluating commands (default: CPUs + 4, at most 32)")
+    parser.add_argument('--max-pending', type=int, default=0,
+                        help="commands submitted at a time before sessions wait (default: 4 per worker)")
+    parser.add_argument('-t', '--timeout', type=float, default=10.0,
+                        help="seconds a command may run (default: 10)")
+    parser.add_argument('--prelude', help="file of commands run once at start-up, whose globals every session sees")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    prelude = None
+    if args.prelude:
+        prelude, errors = load_prelude(args.prelude, args.engine)
+        if errors: sys.exit(1)
+
+    try:
+        asyncio.run(serve(args, prelude))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,381 @@
+from array import array
+
+from PartA import basic
+from PartA.Lexen import TT_KEYWORD, TT_MINUS
+from PartA.Interpreter import BINARY_OPERATIONS, SHORT_CIRCUITS, operation_key, short_circuit
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# OPCODES
+#######################################
+
+# Every instruction is two ints in the opcode stream: the opcode and its
+# argument (0 when the opcode takes none).
+
+OP_LOAD_NUMBER = 0    # push the Number consts[arg]
+OP_LOAD_VAR = 1       # push the value of the global named consts[arg]
+OP_STORE_VAR = 2      # bind the global consts[arg] to the top of the stack (left in place)
+OP_BINARY = 3         # pop right, pop left, push left.<method>(right) for (method, node) in consts[arg]
+OP_NEGATE = 4         # pop number, push number * -1 (consts[arg] is the node, for errors)
+OP_NOT = 5            # pop number, push NOT number (consts[arg] is the node, for errors)
+OP_POSITIVE = 6       # unary '+': the value itself
+OP_JUMP = 7           # jump to arg
+OP_JUMP_IF_FALSE = 8  # pop condition, jump to arg when it is false
+OP_PUSH_NONE = 9      # push None (an IF without a matching case)
+OP_MAKE_FUNCTION = 10 # push a Function built from consts[arg]
+OP_MAKE_LAMBDA = 11   # push a Lambda built from consts[arg]
+OP_CALL = 12          # pop arg values and the callee, call it
+OP_RETURN = 13        # return the top of the stack to the caller
+OP_TAIL_CALL = 14     # like OP_CALL, but the callee replaces the current frame
+OP_LOAD_LOCAL = 15    # push slot arg of the current frame
+OP_LOAD_DEREF = 16    # push the variable held in a Cell, at the (address, name) in consts[arg]
+OP_STORE_LOCAL = 17   # store the top of the stack in slot arg (left in place)
+OP_AND_JUMP = 18      # if the top of the stack decides its AND, replace it with the result and jump to arg
+OP_OR_JUMP = 19       # the same for OR
+OP_LOAD_FREE = 20     # push entry arg of the current function's closure
+OP_STORE_CELL = 21    # store the top of the stack in the Cell in slot arg (left in place)
+
+
+#######################################
+# CODE
+#######################################
+
+class Code:
+    def __init__(self, name):
+        self.name = name
+        self.ops = array('i')
+        self.consts = []
+        self.positions = []  # (pos_start, pos_end) for every instruction
+        self.local_names = {}  # slot -> name, for globals shadowed by an unset local
+        self.free_names = {}  # closure index -> name, the same for captured variables
+
+    def emit(self, op, arg, node):
+        self.ops.append(op)
+        self.ops.append(arg)
+        self.positions.append((node.pos_start, node.pos_end))
+        return len(self.ops) - 2
+
+    def add_const(self, value):
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def patch(self, idx, target):
+        self.ops[idx + 1] = target
+
+    def __call__(self, context):
+        return VM().run(self, context)
+
+    def __repr__(self):
+        return f'<code {self.name}>'
+
+
+#######################################
+# BYTECODE COMPILER
+#######################################
+
+class BytecodeCompiler:
+    def compile(self, node, name='<program>'):
+        code = Code(name)
+        self.visit(node, code)
+        code.emit(OP_RETURN, 0, node)
+        return code
+
+    def visit(self, node, code):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        method(node, code)
+
+    def no_visit_method(self, node, code):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    ###################################
+
+    def visit_NumberNode(self, node, code):
+        code.emit(OP_LOAD_NUMBER, code.add_const(basic.make_number(node.tok.value)), node)
+
+    def visit_VarAccessNode(self, node, code):
+        var_name = node.var_name_tok.value
+
+        if not node.address:
+            code.emit(OP_LOAD_VAR, code.add_const(var_name), node)
+        elif node.address[0] == basic.LOCAL:
+            code.local_names[node.address[1]] = var_name
+            code.emit(OP_LOAD_LOCAL, node.address[1], node)
+        elif node.address[0] == basic.FREE:
+            code.free_names[node.address[1]] = var_name
+            code.emit(OP_LOAD_FREE, node.address[1], node)
+        else:
+            code.emit(OP_LOAD_DEREF, code.add_const((node.address, var_name)), node)
+
+    def visit_VarAssignNode(self, node, code):
+        self.visit(node.value_node, code)
+        self.store(node.var_name_tok.value, node.address, node, code)
+
+    def store(self, var_name, address, node, code):
+        if address:
+            code.emit(OP_STORE_LOCAL if address[0] == basic.LOCAL else OP_STORE_CELL, address[1], node)
+        else:
+            code.emit(OP_STORE_VAR, code.add_const(var_name), node)
+
+    def visit_BinOpNode(self, node, code):
+        leftmost, chain = binop_chain(node)
+        self.visit(leftmost, code)
+        for bin_op in chain:
+            method_name = BINARY_OPERATIONS[operation_key(bin_op.op_tok)]
+            if method_name in SHORT_CIRCUITS:
+                skip = code.emit(OP_AND_JUMP if method_name == 'anded_by' else OP_OR_JUMP, 0, bin_op)
+
+            self.visit(bin_op.right_node, code)
+            code.emit(OP_BINARY, code.add_const((method_name, bin_op)), bin_op)
+
+            if method_name in SHORT_CIRCUITS:
+                code.patch(skip, len(code.ops))
+
+    def visit_UnaryOpNode(self, node, code):
+        self.visit(node.node, code)
+
+        if node.op_tok.type == TT_MINUS:
+            code.emit(OP_NEGATE, code.add_const(node), node)
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            code.emit(OP_NOT, code.add_const(node), node)
+        else:
+            code.emit(OP_POSITIVE, 0, node)
+
+    def visit_IfNode(self, node, code):
+        end_jumps = []
+
+        for condition, expr in node.cases:
+            self.visit(condition, code)
+            next_case = code.emit(OP_JUMP_IF_FALSE, 0, condition)
+            self.visit(expr, code)
+            end_jumps.append(code.emit(OP_JUMP, 0, expr))
+            code.patch(next_case, len(code.ops))
+
+        if node.else_case:
+            self.visit(node.else_case, code)
+        else:
+            code.emit(OP_PUSH_NONE, 0, node)
+
+        for idx in end_jumps:
+            code.patch(idx, len(code.ops))
+
+    def visit_FuncDefNode(self, node, code):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        body_code = self.compile(node.body_node, func_name or '<anonymous>')
+        template = (
+            func_name, node.body_node, arg_names, body_code, node.frame_size, node.free_names,
+            node.captures, node.cell_slots, node.prefill
+        )
+        code.emit(OP_MAKE_FUNCTION, code.add_const(template), node)
+        if func_name:
+            self.store(func_name, node.address, node, code)
+
+    def visit_CallNode(self, node, code):
+        self.visit(node.node_to_call, code)
+        for arg_node in node.arg_nodes:
+            self.visit(arg_node, code)
+        code.emit(OP_TAIL_CALL if node.is_tail else OP_CALL, len(node.arg_nodes), node)
+
+    def visit_LambdaNode(self, node, code):
+        body_code = self.compile(node.body_node, '<lambda>')
+        template = (
+            node.param_names, node.body_node, body_code, node.frame_size, node.captures, node.cell_slots,
+            node.prefill
+        )
+        code.emit(OP_MAKE_LAMBDA, code.add_const(template), node)
+
+
+#######################################
+# VIRTUAL MACHINE
+#######################################
+
+class VM:
+    def run(self, code, context):
+        Number, Function, Lambda, RTError = basic.Number, basic.Function, basic.Lambda, basic.RTError
+        SymbolTable, memo_key, add_pending = basic.SymbolTable, basic.memo_key, basic.add_pending
+        locate_error, minus_one = basic.locate_error, basic.Number.minus_one
+        governor = basic.governed.current
+
+        stack = []
+        frames = []
+        pending = None  # (memo, key) pairs to fill when the current frame returns
+        ops, consts, positions = code.ops, code.consts, code.positions
+        pc = 0
+
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            ip = pc >> 1
+            pc += 2
+
+            if op == OP_LOAD_LOCAL:
+                value = context.frame[arg]
+                if value is None:
+                    var_name = code.local_names[arg]
+                    value = context.symbol_table.get(var_name)
+                    if not value:
+                        pos_start, pos_end = positions[ip]
+                        return None, RTError(pos_start, pos_end, f"'{var_name}' is not defined", context)
+                if type(value) is not Number:
+                    value = value.copy().set_pos(*positions[ip], context.source)
+                stack.append(value)
+
+            elif op == OP_LOAD_VAR:
+                var_name = consts[arg]
+                value = context.symbol_table.get(var_name)
+                if not value:
+                    pos_start, pos_end = positions[ip]
+                    return None, RTError(pos_start, pos_end, f"'{var_name}' is not defined", context)
+                if type(value) is not Number:
+                    value = value.copy().set_pos(*positions[ip], context.source)
+                stack.append(value)
+
+            elif op == OP_LOAD_NUMBER:
+                stack.append(consts[arg])
+
+            elif op == OP_BINARY:
+                method_name, node = consts[arg]
+                right = stack.pop()
+                result, error = getattr(stack[-1], method_name)(right)
+                if error: return None, locate_error(error, node, context)
+                stack[-1] = result
+
+            elif op == OP_JUMP_IF_FALSE:
+                if not stack.pop().is_true():
+                    pc = arg
+
+            elif op == OP_JUMP:
+                pc = arg
+
+            elif op == OP_AND_JUMP or op == OP_OR_JUMP:
+                decided = short_circuit('anded_by' if op == OP_AND_JUMP else 'ored_by', stack[-1])
+                if decided is not None:
+                    stack[-1] = decided
+                    pc = arg
+
+            elif op == OP_CALL or op == OP_TAIL_CALL:
+                pos_start, pos_end = positions[ip]
+                if arg:
+                    args = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    args = []
+                value_to_call = stack.pop().copy().set_pos(pos_start, pos_end, context.source)
+
+                if isinstance(value_to_call, Lambda):
+                    if len(args) != len(value_to_call.param_names):
+                        return None, RTError(
+                            pos_start, pos_end,
+                            f"Lambdas take exactly {len(value_to_call.param_names)} arguments",
+                            context
+                        )
+                elif not isinstance(value_to_call, Function):
+                    return None, RTError(pos_start, pos_end, "Can only call functions or lambdas", context)
+
+                body_code = value_to_call.body_code
+                if type(body_code) is Code:
+                    # Run the callee in this loop instead of recursing into execute()
+                    memo = value_to_call.memo
+                    key = memo_key(args) if memo is not None else None
+                    if key is not None:
+                        memo.validate(SymbolTable.generation)
+                        value = memo.get(key)
+                        if value is not None:
+                            stack.append(value)
+                            continue
+
+                    new_context, error = value_to_call.make_context(args)
+                    if error: return None, error
+
+                    if op == OP_CALL:
+                        frames.append((code, pc, context, pending))
+                        pending = None
+                        if governor is not None: governor.depth += 1
+                    if governor is not None:
+                        error = governor.check_call(value_to_call, new_context)
+                        if error: return None, error
+                    if key is not None:
+                        pending = add_pending(pending, memo, key)
+
+                    code, context = body_code, new_context
+                    ops, consts, positions = code.ops, code.consts, code.positions
+                    pc = 0
+                else:
+                    res = value_to_call.execute(args)
+                    if res.error: return None, res.error
+                    stack.append(res.value)
+
+            elif op == OP_RETURN:
+                if pending:
+                    for memo, key in pending:
+                        memo.put(key, stack[-1])
+                if not frames:
+                    return stack.pop(), None
+                code, pc, context, pending = frames.pop()
+                if governor is not None: governor.depth -= 1
+                ops, consts, positions = code.ops, code.consts, code.positions
+
+            elif op == OP_NEGATE:
+                number, error = stack[-1].multed_by(minus_one)
+                if error: return None, locate_error(error, consts[arg], context)
+                stack[-1] = number
+
+            elif op == OP_NOT:
+                number, error = stack[-1].notted()
+                if error: return None, locate_error(error, consts[arg], context)
+                stack[-1] = number
+
+            elif op == OP_POSITIVE:
+                pass
+
+            elif op == OP_LOAD_DEREF:
+                address, var_name = consts[arg]
+                value = context.lookup(address, var_name)
+                if not value:
+                    pos_start, pos_end = positions[ip]
+                    return None, RTError(pos_start, pos_end, f"'{var_name}' is not defined", context)
+                if type(value) is not Number:
+                    value = value.copy().set_pos(*positions[ip], context.source)
+                stack.append(value)
+
+            elif op == OP_LOAD_FREE:
+                value = context.closure[arg]
+                if value is None:
+                    var_name = code.free_names[arg]
+                    value = context.symbol_table.get(var_name)
+                    if not value:
+                        pos_start, pos_end = positions[ip]
+                        return None, RTError(pos_start, pos_end, f"'{var_name}' is not defined", context)
+                if type(value) is not Number:
+                    value = value.copy().set_pos(*positions[ip], context.source)
+                stack.append(value)
+
+            elif op == OP_STORE_LOCAL:
+                context.frame[arg] = stack[-1]
+
+            elif op == OP_STORE_CELL:
+                context.frame[arg].value = stack[-1]
+
+            elif op == OP_STORE_VAR:
+                context.symbol_table.set(consts[arg], stack[-1])
+
+            elif op == OP_PUSH_NONE:
+                stack.append(None)
+
+            elif op == OP_MAKE_FUNCTION:
+                (func_name, body_node, arg_names, body_code, frame_size, free_names,
+                 captures, cell_slots, prefill) = consts[arg]
+                func_value = Function(func_name, body_node, arg_names, body_code, frame_size).set_closure(
+                    context, captures, cell_slots, prefill).set_pos(*positions[ip], context.source)
+                func_value.enable_memo(free_names)
+                stack.append(func_value)
+
+            elif op == OP_MAKE_LAMBDA:
+                param_names, body_node, body_code, frame_size, captures, cell_slots, prefill = consts[arg]
+                stack.append(Lambda(param_names, body_node, body_code, frame_size).set_closure(
+                    context, captures, cell_slots, prefill).set_pos(*positions[ip], context.source))
+
+            else:
+                raise Exception(f'Unknown opcode {op}')
@@ -0,0 +1,330 @@
+try:
+    import numpy as np
+except ImportError:  # vectorize() reports it when used
+    np = None
+
+from PartA import basic
+from PartA.Lexen import TT_KEYWORD, TT_MINUS, Lexer
+from PartA.Parser import Parser
+from PartA.Resolver import Resolver
+from PartA.Optimizer import Optimizer
+from PartA.Interpreter import Interpreter, BINARY_OPERATIONS, SHORT_CIRCUITS, operation_key
+from PartA.Analysis import binop_chain
+
+
+#######################################
+# CONSTANTS
+#######################################
+
+MAX_CALL_DEPTH = 50    # deeper (e.g. tail-recursive) calls are left to the scalar engine
+INT_LIMIT = 2.0 ** 62  # an int64 result this large may have wrapped around
+
+# Value method -> NumPy ufunc for the operations done the same way on arrays
+UFUNCS = {
+    'added_to': 'add',
+    'subbed_by': 'subtract',
+    'multed_by': 'multiply',
+    'dived_by': 'true_divide',
+    'moded_by': 'mod',
+    'get_comparison_eq': 'equal',
+    'get_comparison_ne': 'not_equal',
+    'get_comparison_lt': 'less',
+    'get_comparison_gt': 'greater',
+    'get_comparison_lte': 'less_equal',
+    'get_comparison_gte': 'greater_equal',
+}
+
+
+#######################################
+# VECTORIZE
+#######################################
+
+# Evaluates a LAMBDA, FUNC or expression for whole NumPy arrays of
+# arguments at once: arithmetic, comparisons, AND/OR and NOT become array
+# operations, IF becomes np.where over the lanes each case takes, and calls
+# run the callee's body once for all lanes. Anything that cannot be done
+# that way (a VAR, defining a FUNC or LAMBDA, a built-in such as POWMOD,
+# an error such as a division by zero in some lane, int64 overflow, deep
+# recursion) makes the whole evaluation fall back to calling the function
+# once per lane.
+# Results of the array path share one dtype: an IF returning an int in some
+# lanes and a float in others gives floats.
+
+class NotVectorizable(Exception):
+    pass
+
+
+def vectorize(target, names=None, fn='<vectorize>'):
+    # target is a Function or Lambda value, or the text of a LAMBDA, a FUNC
+    # (which is defined, like running it would) or an expression whose
+    # free variables names lists. Returns (VectorFunction, error).
+    if np is None:
+        raise ImportError("vectorize() needs numpy")
+
+    if isinstance(target, basic.BaseFunction):
+        return VectorFunction(target), None
+
+    lexer = Lexer(fn, target)
+    tokens, error = lexer.make_tokens()
+    if error: return None, error
+
+    ast = Parser(tokens, lexer.source).parse()
+    if ast.error: return None, ast.error
+    node = ast.node
+
+    if not isinstance(node, (basic.LambdaNode, basic.FuncDefNode)):
+        if names is None:
+            raise TypeError("names are needed to vectorize an expression")
+        node = basic.LambdaNode(list(names), node, node.pos_start, node.pos_end)
+
+    node = Optimizer().visit(Resolver().resolve(node))
+
+    context = basic.Context('<program>')
+    context.symbol_table = basic.global_symbol_table
+    context.source = lexer.source
+    res = Interpreter().visit(node, context)
+    if res.error: return None, res.error
+
+    return VectorFunction(res.value), None
+
+
+class VectorFunction:
+    def __init__(self, func):
+        self.func = func
+        self.param_names = func.arg_names if isinstance(func, basic.Function) else func.param_names
+
+    def __call__(self, *arrays):
+        # One array (or scalar) per parameter, broadcast against each other.
+        # Returns (array of results, error).
+        if len(arrays) != len(self.param_names):
+            raise TypeError(f"expected {len(self.param_names)} arrays, got {len(arrays)}")
+
+        arrays = [as_number_array(array) for array in arrays]
+        shape = np.broadcast_shapes(*(array.shape for array in arrays))
+
+        if all(array.dtype.kind in 'if' for array in arrays) and not any(map(out_of_int_range, arrays)):
+            try:
+                with np.errstate(all='ignore'):
+                    result = Vectorizer().call(self.func, arrays, np.ones(shape, dtype=bool))
+                if not isinstance(result, basic.Value):
+                    return np.broadcast_to(result, shape).copy(), None
+            except (NotVectorizable, OverflowError, RecursionError):
+                pass
+
+        return self.call_scalar(arrays, shape)
+
+    def call_scalar(self, arrays, shape):
+        results = []
+        lanes = np.broadcast(*arrays) if arrays else [()]
+
+        for values in lanes:
+            args = [basic.make_number(value.item()) for value in values]
+            res = self.func.execute(args)
+            if res.error: return None, res.error
+            results.append(res.value.value if type(res.value) is basic.Number else res.value)
+
+        if all(type(result) in (int, float) for result in results):
+            return np.array(results).reshape(shape), None
+
+        out = np.empty(len(results), dtype=object)
+        out[:] = results
+        return out.reshape(shape), None
+
+
+def as_number_array(array):
+    array = np.asarray(array)
+    if array.dtype.kind in 'bu':
+        return array.astype(np.int64)
+    return array
+
+
+def out_of_int_range(array):
+    return array.dtype.kind == 'i' and array.size and np.abs(array).max() >= INT_LIMIT
+
+
+#######################################
+# VECTORIZER
+#######################################
+
+class Vectorizer:
+    def __init__(self):
+        self.depth = 0
+
+    def call(self, func, args, mask):
+        # Runs the body of func for the lanes in mask
+        if isinstance(func, basic.Function):
+            if len(args) != len(func.arg_names): raise NotVectorizable
+        elif isinstance(func, basic.Lambda):
+            if len(args) != len(func.param_names): raise NotVectorizable
+        else:
+            raise NotVectorizable
+
+        self.depth += 1
+        if self.depth > MAX_CALL_DEPTH: raise NotVectorizable
+
+        frame = [None] * func.frame_size
+        frame[:len(args)] = args
+        context = basic.Context(func.context.display_name, func.context)
+        context.closure = func.closure
+        result = self.visit(func.body_node, frame, context, mask)
+
+        self.depth -= 1
+        return result
+
+    def visit(self, node, frame, context, mask):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node, frame, context, mask)
+
+    def no_visit_method(self, node, frame, context, mask):
+        raise NotVectorizable
+
+    def number(self, node, frame, context, mask):
+        value = self.visit(node, frame, context, mask)
+        if isinstance(value, basic.Value): raise NotVectorizable
+        return value
+
+    ###################################
+
+    def visit_NumberNode(self, node, frame, context, mask):
+        return node.tok.value
+
+    def visit_VarAccessNode(self, node, frame, context, mask):
+        address = node.address
+
+        if address is None:
+            value = None
+        elif address[0] == basic.LOCAL:
+            value = frame[address[1]]
+        elif address[0] == basic.LOCAL_CELL:
+            # Only bodies with a VAR or FUNC have cells, and those do not run here
+            raise NotVectorizable
+        else:
+            # A variable of an enclosing FUNC or LAMBDA call, which the
+            # function captured in its closure when it was defined
+            value = context.lookup(address, node.var_name_tok.value)
+
+        if value is None:
+            value = context.symbol_table.get(node.var_name_tok.value)
+            if value is None: raise NotVectorizable
+
+        if type(value) is basic.Number:
+            return value.value
+        return value
+
+    def visit_BinOpNode(self, node, frame, context, mask):
+        leftmost, chain = binop_chain(node)
+        left = self.number(leftmost, frame, context, mask)
+
+        for bin_op in chain:
+            method_name = BINARY_OPERATIONS[operation_key(bin_op.op_tok)]
+            right_mask = mask
+            if method_name in SHORT_CIRCUITS:
+                # As short_circuit(): the right operand only runs in the
+                # lanes whose left operand does not decide the result
+                left_is_true = np.asarray(left) != 0
+                right_mask = mask & (left_is_true if method_name == 'anded_by' else ~left_is_true)
+
+            right = self.number(bin_op.right_node, frame, context, right_mask) if right_mask.any() else 0
+            left = operate(method_name, left, right, mask)
+
+        return left
+
+    def visit_UnaryOpNode(self, node, frame, context, mask):
+        value = self.number(node.node, frame, context, mask)
+
+        if node.op_tok.type == TT_MINUS:
+            return np.negative(value)
+        if node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            return (np.asarray(value) == 0).astype(np.int64)
+        return value
+
+    def visit_IfNode(self, node, frame, context, mask):
+        remaining = mask
+        taken_cases = []
+
+        for condition, expr in node.cases:
+            condition_value = self.number(condition, frame, context, remaining)
+            taken = remaining & (np.asarray(condition_value) != 0)
+            if taken.any():
+                taken_cases.append((taken, self.number(expr, frame, context, taken)))
+
+            remaining = remaining & ~taken
+            if not remaining.any(): break
+
+        if remaining.any():
+            # Lanes matching no case would get no value at all
+            if not node.else_case: raise NotVectorizable
+            result = self.number(node.else_case, frame, context, remaining)
+        else:
+            result = 0
+
+        for taken, value in reversed(taken_cases):
+            result = np.where(taken, value, result)
+
+        return result
+
+    def visit_CallNode(self, node, frame, context, mask):
+        func = self.visit(node.node_to_call, frame, context, mask)
+        if not isinstance(func, basic.BaseFunction): raise NotVectorizable
+
+        args = [self.visit(arg_node, frame, context, mask) for arg_node in node.arg_nodes]
+
+        # The call is on the untaken path of every lane (e.g. past a base case)
+        if not mask.any():
+            return 0
+
+        return self.call(func, args, mask)
+
+
+def operate(method_name, left, right, mask):
+    if method_name in ('dived_by', 'moded_by'):
+        if np.any((np.asarray(right) == 0) & mask): raise NotVectorizable
+
+    if method_name == 'powed_by':
+        return power(left, right, mask)
+
+    if method_name == 'anded_by' or method_name == 'ored_by':
+        # int(a and b), int(a or b)
+        left_is_false = np.asarray(left) == 0
+        value = np.where(left_is_false, left, right) if method_name == 'anded_by' else \
+            np.where(left_is_false, right, left)
+        if np.asarray(value).dtype.kind == 'f':
+            if not np.all(np.isfinite(value) | ~mask): raise NotVectorizable
+            value = np.trunc(value)
+        return np.asarray(value).astype(np.int64)
+
+    ufunc_name = UFUNCS.get(method_name)
+    if ufunc_name is None: raise NotVectorizable
+    ufunc = getattr(np, ufunc_name)
+    result = ufunc(left, right)
+
+    if method_name.startswith('get_comparison'):
+        return np.asarray(result).astype(np.int64)
+
+    if np.asarray(result).dtype.kind == 'i':
+        # Python ints do not overflow; redo the operation in floats to see
+        # whether the int64 one could have
+        estimate = ufunc(np.asarray(left, dtype=float), np.asarray(right, dtype=float))
+        if np.any((np.abs(estimate) >= INT_LIMIT) & mask): raise NotVectorizable
+
+    return result
+
+
+def power(left, right, mask):
+    # An int to a negative power is a float in RPEL, so int ^ int stays on
+    # the array path only when no lane has one; a lane that overflows, or
+    # that Python would report an error for (such as a negative base to a
+    # fractional power), sends the whole evaluation to the scalar engine
+    left, right = np.asarray(left), np.asarray(right)
+
+    if left.dtype.kind == 'i' and right.dtype.kind == 'i':
+        if np.any((right < 0) & mask): raise NotVectorizable
+        right = np.where(right < 0, 0, right)  # lanes outside mask may hold anything
+        estimate = np.power(left.astype(float), right.astype(float))
+        if np.any((np.abs(estimate) >= INT_LIMIT) & mask): raise NotVectorizable
+        return np.power(left, right)
+
+    result = np.power(left.astype(float), right)
+    if not np.all(np.isfinite(result) | ~mask): raise NotVectorizable
+    return result
@@ -2,22 +2,56 @@
 # IMPORTS
 #######################################
 
+# basic holds what every other module of PartA is built on (errors,
+# sources, nodes, values, contexts and limits) and imports none of them,
+# so that the package has no import cycles. Lexing, parsing and running
+# live in PartA/Runner.py; see LAZY_NAMES below for the names basic still
+# offers from there and from the engines.
+
+import decimal
+import importlib
+import itertools
+import math
+import threading
+import time
+from bisect import bisect_right
 
-import string
-
-from PartA.Lexen import *
 from PartA.String_with_arrows import string_with_arrows
-from PartA.Interpreter import *
-from PartA.Parser import *
+from PartA.Cache import LRUCache
 
 #######################################
 # CONSTANTS
 #######################################
 
 DIGITS = '0123456789'
-LETTERS = string.ascii_letters
+LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
 LETTERS_DIGITS = LETTERS + DIGITS
 
+MEMO_SIZE = 1024  # results cached per pure FUNC, 0 turns memoization off
+
+# Default limits of a run (see Governor); None for no limit
+MAX_STEPS = None   # FUNC and LAMBDA calls, 0 for no limit as well
+MAX_DEPTH = 10000  # calls nested in each other (tail calls do not nest)
+TIME_LIMIT = None  # seconds
+CLOCK_EVERY = 1024  # calls between two looks at the clock
+
+# Default step limit of a command typed in the REPL or run in batch mode,
+# where a runaway loop of tail calls, which never runs out of stack, must
+# still end; it takes from a few seconds to a quarter of a minute to reach.
+# Programs run through Runner.run have no step limit unless they ask.
+COMMAND_MAX_STEPS = 1000000
+
+MAX_POWER_BITS = 1 << 20  # size an integer ^ may give, about 315,000 digits
+
+MAX_LAYERS = 8  # frozen SymbolTables an Environment stacks before merging them into one
+
+# Kinds of the (kind, index) addresses the Resolver gives variables local to
+# a FUNC or LAMBDA body (see PartA/Resolver.py)
+LOCAL = 0       # slot index of the call's frame
+LOCAL_CELL = 1  # a frame slot holding a Cell: a local captured by a closure and assigned
+FREE = 2        # index in the function's closure
+FREE_CELL = 3   # index in the closure of a captured Cell
+
 
 #######################################
 # ERRORS
@@ -29,11 +63,16 @@ class Error:
         self.pos_end = pos_end
         self.error_name = error_name
         self.details = details
+        self.source = None  # the Source pos_start and pos_end are offsets into
+
+    def set_source(self, source):
+        self.source = source
+        return self
 
     def as_string(self):
         result = f'{self.error_name}: {self.details}\n'
-        result += f'File {self.pos_start.fn}, line {self.pos_start.ln + 1}'
-        result += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
+        result += f'File {self.source.fn}, line {self.source.line_number(self.pos_start)}'
+        result += '\n\n' + string_with_arrows(self.source, self.pos_start, self.pos_end)
         return result
 
 
@@ -53,53 +92,65 @@ class InvalidSyntaxError(Error):
 
 
 class RTError(Error):
+    in_divisor = False  # set on errors caused by the right operand, see locate_error()
+
     def __init__(self, pos_start, pos_end, details, context):
         super().__init__(pos_start, pos_end, 'Runtime Error', details)
         self.context = context
 
     def as_string(self):
-        result = self.generate_traceback()
+        # Without a source of its own the error is in the text its context runs
+        source = self.source or self.context.source
+        result = self.generate_traceback(source)
         result += f'{self.error_name}: {self.details}'
-        result += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
+        result += '\n\n' + string_with_arrows(source, self.pos_start, self.pos_end)
         return result
 
-    def generate_traceback(self):
+    def generate_traceback(self, source):
         result = ''
         pos = self.pos_start
         ctx = self.context
 
         while ctx:
-            result = f'  File {pos.fn}, line {str(pos.ln + 1)}, in {ctx.display_name}\n' + result
-            pos = ctx.parent_entry_pos
+            result = f'  File {source.fn}, line {source.line_number(pos)}, in {ctx.display_name}\n' + result
+            pos, source = ctx.parent_entry_pos, ctx.parent_entry_source
             ctx = ctx.parent
 
         return 'Traceback (most recent call last):\n' + result
 
 
 #######################################
-# POSITION
+# SOURCE
 #######################################
 
-class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
-        self.idx = idx
-        self.ln = ln
-        self.col = col
-        self.fn = fn
-        self.ftxt = ftxt
-
-    def advance(self, current_char=None):
-        self.idx += 1
-        self.col += 1
+# Tokens, nodes and errors only hold offsets into the program text; the
+# Source turns one into a line and column when an error is printed.
 
-        if current_char == '\n':
-            self.ln += 1
-            self.col = 0
-
-        return self
+class Source:
+    def __init__(self, fn, text, first_line=0):
+        self.fn = fn
+        self.text = text
+        self.first_line = first_line  # lines of fn before text, such as the earlier lines of a batch script
+        self.line_starts = None  # offset of the first character of every line, built on first use
+
+    def line(self, offset):
+        if self.line_starts is None:
+            self.line_starts = [0]
+            idx = self.text.find('\n')
+            while idx != -1:
+                self.line_starts.append(idx + 1)
+                idx = self.text.find('\n', idx + 1)
+        return bisect_right(self.line_starts, offset) - 1
+
+    def column(self, offset):
+        return offset - self.line_starts[self.line(offset)]
+
+    def line_number(self, offset):
+        # The line of fn offset is on, counting from 1, for messages
+        return self.first_line + self.line(offset) + 1
 
-    def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+    def __repr__(self):
+        return f'<source {self.fn}>'
 
 
 #######################################
@@ -120,6 +171,7 @@ class NumberNode:
 class VarAccessNode:
     def __init__(self, var_name_tok):
         self.var_name_tok = var_name_tok
+        self.address = None  # (kind, index) set by the Resolver, None for globals
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.var_name_tok.pos_end
@@ -129,6 +181,7 @@ class VarAssignNode:
     def __init__(self, var_name_tok, value_node):
         self.var_name_tok = var_name_tok
         self.value_node = value_node
+        self.address = None  # (LOCAL or LOCAL_CELL, slot) set by the Resolver, None for globals
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.value_node.pos_end
@@ -173,6 +226,12 @@ class FuncDefNode:
         self.var_name_tok = var_name_tok
         self.arg_name_toks = arg_name_toks
         self.body_node = body_node
+        self.address = None  # where a named function is stored, as for VarAssignNode
+        self.frame_size = len(arg_name_toks)  # slots a call needs, set by the Resolver
+        self.captures = ()  # addresses of the outer variables the body uses, set by the Resolver
+        self.cell_slots = ()  # slots of the frame holding Cells, set by the Resolver
+        self.prefill = ()  # locals starting with an enclosing variable, set by the Resolver
+        self.lazy_body = None  # the body the lazy engine runs, made when first needed
 
         if self.var_name_tok:
             self.pos_start = self.var_name_tok.pos_start
@@ -183,11 +242,23 @@ class FuncDefNode:
 
         self.pos_end = self.body_node.pos_end
 
+        self.analyze_body()
+
+    def analyze_body(self):
+        # Run again whenever body_node is replaced
+        mark_tail_calls(self.body_node)
+
+        bound_names = {arg_name_tok.value for arg_name_tok in self.arg_name_toks}
+        if self.var_name_tok:
+            bound_names.add(self.var_name_tok.value)
+        self.free_names = pure_free_names(self.body_node, bound_names)
+
 
 class CallNode:
     def __init__(self, node_to_call, arg_nodes):
         self.node_to_call = node_to_call
         self.arg_nodes = arg_nodes
+        self.is_tail = False  # set by mark_tail_calls for the calls a function body returns directly
 
         self.pos_start = self.node_to_call.pos_start
 
@@ -201,9 +272,20 @@ class LambdaNode:
     def __init__(self, param_names, body_node, pos_start, pos_end):
         self.param_names = param_names
         self.body_node = body_node
+        self.frame_size = len(param_names)  # slots a call needs, set by the Resolver
+        self.captures = ()  # addresses of the outer variables the body uses, set by the Resolver
+        self.cell_slots = ()  # slots of the frame holding Cells, set by the Resolver
+        self.prefill = ()  # locals starting with an enclosing variable, set by the Resolver
+        self.lazy_body = None  # the body the lazy engine runs, made when first needed
         self.pos_start = pos_start
         self.pos_end = pos_end
 
+        self.analyze_body()
+
+    def analyze_body(self):
+        # Run again whenever body_node is replaced
+        mark_tail_calls(self.body_node)
+
     def __repr__(self):
         return f'<lambda {" ".join(self.param_names)} . {self.body_node}>'
 
@@ -217,6 +299,60 @@ class ApplicationNode:
         return f"({self.func_node} {self.arg_node})"
 
 
+#######################################
+# NODE ANALYSIS
+#######################################
+
+# What FuncDefNode and LambdaNode derive from their bodies; the other
+# passes over the AST are in PartA/Analysis.py
+
+def mark_tail_calls(node):
+    # Flags the calls whose value is returned as-is by the function body
+    # rooted at node, so they can be run by the trampoline in
+    # BaseFunction.execute instead of a nested execute()
+    while isinstance(node, IfNode):
+        for condition, expr in node.cases:
+            mark_tail_calls(expr)
+        node = node.else_case
+
+    if isinstance(node, CallNode):
+        node.is_tail = True
+
+
+def pure_free_names(node, bound_names):
+    # Returns the names node reads besides bound_names, or None when it
+    # assigns a variable or defines a function or lambda
+    names = set()
+    nodes = [node]
+
+    while nodes:
+        node = nodes.pop()
+
+        if isinstance(node, NumberNode):
+            pass
+        elif isinstance(node, VarAccessNode):
+            if node.var_name_tok.value not in bound_names:
+                names.add(node.var_name_tok.value)
+        elif isinstance(node, BinOpNode):
+            nodes.append(node.left_node)
+            nodes.append(node.right_node)
+        elif isinstance(node, UnaryOpNode):
+            nodes.append(node.node)
+        elif isinstance(node, IfNode):
+            for condition, expr in node.cases:
+                nodes.append(condition)
+                nodes.append(expr)
+            if node.else_case:
+                nodes.append(node.else_case)
+        elif isinstance(node, CallNode):
+            nodes.append(node.node_to_call)
+            nodes.extend(node.arg_nodes)
+        else:
+            return None
+
+    return names
+
+
 #######################################
 # RUNTIME RESULT
 #######################################
@@ -239,18 +375,28 @@ class RTResult:
         return self
 
 
+class TailCall:
+    # Returned by a call in tail position; BaseFunction.execute makes the call
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+
 #######################################
 # VALUES
 #######################################
 
 class Value:
+    __slots__ = ()
+
     def __init__(self):
         self.set_pos()
         self.set_context()
 
-    def set_pos(self, pos_start=None, pos_end=None):
+    def set_pos(self, pos_start=None, pos_end=None, source=None):
         self.pos_start = pos_start
         self.pos_end = pos_end
+        self.source = source
         return self
 
     def set_context(self, context=None):
@@ -272,6 +418,9 @@ class Value:
     def moded_by(self, other):
         return None, self.illegal_operation(other)
 
+    def powed_by(self, other):
+        return None, self.illegal_operation(other)
+
     def get_comparison_eq(self, other):
         return None, self.illegal_operation(other)
 
@@ -296,8 +445,8 @@ class Value:
     def ored_by(self, other):
         return None, self.illegal_operation(other)
 
-    def notted(self, other):
-        return None, self.illegal_operation(other)
+    def notted(self):
+        return None, self.illegal_operation()
 
     def execute(self, args):
         return RTResult().failure(self.illegal_operation())
@@ -309,222 +458,534 @@ class Value:
         return False
 
     def illegal_operation(self, other=None):
-        if not other: other = self
-        return RTError(
-            self.pos_start, other.pos_end,
-            'Illegal operation',
-            self.context
-        )
+        # Placed on the failing operation by locate_error()
+        return RTError(None, None, 'Illegal operation', None)
 
 
 class Number(Value):
+    # Numbers are immutable and carry no position or context, so results
+    # and variable reads can share one object instead of copying it. Their
+    # operations report errors without a position; the engine places them
+    # with locate_error() once they surface.
+    __slots__ = ('value',)
+
+    pos_start = pos_end = source = context = None
+
     def __init__(self, value):
-        super().__init__()
         self.value = value
 
+    def set_pos(self, pos_start=None, pos_end=None, source=None):
+        return self
+
+    def set_context(self, context=None):
+        return self
+
     def added_to(self, other):
         if isinstance(other, Number):
-            return Number(self.value + other.value).set_context(self.context), None
+            return make_number(self.value + other.value), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def subbed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value - other.value).set_context(self.context), None
+            return make_number(self.value - other.value), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def multed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value * other.value).set_context(self.context), None
+            return make_number(self.value * other.value), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def dived_by(self, other):
         if isinstance(other, Number):
             if other.value == 0:
-                return None, RTError(
-                    other.pos_start, other.pos_end,
-                    'Division by zero',
-                    self.context
-                )
+                return None, divisor_error('Division by zero')
 
-            return Number(self.value / other.value).set_context(self.context), None
+            return Number(self.value / other.value), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def moded_by(self, other):
         if isinstance(other, Number):
             if other.value == 0:
-                return None, RTError(
-                    other.pos_start, other.pos_end,
-                    'Modulo by zero',
-                    self.context
-                )
+                return None, divisor_error('Modulo by zero')
 
-            return Number(self.value % other.value).set_context(self.context), None
+            return make_number(self.value % other.value), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def powed_by(self, other):
+        if not isinstance(other, Number):
+            return None, Value.illegal_operation(self, other)
+
+        base, exponent = self.value, other.value
+        if type(base) is int and type(exponent) is int and exponent >= 0:
+            # Python's int power squares and multiplies, so a ^ n takes
+            # O(log n) multiplications; refuse results too big to hold first
+            if abs(base) > 1 and exponent * math.log2(abs(base)) > MAX_POWER_BITS:
+                return None, RTError(None, None, f"Result of ^ would have more than {MAX_POWER_BITS} bits", None)
+            return make_number(base ** exponent), None
+
+        # Floats, and ints to negative powers, which give floats
+        try:
+            value = base ** exponent
+        except OverflowError:
+            return None, RTError(None, None, "Result of ^ is too large", None)
+        except ZeroDivisionError:
+            return None, RTError(None, None, "Zero raised to a negative power", None)
+
+        if type(value) is complex:
+            return None, RTError(None, None, "Negative number raised to a fractional power", None)
+        return Number(value), None
 
     def get_comparison_eq(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value == other.value)).set_context(self.context), None
+            return (Number.true if self.value == other.value else Number.false), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_ne(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value != other.value)).set_context(self.context), None
+            return (Number.true if self.value != other.value else Number.false), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_lt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value < other.value)).set_context(self.context), None
+            return (Number.true if self.value < other.value else Number.false), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_gt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value > other.value)).set_context(self.context), None
+            return (Number.true if self.value > other.value else Number.false), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_lte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value <= other.value)).set_context(self.context), None
+            return (Number.true if self.value <= other.value else Number.false), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_gte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value >= other.value)).set_context(self.context), None
+            return (Number.true if self.value >= other.value else Number.false), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def anded_by(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value and other.value)).set_context(self.context), None
+            return make_number(int(self.value and other.value)), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def ored_by(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value or other.value)).set_context(self.context), None
+            return make_number(int(self.value or other.value)), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def notted(self):
-        return Number(1 if self.value == 0 else 0).set_context(self.context), None
+        return (Number.true if self.value == 0 else Number.false), None
 
     def copy(self):
-        copy = Number(self.value)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
+        return self
 
     def is_true(self):
         return self.value != 0
 
     def __str__(self):
-        return str(self.value)
+        return int_str(self.value) if type(self.value) is int else str(self.value)
 
     def __repr__(self):
-        return str(self.value)
+        return self.__str__()
 
 
-# Defining constants as class attributes
-Number.null = Number(0)
-Number.false = Number(0)
-Number.true = Number(1)
+# Shared Numbers for the small ints, so most counters, flags and loop
+# indices never allocate
+SMALL_INT_MIN = -128
+SMALL_INT_MAX = 1024
+SMALL_INTS = [Number(value) for value in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
 
 
-class Function(Value):
-    def __init__(self, name, body_node, arg_names):
+def make_number(value):
+    if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return SMALL_INTS[value - SMALL_INT_MIN]
+    return Number(value)
+
+
+# Defining constants as class attributes
+Number.null = make_number(0)
+Number.false = make_number(0)
+Number.true = make_number(1)
+Number.minus_one = make_number(-1)
+
+
+def divisor_error(details):
+    # An error of a Number operation that locate_error() places on the divisor
+    error = RTError(None, None, details, None)
+    error.in_divisor = True
+    return error
+
+
+def int_str(value):
+    # str() refuses ints of more than sys.get_int_max_str_digits() digits
+    # (4300 by default), which ^ gives easily; Decimal has no such limit
+    try:
+        return str(value)
+    except ValueError:
+        return str(decimal.Decimal(value))
+
+
+def locate_error(error, node, context):
+    # Give an error from a Number operation the position of the node that
+    # failed: the divisor for a division by zero, otherwise the operation
+    if error.in_divisor:
+        node = node.right_node
+    if error.pos_start is None:
+        error.pos_start = node.pos_start
+    if error.pos_end is None:
+        error.pos_end = node.pos_end
+    if error.context is None:
+        error.context = context
+    return error
+
+
+# Runs the bodies of functions that were not compiled (body_code is None).
+# PartA/Interpreter.py sets it when imported; only the Interpreter makes
+# such functions, so it is always set when one is called.
+body_interpreter = None
+
+
+class BaseFunction(Value):
+    def __init__(self, body_node, body_code=None, frame_size=0):
         super().__init__()
-        self.name = name or "<anonymous>"
         self.body_node = body_node
-        self.arg_names = arg_names
+        self.body_code = body_code  # set when the body was compiled by the Compiler or the VM
+        self.frame_size = frame_size
+        self.closure = ()  # values (or Cells) of the outer variables the body uses
+        self.cell_slots = ()
+        self.prefill = ()  # (slot, closure index, is a Cell) of the locals to fill in
+        self.memo = None  # LRUCache of results, for pure functions only
+
+    def make_context(self, args):
+        raise Exception('No make_context method defined')
+
+    def set_closure(self, context, captures, cell_slots, prefill):
+        # Makes the function, defined in context, capture the variables at
+        # captures there: a FUNC or LAMBDA keeps only the values its body
+        # uses, not the frames of the calls it was defined in
+        self.context = context.definition_context()
+        if captures:
+            frame, closure = context.frame, context.closure
+            self.closure = tuple(
+                frame[index] if kind in (LOCAL, LOCAL_CELL) else closure[index] for kind, index in captures
+            )
+        self.cell_slots = cell_slots
+        self.prefill = prefill
+        return self
+
+    def fill_frame(self, frame):
+        # A local the body reads before assigning it is the variable of the
+        # same name in an enclosing body until then
+        closure = self.closure
+        for slot, index, is_cell in self.prefill:
+            value = closure[index]
+            frame[slot] = value.value if is_cell else value
+
+    def make_cells(self, frame):
+        # Locals that closures capture and that are assigned live in Cells
+        for slot in self.cell_slots:
+            frame[slot] = Cell(frame[slot])
+
+    def copy_closure(self, copy):
+        copy.closure = self.closure
+        copy.cell_slots = self.cell_slots
+        copy.prefill = self.prefill
+        return copy
 
     def execute(self, args):
+        governor = governed.current
+        if governor is None:
+            return self.run_calls(args, None)
+
+        governor.depth += 1
+        try:
+            return self.run_calls(args, governor)
+        finally:
+            governor.depth -= 1
+
+    def run_calls(self, args, governor):
         res = RTResult()
-        interpreter = Interpreter()
-        new_context = Context(self.name, self.context, self.pos_start)
-        new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+        func = self
+        pending = None  # (memo, key) pairs waiting for the final value
+
+        # Calls in tail position come back as a TailCall instead of growing
+        # the Python stack; keep running them here until a value comes back.
+        while True:
+            memo = func.memo
+            if memo is not None:
+                key = memo_key(args)
+                if key is not None:
+                    memo.validate(SymbolTable.generation)
+                    value = memo.get(key)
+                    if value is not None: break
+                    pending = add_pending(pending, memo, key)
+
+            new_context, error = func.make_context(args)
+            if error: return res.failure(error)
+
+            if governor is not None:
+                error = governor.check_call(func, new_context)
+                if error: return res.failure(error)
+
+            try:
+                if func.body_code:
+                    value, error = func.body_code(new_context)
+                    if error: return res.failure(error)
+                else:
+                    value = res.register(body_interpreter().visit(func.body_node, new_context))
+                    if res.error: return res
+            except RecursionError:
+                # The Python stack ran out before the depth limit
+                return res.failure(recursion_error(func, new_context))
+
+            if type(value) is not TailCall: break
+
+            func, args = value.func, value.args
+
+        if pending:
+            for memo, key in pending:
+                memo.put(key, value)
+
+        return res.success(value)
+
+
+def add_pending(pending, memo, key):
+    # A long chain of tail calls would only fill the caches with entries the
+    # LRU evicts again, so only the most recent ones are kept
+    if pending is None:
+        pending = []
+    pending.append((memo, key))
+    if len(pending) > MEMO_SIZE:
+        del pending[0]
+    return pending
+
+
+def memo_key(args):
+    # Memo caches are keyed on argument values, with the type so that 1 and
+    # 1.0 stay apart; calls passing anything but numbers are not cached
+    key = []
+    for arg in args:
+        if type(arg) is not Number:
+            return None
+        key.append((type(arg.value), arg.value))
+    return tuple(key)
+
+
+class Function(BaseFunction):
+    def __init__(self, name, body_node, arg_names, body_code=None, frame_size=None):
+        super().__init__(body_node, body_code, len(arg_names) if frame_size is None else frame_size)
+        self.name = name or "<anonymous>"
+        self.arg_names = arg_names
+
+    def make_context(self, args):
+        new_context = Context(self.name, self.context, self.pos_start, self.source)
 
         if len(args) > len(self.arg_names):
-            return res.failure(RTError(
+            return None, RTError(
                 self.pos_start, self.pos_end,
                 f"{len(args) - len(self.arg_names)} too many args passed into '{self.name}'",
                 self.context
-            ))
+            ).set_source(self.source)
 
         if len(args) < len(self.arg_names):
-            return res.failure(RTError(
+            return None, RTError(
                 self.pos_start, self.pos_end,
                 f"{len(self.arg_names) - len(args)} too few args passed into '{self.name}'",
                 self.context
-            ))
-
-        for i in range(len(args)):
-            arg_name = self.arg_names[i]
-            arg_value = args[i]
-            arg_value.set_context(new_context)
-            new_context.symbol_table.set(arg_name, arg_value)
-
-        value = res.register(interpreter.visit(self.body_node, new_context))
-        if res.error: return res
-        return res.success(value)
+            ).set_source(self.source)
+
+        frame = new_context.frame = [None] * self.frame_size
+        frame[:len(args)] = args
+        new_context.closure = self.closure
+        if self.prefill:
+            self.fill_frame(frame)
+        if self.cell_slots:
+            self.make_cells(frame)
+
+        return new_context, None
+
+    def enable_memo(self, free_names):
+        # Give the function a result cache if its body is pure: free_names
+        # (from FuncDefNode) is None for bodies that assign or define
+        # anything, and every other name read must be a pure global function
+        if free_names is None or MEMO_SIZE <= 0 or self.closure:
+            return self
+
+        for name in free_names:
+            value = self.context.symbol_table.get(name)
+            if not isinstance(value, Function) or value.memo is None:
+                return self
+
+        self.memo = LRUCache(MEMO_SIZE)
+        return self
 
     def copy(self):
-        copy = Function(self.name, self.body_node, self.arg_names)
+        copy = Function(self.name, self.body_node, self.arg_names, self.body_code, self.frame_size)
         copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
+        copy.set_pos(self.pos_start, self.pos_end, self.source)
+        copy.memo = self.memo
+        return self.copy_closure(copy)
 
     def __repr__(self):
         return f"<function {self.name}>"
 
 
-class Lambda(Value):
-    def __init__(self, param_names, body_node):
-        super().__init__()
+class Lambda(BaseFunction):
+    def __init__(self, param_names, body_node, body_code=None, frame_size=None):
+        super().__init__(body_node, body_code, len(param_names) if frame_size is None else frame_size)
         self.param_names = param_names
-        self.body_node = body_node
 
-    def execute(self, arg_values):
-        res = RTResult()
-        interpreter = Interpreter()
-        new_context = Context("<lambda>", self.context, self.pos_start)
-        new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+    def make_context(self, arg_values):
+        new_context = Context("<lambda>", self.context, self.pos_start, self.source)
 
         # Set the lambda parameters to the argument values
-        for param_name, arg_value in zip(self.param_names, arg_values):
-            new_context.symbol_table.set(param_name, arg_value)
+        frame = new_context.frame = [None] * self.frame_size
+        frame[:len(arg_values)] = arg_values
+        new_context.closure = self.closure
+        if self.prefill:
+            self.fill_frame(frame)
+        if self.cell_slots:
+            self.make_cells(frame)
 
-        # Evaluate the body of the lambda expression
-        value = res.register(interpreter.visit(self.body_node, new_context))
-        if res.error: return res
-        return res.success(value)
+        return new_context, None
 
     def copy(self):
-        copy = Lambda(self.param_names, self.body_node)
+        copy = Lambda(self.param_names, self.body_node, self.body_code, self.frame_size)
         copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
+        copy.set_pos(self.pos_start, self.pos_end, self.source)
+        return self.copy_closure(copy)
 
     def __repr__(self):
         return f"<lambda {' '.join(self.param_names)}>"
 
 
+class BuiltInFunction(Function):
+    # A FUNC written in Python. method is given the argument values and
+    # returns (value, None), or (None, details) for an RTError at the call.
+    # Its body_code reads the arguments from the call's frame, so the
+    # engines call it like any other FUNC.
+    def __init__(self, name, arg_names, method):
+        super().__init__(name, None, arg_names)
+        self.method = method
+        self.body_code = self.run_method
+
+    def run_method(self, context):
+        value, details = self.method(context.frame)
+        if details is not None:
+            return None, RTError(self.pos_start, self.pos_end, details, context).set_source(self.source)
+        return value, None
+
+    def copy(self):
+        copy = BuiltInFunction(self.name, self.arg_names, self.method)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end, self.source)
+        return copy
+
+    def __repr__(self):
+        return f"<built-in function {self.name}>"
+
+
+def powmod(args):
+    # POWMOD(base, exponent, modulus): base ^ exponent % modulus without
+    # ever holding base ^ exponent, for big integers; a negative exponent
+    # takes the modular inverse of base
+    for arg in args:
+        if type(arg) is not Number or type(arg.value) is not int:
+            return None, "POWMOD takes integers"
+
+    base, exponent, modulus = (arg.value for arg in args)
+    if modulus == 0:
+        return None, "POWMOD modulus is zero"
+
+    try:
+        return make_number(pow(base, exponent, modulus)), None
+    except ValueError:
+        return None, "POWMOD base has no inverse for the modulus"
+
+
 #######################################
 # CONTEXT
 #######################################
 
 class Context:
-    def __init__(self, display_name, parent=None, parent_entry_pos=None):
+    def __init__(self, display_name, parent=None, parent_entry_pos=None, parent_entry_source=None):
         self.display_name = display_name
         self.parent = parent
         self.parent_entry_pos = parent_entry_pos
-        self.symbol_table = SymbolTable(parent)  # Ensure SymbolTable is assigned
+        self.parent_entry_source = parent_entry_source
+        # The text the code run in this context comes from
+        self.source = parent.source if parent else None
+        # Globals are shared with the defining context; the locals of a
+        # FUNC or LAMBDA call live in frame, the outer variables its body
+        # uses in closure (see PartA/Resolver.py)
+        self.symbol_table = parent.symbol_table if parent else None
+        self.frame = None
+        self.closure = None  # the closure of the function called, for FREE addresses
+        self.definition = None  # see definition_context()
+
+    def lookup(self, address, name):
+        # Value of a variable the Resolver addressed as (kind, index); a
+        # variable that was not assigned yet falls back to the global of
+        # that name
+        kind, index = address
+        if kind == LOCAL:
+            value = self.frame[index]
+        elif kind == FREE:
+            value = self.closure[index]
+        elif kind == LOCAL_CELL:
+            value = self.frame[index].value
+        else:
+            value = self.closure[index].value
+
+        if value is None:
+            return self.symbol_table.get(name)
+        return value
+
+    def store(self, address, value):
+        # Assigns a local the Resolver addressed as (LOCAL or LOCAL_CELL, slot)
+        if address[0] == LOCAL:
+            self.frame[address[1]] = value
+        else:
+            self.frame[address[1]].value = value
+
+    def definition_context(self):
+        # The context the functions defined here keep, for their tracebacks
+        # and globals: this one without its frame, which they do not need
+        if self.frame is None:
+            return self
+        if self.definition is None:
+            definition = self.definition = Context(
+                self.display_name, self.parent, self.parent_entry_pos, self.parent_entry_source
+            )
+            definition.source = self.source
+            definition.symbol_table = self.symbol_table
+        return self.definition
+
+
+class Cell:
+    # Holds a local that closures capture and that is assigned, so that they
+    # see the value it has when they run, not the one it had when they
+    # were made (as a named FUNC calling itself needs)
+    def __init__(self, value=None):
+        self.value = value
+
+    def __repr__(self):
+        return f'<cell {self.value}>'
 
 
 #######################################
@@ -532,9 +993,15 @@ class Context:
 #######################################
 
 class SymbolTable:
+    # Bumped whenever an existing binding is replaced or removed, which
+    # invalidates the memo caches of pure functions. Taken from a counter,
+    # since tables of different threads may bump it at the same time
+    generation = 0
+
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
+        self.frozen = False  # set by freeze(), after which the table never changes
 
     def get(self, name):
         value = self.symbols.get(name, None)
@@ -543,14 +1010,170 @@ class SymbolTable:
         return value
 
     def set(self, name, value):
+        if self.frozen:
+            raise Exception(f"Cannot set '{name}' in a frozen SymbolTable")
+        # Replacing a binding, or hiding one of a parent table, may change
+        # what a pure function reads
+        if name in self.symbols or (self.parent and self.parent.get(name) is not None):
+            SymbolTable.generation = next(generations)
         self.symbols[name] = value
 
     def remove(self, name):
+        if self.frozen:
+            raise Exception(f"Cannot remove '{name}' from a frozen SymbolTable")
+        SymbolTable.generation = next(generations)
         del self.symbols[name]
 
+    def freeze(self):
+        self.frozen = True
+        return self
+
+
+generations = itertools.count(1)
+
+
+#######################################
+# ENVIRONMENT
+#######################################
+
+# The globals of one line of evaluations: a SymbolTable of its own over
+# frozen ones that any number of environments share, such as a prelude of
+# FUNC definitions. Nothing is copied: a new environment is one empty
+# table, and a snapshot freezes the current table and goes on in a new
+# one on top of it, so it and fork() are O(1) as well. Functions keep the
+# table they were defined in, so those defined before a snapshot read the
+# globals of that frozen table, as a prelude's functions do. An
+# environment runs one evaluation at a time.
+#
+#     env = Environment()
+#     Runner.run('<prelude>', 'FUNC sq(x) -> x * x', symbol_table=env.symbol_table)
+#     prelude = env.snapshot()
+#     for text in requests:
+#         Runner.run('<request>', text, symbol_table=Environment(prelude).symbol_table)
+
+class Environment:
+    def __init__(self, base=None):
+        # base is read, never changed: a snapshot, or global_symbol_table
+        # with the built-ins by default
+        self.symbol_table = SymbolTable(global_symbol_table if base is None else base)
+
+    def snapshot(self):
+        # A frozen SymbolTable with the globals as they are now
+        table = self.symbol_table
+        if not table.symbols and table.parent is not None and table.parent.frozen:
+            return table.parent  # nothing defined since the last snapshot
+
+        table.freeze()
+        if frozen_layers(table) > MAX_LAYERS:
+            table = merge_layers(table)
+        self.symbol_table = SymbolTable(table)
+        return table
+
+    def fork(self):
+        # A new environment with the globals this one has now; neither sees
+        # what the other defines afterwards
+        return Environment(self.snapshot())
+
+    def __repr__(self):
+        return f'<environment over {frozen_layers(self.symbol_table.parent)} frozen tables>'
+
+
+def frozen_layers(table):
+    layers = 0
+    while table is not None and table.frozen:
+        layers += 1
+        table = table.parent
+    return layers
+
+
+def merge_layers(table):
+    # One frozen table with the bindings of table and its frozen parents,
+    # so that a long line of snapshots does not slow every global lookup
+    layers = []
+    while table is not None and table.frozen:
+        layers.append(table)
+        table = table.parent
+
+    merged = SymbolTable(table)
+    for layer in reversed(layers):
+        merged.symbols.update(layer.symbols)
+    return merged.freeze()
+
 
 #######################################
-# RUN
+# GOVERNOR
+#######################################
+
+# The limits of one run: how many FUNC and LAMBDA calls it may make (steps),
+# how deeply they may nest, and for how long it may run. RPEL has no loops,
+# so any long evaluation is made of calls, and the limits are only checked
+# on calls; the clock only every CLOCK_EVERY of them. Going over a limit is
+# an RTError like any other. run() starts the governor it is given (by
+# default one with the limits above) and makes it the current one of the
+# thread until it returns.
+
+class Governor:
+    def __init__(self, max_steps=None, max_depth=None, time_limit=None):
+        self.max_steps = (MAX_STEPS if max_steps is None else max_steps) or None
+        self.max_depth = MAX_DEPTH if max_depth is None else max_depth
+        self.time_limit = TIME_LIMIT if time_limit is None else time_limit
+        self.steps = 0
+        self.depth = 0
+        self.deadline = None
+        self.next_check = 0  # steps at which check() runs next
+
+    def start(self):
+        self.steps = 0
+        self.depth = 0
+        self.deadline = time.monotonic() + self.time_limit if self.time_limit else None
+        self.next_check = self.checkpoint()
+        return self
+
+    def checkpoint(self):
+        next_check = self.steps + CLOCK_EVERY
+        if self.max_steps is not None:
+            next_check = min(next_check, self.max_steps + 1)
+        return next_check
+
+    def check_call(self, func, context):
+        # Counts a call about to run in context; returns an RTError if it
+        # goes over a limit
+        self.steps += 1
+        if self.depth > self.max_depth:
+            return limit_error(func, context, f"Maximum recursion depth of {self.max_depth} calls exceeded")
+        if self.steps >= self.next_check:
+            return self.check(func, context)
+        return None
+
+    def check(self, func, context):
+        if self.max_steps is not None and self.steps > self.max_steps:
+            return limit_error(func, context, f"Step limit of {self.max_steps} calls exceeded")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            return limit_error(func, context, f"Time limit of {self.time_limit:g} s exceeded")
+        self.next_check = self.checkpoint()
+        return None
+
+    def __repr__(self):
+        return f'<governor steps={self.steps} depth={self.depth}>'
+
+
+class Governed(threading.local):
+    current = None  # the Governor of the run going on in this thread
+
+
+governed = Governed()
+
+
+def limit_error(func, context, details):
+    return RTError(func.pos_start, func.pos_end, details, context).set_source(func.source)
+
+
+def recursion_error(func, context):
+    return limit_error(func, context, "Maximum recursion depth exceeded")
+
+
+#######################################
+# GLOBALS
 #######################################
 
 global_symbol_table = SymbolTable()
@@ -558,22 +1181,53 @@ global_symbol_table.set("NULL", Number(0))
 global_symbol_table.set("FALSE", Number(0))
 global_symbol_table.set("TRUE", Number(1))
 
+# Built-ins are defined at the top level, like the FUNCs of a program, so
+# their tracebacks start from the program that called them
+builtin_context = Context('<program>')
+builtin_context.symbol_table = global_symbol_table
 
-def run(fn, text):
-    # Generate tokens
-    lexer = Lexer(fn, text)
-    tokens, error = lexer.make_tokens()
-    if error: return None, error
+global_symbol_table.set(
+    "POWMOD", BuiltInFunction("POWMOD", ['base', 'exponent', 'modulus'], powmod).set_context(builtin_context)
+)
 
-    # Generate AST
-    parser = Parser(tokens)
-    ast = parser.parse()
-    if ast.error: return None, ast.error
 
-    # Run program
-    interpreter = Interpreter()
-    context = Context('<program>')
-    context.symbol_table = global_symbol_table
-    result = interpreter.visit(ast.node, context)
+#######################################
+# LAZY NAMES
+#######################################
 
-    return result.value, result.error
+# Names basic offered when it imported the whole pipeline, now loaded from
+# their modules the first time they are used: importing basic loads no
+# lexer, parser or engine, and running the interpreter never loads the
+# compilers.
+LAZY_NAMES = {
+    'ParsedProgram': 'PartA.Runner',
+    'PARSE_CACHE_SIZE': 'PartA.Runner',
+    'parse_cache': 'PartA.Runner',
+    'parse': 'PartA.Runner',
+    'compile_program': 'PartA.Runner',
+    'run': 'PartA.Runner',
+    'run_program': 'PartA.Runner',
+    'Token': 'PartA.Lexen',
+    'KEYWORDS': 'PartA.Lexen',
+    'Lexer': 'PartA.Lexen',
+    'ParseResult': 'PartA.Parser',
+    'Parser': 'PartA.Parser',
+    'Interpreter': 'PartA.Interpreter',
+    'BINARY_OPERATIONS': 'PartA.Interpreter',
+    'Optimizer': 'PartA.Optimizer',
+    'Compiler': 'PartA.Compiler',
+    'BytecodeCompiler': 'PartA.VM',
+    'binop_chain': 'PartA.Analysis',
+}
+
+
+def __getattr__(name):
+    module_name = LAZY_NAMES.get(name)
+    if module_name is None and name.startswith('TT_'):
+        module_name = 'PartA.Lexen'
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # later lookups find it without coming here
+    return value
@@ -0,0 +1,14 @@
+import contextlib
+
+from PartA import basic
+
+
+@contextlib.contextmanager
+def scratch_globals():
+    # The globals a test defines are gone again afterwards
+    saved = dict(basic.global_symbol_table.symbols)
+    try:
+        yield
+    finally:
+        basic.global_symbol_table.symbols.clear()
+        basic.global_symbol_table.symbols.update(saved)
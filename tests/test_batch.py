@@ -0,0 +1,122 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from PartA import basic, MainRPEL
+from PartA.ScriptCache import ScriptCache, cache_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """VAR a = 1
+
+FUNC f(x) -> 10 / x
+
+
+a +
+f(0)
+FUNC g(x) -> 1 + f(x)
+g(0)
+"""
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'script.rpel')
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(SCRIPT)
+        self.saved_symbols = dict(basic.global_symbol_table.symbols)
+
+    def tearDown(self):
+        basic.global_symbol_table.symbols = self.saved_symbols
+        shutil.rmtree(self.directory)
+
+    def run_script(self, **kwargs):
+        basic.global_symbol_table.symbols = dict(self.saved_symbols)
+        out = io.StringIO()
+        with open(self.path, encoding='utf-8') as file:
+            result = MainRPEL.run_batch(file, out, self.path, **kwargs)
+        return result, out.getvalue()
+
+    def check_lines(self, output):
+        # Errors name the line of the script they are on, not line 1
+        self.assertIn(f'File {self.path}, line 6\n', output)
+        self.assertIn(f'File {self.path}, line 7, in <program>\n', output)
+        self.assertIn(f'File {self.path}, line 3, in f\n', output)
+        self.assertIn(f'File {self.path}, line 8, in <program>\n', output)
+        self.assertNotIn('line 1,', output)
+
+    def test_reads_non_blank_lines(self):
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual([line_no for line_no, text in MainRPEL.read_commands(file)], [1, 3, 6, 7, 8, 9])
+
+    def test_results(self):
+        (count, errors, seconds), output = self.run_script(timing=False)
+        self.assertEqual((count, errors), (6, 3))
+        self.assertTrue(output.startswith('1\n<function f>\n'))
+        self.assertIn('Division by zero', output)
+
+    def test_timing(self):
+        (count, errors, seconds), output = self.run_script()
+        self.assertTrue(output.startswith('[line 1, '))
+        self.assertIn('\n[line 3, ', output)
+
+    def test_error_lines(self):
+        self.check_lines(self.run_script(timing=False)[1])
+
+    def test_error_lines_from_the_script_cache(self):
+        outputs = []
+        for run in range(2):
+            script_cache = ScriptCache(self.path, self.path)
+            try:
+                outputs.append(self.run_script(timing=False, script_cache=script_cache)[1])
+                script_cache.save()
+            finally:
+                script_cache.close()
+            self.assertTrue(os.path.exists(cache_path(self.path)))
+        self.assertEqual(outputs[0], outputs[1])
+        self.check_lines(outputs[1])
+
+    def test_error_lines_in_parallel(self):
+        (count, errors, seconds), output = self.run_script(timing=False, jobs=2)
+        self.assertEqual((count, errors), (6, 3))
+        self.check_lines(output)
+
+    def test_command_line(self):
+        out_path = os.path.join(self.directory, 'out.txt')
+        for engine in ('interpreter', 'compiler', 'vm'):
+            with self.subTest(engine=engine):
+                batch = subprocess.run(
+                    [sys.executable, '-m', 'PartA.MainRPEL', self.path, '-o', out_path, '-e', engine, '--no-timing'],
+                    capture_output=True, text=True, cwd=ROOT, timeout=60
+                )
+                self.assertEqual(batch.returncode, 1)
+                self.assertIn('6 commands, 3 errors', batch.stderr)
+                with open(out_path, encoding='utf-8') as file:
+                    self.assertTrue(file.read().startswith('1\n<function f>\n'))
+
+    def test_missing_files(self):
+        missing = os.path.join(self.directory, 'missing.rpel')
+        for argv, message in (([missing], f'Cannot read {missing}: '),
+                              ([self.path, '-o', os.path.join(missing, 'out.txt')], 'Cannot write ')):
+            with self.subTest(argv=argv):
+                batch = subprocess.run([sys.executable, '-m', 'PartA.MainRPEL'] + argv,
+                                       capture_output=True, text=True, cwd=ROOT, timeout=60)
+                self.assertEqual(batch.returncode, 2)
+                self.assertTrue(batch.stderr.startswith(message), batch.stderr)
+                self.assertEqual(len(batch.stderr.splitlines()), 1)
+
+    def test_stdin(self):
+        batch = subprocess.run(
+            [sys.executable, '-m', 'PartA.MainRPEL', '-', '--no-timing'], input='VAR b = 2\nb * 21\n',
+            capture_output=True, text=True, cwd=ROOT, timeout=60
+        )
+        self.assertEqual((batch.returncode, batch.stdout), (0, '2\n42\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
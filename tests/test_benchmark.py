@@ -0,0 +1,43 @@
+import io
+import unittest
+
+import Benchmark
+from PartA import basic
+from tests.support import scratch_globals
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_rows_define_functions_with_their_engine(self):
+        # The interpreter leaves body_code unset; the compilers fill it in
+        with scratch_globals():
+            Benchmark.run_warm('fib(5)', 'interpreter')
+            self.assertIsNone(basic.global_symbol_table.get('fib').body_code)
+            for engine in ('compiler', 'vm', 'lazy'):
+                Benchmark.run_warm('fib(5)', engine)
+                self.assertIsNotNone(basic.global_symbol_table.get('fib').body_code, engine)
+            Benchmark.interpret('fib(5)')
+            self.assertIsNone(basic.global_symbol_table.get('fib').body_code)
+
+    def test_quick_run(self):
+        benchmarks = [benchmark for benchmark in Benchmark.BENCHMARKS if benchmark.group == 'run']
+        with scratch_globals():
+            report = Benchmark.run_benchmarks(benchmarks, quick=True, repeat=1, min_time=0.001, out=io.StringIO())
+        self.assertEqual(len(report['results']), sum(len(benchmark.quick_params) for benchmark in benchmarks))
+        self.assertEqual(set(report['scaling']), {f'run.{benchmark.name}' for benchmark in benchmarks})
+
+    def test_scaling_exponent(self):
+        self.assertAlmostEqual(Benchmark.scaling_exponent([(10, 1.0), (100, 10.0), (1000, 100.0)]), 1.0)
+        self.assertAlmostEqual(Benchmark.scaling_exponent([(10, 1.0), (100, 100.0)]), 2.0)
+        self.assertIsNone(Benchmark.scaling_exponent([(10, 1.0)]))
+
+    def test_compare_flags_regressions(self):
+        def report(seconds):
+            return {'results': [{'benchmark': 'run.fib', 'param_name': 'n', 'param': n, 'seconds': s}
+                                for n, s in zip((12, 16), seconds)]}
+
+        regressions = Benchmark.compare(report([1.0, 2.0]), report([1.0, 1.0]), 0.25, out=io.StringIO())
+        self.assertEqual(regressions, [('run.fib', 16, 2.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
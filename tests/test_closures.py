@@ -0,0 +1,70 @@
+import unittest
+
+from PartA import basic, Runner
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+
+class ClosureTest(unittest.TestCase):
+    def run_lines(self, lines, engine):
+        with scratch_globals():
+            for text in lines:
+                value, error = Runner.run('<test>', text, engine)
+        return value, error
+
+    def test_captures_only_free_variables(self):
+        program, error = Runner.parse('<test>', 'FUNC nest(a, b) -> LAMBDA c . LAMBDA d . a + d')
+        outer = program.node.body_node
+        self.assertEqual(outer.captures, ((basic.LOCAL, 0),))
+        self.assertEqual(outer.body_node.captures, ((basic.FREE, 0),))
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                value, error = self.run_lines(['FUNC mk(a, b, c) -> LAMBDA x . x + b', 'mk(1, 2, 3)'], engine)
+                self.assertEqual([arg.value for arg in value.closure], [2])
+
+    def test_closures_keep_their_own_values(self):
+        lines = ['FUNC adder(n) -> LAMBDA x . x + n', 'VAR a1 = adder(1)', 'VAR a2 = adder(2)', 'a1(10) + a2(10)']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(repr(self.run_lines(lines, engine)[0]), '23')
+
+    def test_nested_closures(self):
+        lines = ['FUNC nest(a) -> LAMBDA b . LAMBDA c . a * 100 + b * 10 + c', 'VAR h = (nest(1))(2)', 'h(3)']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(repr(self.run_lines(lines, engine)[0]), '123')
+
+    def test_assigned_captures_share_a_cell(self):
+        # get reads n after the body assigns it
+        text = 'FUNC late(n) -> (FUNC get(u) -> n)(0) * 0 + (VAR n = n + 10) + get(0)'
+        program, error = Runner.parse('<test>', text)
+        self.assertEqual(program.node.cell_slots, (0,))
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(repr(self.run_lines([text, 'late(1)'], engine)[0]), '22')
+
+    def test_captured_variable_of_no_value(self):
+        # IF 0 THEN 1 has no value, so p is unset and reads the global p
+        for lines, expected in (
+            (['(LAMBDA p . (LAMBDA q . p)(4))(IF 0 THEN 1)'], "'p' is not defined"),
+            (['(LAMBDA p . (LAMBDA q . (LAMBDA r . p)(1))(4))(IF 0 THEN 1)'], "'p' is not defined"),
+            (['FUNC f(p) -> (LAMBDA q . p)(0)', 'f(IF 0 THEN 1)'], "'p' is not defined"),
+            (['VAR p = 7', 'FUNC f(p) -> (LAMBDA q . p + 1)(0)', 'f(IF 0 THEN 1)'], '8'),
+        ):
+            for engine in ENGINES:
+                with self.subTest(program=lines[-1], engine=engine):
+                    value, error = self.run_lines(lines, engine)
+                    self.assertEqual(error.details if error else repr(value), expected)
+
+    def test_closure_outlives_its_call(self):
+        lines = ['FUNC compose(f, g) -> LAMBDA x . f(g(x))', 'VAR inc_twice = compose(LAMBDA x . x + 1, LAMBDA x . x + 1)',
+                 'inc_twice(inc_twice(0))']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(repr(self.run_lines(lines, engine)[0]), '4')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from PartA import basic
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+# Programs, one command per line, with the output of their last command in
+# every engine: the value as the REPL prints it, or the error details
+PROGRAMS = [
+    (['(3+4)%(2-1)'], '0'),
+    (['10 == 10 && 2 == 3'], '0'),
+    (['10 != 10 || 10 != 2'], '1'),
+    (['1 + 2 * 3 - 4 / 8'], '6.5'),
+    (['-2 ^ 2', '2 ^ -1'], '0.5'),
+    (['(NOT 0) + (NOT 1)'], '1'),
+    (['FUNC add(a, b) -> a + b', 'add(5, 10)'], '15'),
+    (['FUNC factorial(n) -> IF n == 0 THEN 1 ELSE n * factorial(n - 1)', 'factorial(20)'], '2432902008176640000'),
+    (['FUNC fib(n) -> IF n < 2 THEN n ELSE fib(n - 1) + fib(n - 2)', 'fib(20)'], '6765'),
+    (['((LAMBDA x . x + 1)(10))'], '11'),
+    (['((LAMBDA x, y, z . x + y * z)(1, 2, 3))'], '7'),
+    (['(LAMBDA x . x * x )(4)'], '16'),
+    (['VAR a = 5', 'VAR b = a * 2', 'a + b'], '15'),
+    (['VAR a = 1', 'VAR a = a + 1', 'a'], '2'),
+    (['IF 0 THEN 1 ELIF 0 THEN 2 ELSE 3'], '3'),
+    (['IF 0 THEN 1'], 'None'),
+    (['FUNC sign(n) -> IF n < 0 THEN -1 ELIF n == 0 THEN 0 ELSE 1', 'sign(-5) + sign(0) * 10 + sign(7) * 100'], '99'),
+    (['FUNC adder(n) -> LAMBDA x . x + n', 'VAR add3 = adder(3)', 'add3(4)'], '7'),
+    (['FUNC compose(f, g) -> LAMBDA x . f(g(x))', '(compose(LAMBDA x . x * 2, LAMBDA x . x + 1))(5)'], '12'),
+    (['FUNC count(n, acc) -> IF n == 0 THEN acc ELSE count(n - 1, acc + 1)', 'count(30000, 0)'], '30000'),
+    (['FUNC even(n) -> IF n == 0 THEN 1 ELSE odd(n - 1)', 'FUNC odd(n) -> IF n == 0 THEN 0 ELSE even(n - 1)',
+      'even(20001)'], '0'),
+    (['FUNC counter(n) -> (VAR c = n) + (LAMBDA u . c)(0) + (VAR c = c + 10) + (LAMBDA u . c)(0)', 'counter(1)'],
+     '24'),
+    (['FUNC outer(x) -> (FUNC inner(y) -> x * y)(x + 1)', 'outer(6)'], '42'),
+    (['POWMOD(3, 200, 1000)'], '1'),
+    (['FUNC f(x) -> x', 'f(1, 2)'], "1 too many args passed into 'f'"),
+    (['FUNC f(x, y) -> x', 'f(1)'], "1 too few args passed into 'f'"),
+    (['(LAMBDA x . x)(1, 2)'], 'Lambdas take exactly 1 arguments'),
+    (['5(1)'], 'Can only call functions or lambdas'),
+    (['undefined_name + 1'], "'undefined_name' is not defined"),
+    (['1 / 0'], 'Division by zero'),
+    (['FUNC g(x) -> 10 % x', 'g(0)'], 'Modulo by zero'),
+    (['1 + (LAMBDA x . x)'], 'Illegal operation'),
+]
+
+
+def run_program(lines, engine, optimize=True):
+    # The output of the last line
+    with scratch_globals():
+        for text in lines:
+            value, error = basic.run('<test>', text, engine, optimize)
+    return error.details if error else repr(value)
+
+
+class EngineParityTest(unittest.TestCase):
+    def test_programs(self):
+        for lines, expected in PROGRAMS:
+            for engine in ENGINES:
+                for optimize in (True, False):
+                    with self.subTest(program=lines[-1], engine=engine, optimize=optimize):
+                        self.assertEqual(run_program(lines, engine, optimize), expected)
+
+    def test_deep_recursion_fails_cleanly(self):
+        # The VM reaches the Governor's depth limit, the engines using the
+        # Python stack may run out of it first
+        lines = ['FUNC deep(n) -> IF n == 0 THEN 0 ELSE 1 + deep(n - 1)', 'deep(20000)']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertTrue(run_program(lines, engine).startswith('Maximum recursion depth'))
+                self.assertEqual(run_program(lines[:1] + ['deep(50)'], engine), '50')
+
+    def test_functions_cross_engines(self):
+        # A function keeps the engine that defined it, whichever engine calls it
+        for define_engine in ENGINES:
+            for call_engine in ENGINES:
+                with self.subTest(defined=define_engine, called=call_engine):
+                    with scratch_globals():
+                        basic.run('<test>', 'FUNC fact(n) -> IF n == 0 THEN 1 ELSE n * fact(n - 1)', define_engine)
+                        basic.run('<test>', 'VAR twice = LAMBDA f, x . f(f(x))', define_engine)
+                        value, error = basic.run('<test>', 'twice(fact, 3)', call_engine)
+                    self.assertEqual(repr(value), '720')
+
+    def test_error_positions_agree(self):
+        texts = ['1 + 2 * (3 / 0)', 'FUNC f(x) -> x + (LAMBDA y . y)', 'f(1)', 'missing(1)']
+        expected = None
+        for engine in ENGINES:
+            errors = []
+            with scratch_globals():
+                for text in texts:
+                    value, error = basic.run('<test>', text, engine)
+                    if error: errors.append(error.as_string())
+            if expected is None:
+                expected = errors
+            self.assertEqual(errors, expected, engine)
+        self.assertEqual(len(expected), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
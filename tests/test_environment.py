@@ -0,0 +1,68 @@
+import unittest
+
+from PartA import basic, Runner
+
+
+class EnvironmentTest(unittest.TestCase):
+    def run_text(self, text, environment):
+        value, error = Runner.run('<test>', text, symbol_table=environment.symbol_table)
+        return error.details if error else repr(value)
+
+    def test_environments_are_isolated(self):
+        first, second = basic.Environment(), basic.Environment()
+        self.run_text('VAR a = 1', first)
+        self.assertEqual(self.run_text('a', second), "'a' is not defined")
+        self.assertIsNone(basic.global_symbol_table.get('a'))
+        self.assertEqual(self.run_text('POWMOD(2, 3, 5)', second), '3')
+
+    def test_snapshot(self):
+        prelude_env = basic.Environment()
+        self.run_text('VAR ten = 10', prelude_env)
+        self.run_text('FUNC tens(x) -> x * ten', prelude_env)
+        prelude = prelude_env.snapshot()
+        self.assertTrue(prelude.frozen)
+
+        # Requests over the prelude see it; what one defines, the others do not
+        request = basic.Environment(prelude)
+        self.run_text('VAR ten = 1', request)
+        self.assertEqual(self.run_text('ten', request), '1')
+        self.assertEqual(self.run_text('tens(2)', request), '20')
+        self.assertEqual(self.run_text('ten', basic.Environment(prelude)), '10')
+
+        # The environment goes on after its snapshot without changing it
+        self.run_text('VAR ten = 2', prelude_env)
+        self.assertEqual(prelude.get('ten').value, 10)
+
+    def test_fork(self):
+        env = basic.Environment()
+        self.run_text('VAR a = 1', env)
+        fork = env.fork()
+        self.run_text('VAR a = 2', env)
+        self.run_text('VAR b = 3', fork)
+        self.assertEqual((self.run_text('a', env), self.run_text('a', fork)), ('2', '1'))
+        self.assertEqual(self.run_text('b', env), "'b' is not defined")
+
+    def test_snapshot_without_changes_is_the_same_table(self):
+        env = basic.Environment()
+        self.run_text('VAR a = 1', env)
+        self.assertIs(env.snapshot(), env.snapshot())
+
+    def test_frozen_table_cannot_change(self):
+        table = basic.SymbolTable().freeze()
+        with self.assertRaises(Exception):
+            table.set('a', basic.Number(1))
+        with self.assertRaises(Exception):
+            table.remove('a')
+
+    def test_layers_are_merged(self):
+        env = basic.Environment()
+        for n in range(basic.MAX_LAYERS * 3):
+            self.run_text(f'VAR v{n} = {n}', env)
+            snapshot = env.snapshot()
+            self.assertLessEqual(basic.frozen_layers(snapshot), basic.MAX_LAYERS)
+        self.assertEqual(self.run_text('v0 + v23', env), '23')
+        self.assertEqual(snapshot.get('v0').value, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
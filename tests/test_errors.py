@@ -0,0 +1,65 @@
+import unittest
+
+from PartA import basic
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+
+class ErrorPositionTest(unittest.TestCase):
+    def error_of(self, text, engine):
+        with scratch_globals():
+            value, error = basic.run('<test>', text, engine=engine, optimize=False)
+        return error
+
+    def test_division_by_zero_points_at_the_divisor(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                error = self.error_of('1 + 2 / (3 - 3)', engine)
+                self.assertEqual(error.details, 'Division by zero')
+                self.assertTrue(error.in_divisor)
+                self.assertEqual((error.pos_start, error.pos_end), (9, 14))
+
+                error = self.error_of('7 % 0', engine)
+                self.assertEqual(error.details, 'Modulo by zero')
+                self.assertEqual((error.pos_start, error.pos_end), (4, 5))
+
+    def test_other_errors_point_at_the_operation(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                error = self.error_of('1 + (LAMBDA x . x)', engine)
+                self.assertEqual(error.details, 'Illegal operation')
+                self.assertFalse(error.in_divisor)
+                self.assertEqual((error.pos_start, error.pos_end), (0, 18))
+
+    def test_traceback(self):
+        with scratch_globals():
+            basic.run('<test>', 'FUNC f(x) -> 2 % x')
+            value, error = basic.run('<test>', 'f(0)')
+        text = error.as_string()
+        self.assertIn('in f\n', text)
+        self.assertTrue(text.endswith('FUNC f(x) -> 2 % x\n                 ^'))
+
+
+class NumberTest(unittest.TestCase):
+    def test_small_ints_are_shared(self):
+        self.assertIs(basic.make_number(5), basic.make_number(5))
+        self.assertIs(basic.make_number(-128), basic.make_number(-128))
+        self.assertEqual(basic.make_number(5000).value, 5000)
+
+    def test_numbers_do_not_change(self):
+        two = basic.make_number(2)
+        self.assertIs(two.copy(), two)
+        self.assertIs(two.set_pos(None, None), two)
+        result, error = two.added_to(basic.make_number(3))
+        self.assertEqual((two.value, result.value), (2, 5))
+
+    def test_comparisons_give_shared_booleans(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertIs(basic.run('<test>', '2 < 3', engine)[0], basic.Number.true)
+                self.assertIs(basic.run('<test>', 'NOT 1', engine)[0], basic.Number.false)
+
+
+if __name__ == '__main__':
+    unittest.main()
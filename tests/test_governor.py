@@ -0,0 +1,81 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from PartA import basic, MainRPEL
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+
+class GovernorTest(unittest.TestCase):
+    def run_lines(self, lines, engine, governor=None):
+        with scratch_globals():
+            for text in lines:
+                value, error = basic.run('<test>', text, engine=engine, governor=governor)
+        return value, error
+
+    def test_no_default_step_limit_for_library_runs(self):
+        # A loop of more tail calls than the REPL and batch mode allow
+        self.assertIsNone(basic.Governor().max_steps)
+        lines = ['FUNC loop(n, acc) -> IF n == 0 THEN acc ELSE loop(n - 1, acc + n)', 'loop(1000001, 0)']
+        value, error = self.run_lines(lines, 'compiler')
+        self.assertIsNone(error)
+        self.assertEqual(repr(value), str(1000001 * 1000002 // 2))
+
+    def test_runaway_tail_calls_end_with_an_error_in_batch_mode(self):
+        # The default limit, made smaller so that the test is quick
+        with tempfile.TemporaryDirectory() as tmp:
+            script, output = os.path.join(tmp, 'loop.rpel'), os.path.join(tmp, 'out.txt')
+            with open(script, 'w', encoding='utf-8') as file:
+                file.write('FUNC f(n) -> f(n + 1)\nf(0)\n')
+            saved, basic.COMMAND_MAX_STEPS = basic.COMMAND_MAX_STEPS, 5000
+            try:
+                with scratch_globals(), contextlib.redirect_stderr(io.StringIO()):
+                    status = MainRPEL.batch_main(MainRPEL.parse_args([script, '-o', output, '--no-timing']))
+            finally:
+                basic.COMMAND_MAX_STEPS = saved
+            with open(output, encoding='utf-8') as file:
+                self.assertIn('Step limit of 5000 calls exceeded', file.read())
+        self.assertEqual(status, 1)
+
+    def test_zero_steps_is_no_limit(self):
+        governor = basic.Governor(max_steps=0)
+        self.assertIsNone(governor.max_steps)
+        value, error = self.run_lines(['FUNC count(n) -> IF n == 0 THEN 0 ELSE count(n - 1)', 'count(20000)'],
+                                      'interpreter', governor)
+        self.assertIsNone(error)
+
+    def test_step_limit(self):
+        governor = basic.Governor(max_steps=5000)
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                value, error = self.run_lines(['FUNC f(n) -> f(n + 1)', 'f(0)'], engine, governor)
+                self.assertIsInstance(error, basic.RTError)
+                self.assertEqual(error.details, 'Step limit of 5000 calls exceeded')
+
+    def test_steps_start_again_every_run(self):
+        governor = basic.Governor(max_steps=100)
+        lines = ['FUNC count(n) -> IF n == 0 THEN 0 ELSE count(n - 1)', 'count(60)', 'count(60)']
+        value, error = self.run_lines(lines, 'interpreter', governor)
+        self.assertIsNone(error)
+        self.assertEqual(repr(value), '0')
+
+    def test_depth_limit(self):
+        governor = basic.Governor(max_depth=50)
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                value, error = self.run_lines(['FUNC deep(n) -> IF n == 0 THEN 0 ELSE 1 + deep(n - 1)', 'deep(100)'],
+                                              engine, governor)
+                self.assertEqual(error.details, 'Maximum recursion depth of 50 calls exceeded')
+
+    def test_time_limit(self):
+        governor = basic.Governor(max_steps=0, time_limit=0.05)
+        value, error = self.run_lines(['FUNC f(n) -> f(n + 1)', 'f(0)'], 'compiler', governor)
+        self.assertEqual(error.details, 'Time limit of 0.05 s exceeded')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from PartA import basic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ('basic', 'Cache', 'Lexen', 'Parser', 'Resolver', 'Optimizer', 'Analysis', 'Interpreter', 'Runner',
+           'Compiler', 'VM', 'Parallel', 'ScriptCache', 'Profiler')
+
+
+def loaded_after(code):
+    # The PartA modules a fresh interpreter has loaded after running code
+    result = subprocess.run(
+        [sys.executable, '-c', code + '\nimport sys\nprint(sorted(m for m in sys.modules if m.startswith("PartA.")))'],
+        capture_output=True, text=True, cwd=ROOT, timeout=60
+    )
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return set(eval(result.stdout.splitlines()[-1]))
+
+
+class ImportTest(unittest.TestCase):
+    def test_basic_loads_no_engine(self):
+        self.assertEqual(loaded_after('import PartA.basic'), {'PartA.basic', 'PartA.Cache', 'PartA.String_with_arrows'})
+
+    def test_interpreter_runs_without_the_compilers(self):
+        loaded = loaded_after('from PartA import Runner\nRunner.run("<test>", "(LAMBDA x . x + 1)(1)")')
+        self.assertIn('PartA.Interpreter', loaded)
+        self.assertFalse({'PartA.Compiler', 'PartA.VM'} & loaded)
+        self.assertIn('PartA.VM', loaded_after('from PartA import Runner\nRunner.run("<test>", "1", "vm")'))
+
+    def test_repl_loads_no_batch_modules(self):
+        loaded = loaded_after('import PartA.MainRPEL')
+        self.assertIn('PartA.MainRPEL', loaded)
+        self.assertFalse({'PartA.Parallel', 'PartA.ScriptCache', 'PartA.Profiler'} & loaded)
+
+    def test_each_module_imports_first(self):
+        # No module depends on another having been imported before it
+        for name in MODULES:
+            with self.subTest(module=name):
+                self.assertIn(f'PartA.{name}', loaded_after(f'import PartA.{name}'))
+
+    def test_lazy_names_resolve(self):
+        for name, module_name in basic.LAZY_NAMES.items():
+            with self.subTest(name=name):
+                self.assertIs(getattr(basic, name), getattr(sys.modules[module_name], name))
+        self.assertEqual(basic.TT_INT, 'INT')
+        with self.assertRaises(AttributeError):
+            basic.no_such_name
+
+
+if __name__ == '__main__':
+    unittest.main()
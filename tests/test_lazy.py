@@ -0,0 +1,75 @@
+import unittest
+
+from PartA import basic, Runner
+from PartA.Lazy import Thunk, strict_slots
+
+
+class LazyTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+        self.symbol_table.set(
+            'COUNT', basic.BuiltInFunction('COUNT', ['x'], self.count).set_context(basic.builtin_context)
+        )
+
+    def count(self, args):
+        self.calls.append(args[0].value)
+        return args[0], None
+
+    def run_text(self, text, engine='lazy'):
+        value, error = Runner.run('<test>', text, engine, symbol_table=self.symbol_table)
+        return error.details if error else repr(value)
+
+    def test_unused_argument_is_not_evaluated(self):
+        self.run_text('FUNC first(x, y) -> x')
+        self.assertEqual(self.run_text('first(1, 1 / 0)'), '1')
+        self.assertEqual(self.run_text('first(1, COUNT(2))'), '1')
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.run_text('first(1, 1 / 0)', 'interpreter'), 'Division by zero')
+
+    def test_argument_is_evaluated_once(self):
+        self.run_text('FUNC twice(c, x) -> IF c THEN x + x ELSE 0')
+        self.assertEqual(self.run_text('twice(1, COUNT(4))'), '8')
+        self.assertEqual(self.calls, [4])
+        self.assertEqual(self.run_text('twice(0, COUNT(5))'), '0')
+        self.assertEqual(self.calls, [4])
+
+    def test_thunk_passed_on_is_shared(self):
+        self.run_text('FUNC use(x) -> x * x')
+        self.run_text('FUNC pass(c, x) -> IF c THEN use(x) + x ELSE 0')
+        self.assertEqual(self.run_text('pass(1, COUNT(3))'), '12')
+        self.assertEqual(self.calls, [3])
+
+    def test_error_of_a_used_argument(self):
+        self.run_text('FUNC pick(c, x) -> IF c THEN x ELSE 0')
+        self.assertEqual(self.run_text('pick(1, 1 / 0)'), 'Division by zero')
+        self.assertEqual(self.run_text('pick(0, 1 / 0)'), '0')
+
+    def test_lambdas_pass_by_need(self):
+        self.assertEqual(self.run_text('(LAMBDA a, b . a)(7, undefined_name)'), '7')
+
+    def test_strict_slots(self):
+        # Parameters read on every run are evaluated before the call
+        for text, strict in (
+            ('FUNC f(a, b) -> a + b', {0, 1}),
+            ('FUNC f(a, b) -> IF a THEN b ELSE 0', {0}),
+            ('FUNC f(a, b) -> IF a THEN b ELSE b + 1', {0, 1}),
+            ('FUNC f(a, b) -> a && b', {0}),
+            ('FUNC f(a, b) -> g(a, b)', set()),
+        ):
+            with self.subTest(text=text):
+                program, error = Runner.parse('<test>', text)
+                self.assertEqual(strict_slots(program.node.body_node, 2), strict)
+
+    def test_thunk_keeps_its_value(self):
+        program, error = Runner.parse('<test>', 'COUNT(9)')
+        context = basic.Context('<test>')
+        context.symbol_table = self.symbol_table
+        context.source = program.source
+        thunk = Thunk(program.node, context)
+        self.assertEqual([thunk.force()[0].value for n in range(3)], [9, 9, 9])
+        self.assertEqual(self.calls, [9])
+
+
+if __name__ == '__main__':
+    unittest.main()
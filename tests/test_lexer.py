@@ -0,0 +1,48 @@
+import unittest
+
+from PartA import basic
+
+
+def tokens(text):
+    toks, error = basic.Lexer('<test>', text).make_tokens()
+    return [repr(tok) for tok in toks]
+
+
+class LexerTest(unittest.TestCase):
+    def test_tokens(self):
+        self.assertEqual(tokens('VAR x_1 = 3.5 + 12 -> λ != '),
+                         ['KEYWORD:VAR', 'IDENTIFIER:x_1', 'EQ', 'FLOAT:3.5', 'PLUS', 'INT:12', 'ARROW', 'LAMBDA',
+                          'NE', 'EOF'])
+
+    def test_longest_operator_first(self):
+        self.assertEqual(tokens('a<=b==c>=d&&e||f'),
+                         ['IDENTIFIER:a', 'LTE', 'IDENTIFIER:b', 'EE', 'IDENTIFIER:c', 'GTE', 'IDENTIFIER:d', 'AND',
+                          'IDENTIFIER:e', 'OR', 'IDENTIFIER:f', 'EOF'])
+
+    def test_numbers(self):
+        toks, error = basic.Lexer('<test>', '7 7. 0.25').make_tokens()
+        self.assertEqual([(tok.type, tok.value) for tok in toks[:3]],
+                         [(basic.TT_INT, 7), (basic.TT_FLOAT, 7.0), (basic.TT_FLOAT, 0.25)])
+        self.assertIs(type(toks[0].value), int)
+
+    def test_offsets(self):
+        toks, error = basic.Lexer('<test>', 'ab  + 12').make_tokens()
+        self.assertEqual([(tok.pos_start, tok.pos_end) for tok in toks], [(0, 2), (4, 5), (6, 8), (8, 9)])
+        self.assertEqual(toks[-1].type, basic.TT_EOF)
+
+    def test_illegal_character(self):
+        toks, error = basic.Lexer('<test>', '1 $ 2').make_tokens()
+        self.assertEqual(toks, [])
+        self.assertIsInstance(error, basic.IllegalCharError)
+        self.assertEqual((error.pos_start, error.pos_end, error.details), (2, 3, "'$'"))
+
+    def test_expected_character(self):
+        for text, details in (('1 ! 2', "'=' (after '!')"), ('1 & 2', "'&' (after '&')"), ('1 | 2', "'|' (after '|')")):
+            with self.subTest(text=text):
+                toks, error = basic.Lexer('<test>', text).make_tokens()
+                self.assertIsInstance(error, basic.ExpectedCharError)
+                self.assertEqual(error.details, details)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from PartA import basic
+from PartA.Cache import LRUCache
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+
+class MemoTest(unittest.TestCase):
+    def run_text(self, text, engine):
+        value, error = basic.run('<test>', text, engine)
+        self.assertIsNone(error)
+        return repr(value)
+
+    def test_pure_function_is_memoized(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine), scratch_globals():
+                self.run_text('FUNC fib(n) -> IF n < 2 THEN n ELSE fib(n - 1) + fib(n - 2)', engine)
+                # Exponential without the cache
+                self.assertEqual(self.run_text('fib(90)', engine), '2880067194370816120')
+                stats = basic.global_symbol_table.get('fib').memo.stats()
+                self.assertEqual((stats['misses'], stats['hits']), (91, 88))
+
+    def test_function_reading_a_variable_is_not_memoized(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine), scratch_globals():
+                self.run_text('VAR k = 5', engine)
+                self.run_text('FUNC h(x) -> x + k', engine)
+                self.assertIsNone(basic.global_symbol_table.get('h').memo)
+                self.assertEqual(self.run_text('h(1)', engine), '6')
+                self.run_text('VAR k = 6', engine)
+                self.assertEqual(self.run_text('h(1)', engine), '7')
+
+    def test_redefining_a_callee_invalidates(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine), scratch_globals():
+                self.run_text('FUNC g(x) -> x + 1', engine)
+                self.run_text('FUNC f(x) -> g(x)', engine)
+                self.assertIsNotNone(basic.global_symbol_table.get('f').memo)
+                self.assertEqual(self.run_text('f(1)', engine), '2')
+                self.run_text('FUNC g(x) -> x + 2', engine)
+                self.assertEqual(self.run_text('f(1)', engine), '3')
+
+    def test_memo_size_zero_turns_it_off(self):
+        saved, basic.MEMO_SIZE = basic.MEMO_SIZE, 0
+        try:
+            with scratch_globals():
+                self.run_text('FUNC sq(x) -> x * x', 'interpreter')
+                self.assertIsNone(basic.global_symbol_table.get('sq').memo)
+        finally:
+            basic.MEMO_SIZE = saved
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(cache.stats(), {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1, 'evictions': 1})
+
+    def test_resize(self):
+        cache = LRUCache(4)
+        for key in 'abcd':
+            cache.put(key, key)
+        cache.resize(1)
+        self.assertEqual(list(cache.entries), ['d'])
+        cache.resize(0)
+        cache.put('e', 'e')
+        self.assertEqual(len(cache), 0)
+
+    def test_validate_clears_on_new_tag(self):
+        cache = LRUCache()
+        cache.validate(1)
+        cache.put('a', 1)
+        cache.validate(1)
+        self.assertEqual(cache.get('a'), 1)
+        cache.validate(2)
+        self.assertIsNone(cache.get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import decimal
+import os
+import subprocess
+import sys
+import unittest
+
+from PartA import basic, Runner
+from PartA.Parallel import run_command
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TWO_TO_20000 = str(decimal.Decimal(2 ** 20000))
+
+
+class NumberTest(unittest.TestCase):
+    def output(self, text, engine='interpreter'):
+        environment = basic.Environment()
+        value, error = Runner.run('<test>', text, engine, symbol_table=environment.symbol_table)
+        return error.details if error else repr(value)
+
+    def test_arithmetic(self):
+        self.assertEqual(self.output('7 / 2'), '3.5')
+        self.assertEqual(self.output('7 % 3 + 2 * -3'), '-5')
+        self.assertEqual(self.output('2 ^ 10'), '1024')
+        self.assertEqual(self.output('1.5 * 2'), '3.0')
+
+    def test_printing_a_big_int(self):
+        # Past the 4300 digits str() gives an int by default
+        self.assertEqual(len(TWO_TO_20000), 6021)
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(self.output('2 ^ 20000', engine), TWO_TO_20000)
+        self.assertEqual(str(basic.Number(-2 ** 20000)), '-' + TWO_TO_20000)
+
+    def test_big_int_literal(self):
+        self.assertEqual(self.output(TWO_TO_20000 + ' - 2 ^ 20000'), '0')
+
+    def test_batch_prints_a_big_int(self):
+        output, failed, seconds = run_command('<test>', '2 ^ 20000', symbol_table=basic.Environment().symbol_table)
+        self.assertFalse(failed)
+        self.assertEqual(output, TWO_TO_20000)
+
+    def test_repl_prints_a_big_int(self):
+        repl = subprocess.run(
+            [sys.executable, '-m', 'PartA.MainRPEL'], input='2 ^ 20000\nquit\n', capture_output=True, text=True,
+            cwd=ROOT, timeout=60
+        )
+        self.assertEqual(repl.returncode, 0, repl.stderr)
+        self.assertIn(TWO_TO_20000, repl.stdout)
+
+
+class PowerTest(unittest.TestCase):
+    def output(self, text, engine):
+        value, error = Runner.run('<test>', text, engine, symbol_table=basic.Environment().symbol_table)
+        return error.details if error else repr(value)
+
+    def test_powers(self):
+        for text, expected in (
+            ('2 ^ 62', str(2 ** 62)),
+            ('(-2) ^ 3', '-8'),
+            ('4 ^ -1', '0.25'),
+            ('2 ^ 0.5', repr(2 ** 0.5)),
+            ('2 ^ 3 ^ 2', '512'),
+            ('1 ^ 100000000000', '1'),
+            ('(-1) ^ 100000000001', '-1'),
+            ('POWMOD(3, 200, 1000)', '1'),
+            ('POWMOD(3, -1, 7)', '5'),
+        ):
+            for engine in ENGINES:
+                with self.subTest(text=text, engine=engine):
+                    self.assertEqual(self.output(text, engine), expected)
+
+    def test_power_errors(self):
+        for text, expected in (
+            ('0 ^ -1', 'Zero raised to a negative power'),
+            ('(-8) ^ (1 / 3)', 'Negative number raised to a fractional power'),
+            ('2 ^ 2000000', f'Result of ^ would have more than {basic.MAX_POWER_BITS} bits'),
+            ('2.0 ^ 5000', 'Result of ^ is too large'),
+            ('POWMOD(2, 3, 0)', 'POWMOD modulus is zero'),
+            ('POWMOD(2.5, 3, 7)', 'POWMOD takes integers'),
+            ('POWMOD(2, -1, 4)', 'POWMOD base has no inverse for the modulus'),
+        ):
+            for engine in ENGINES:
+                with self.subTest(text=text, engine=engine):
+                    self.assertEqual(self.output(text, engine), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from PartA import basic
+from PartA.Optimizer import Optimizer
+from tests.support import scratch_globals
+
+
+def optimized(text):
+    tokens, error = basic.Lexer('<test>', text).make_tokens()
+    return Optimizer().visit(basic.Parser(tokens).parse().node)
+
+
+class OptimizerTest(unittest.TestCase):
+    def run_text(self, text, optimize=True):
+        with scratch_globals():
+            value, error = basic.run('<test>', text, optimize=optimize)
+        return error.details if error else repr(value)
+
+    def test_folds_literals(self):
+        node = optimized('2 * 3 + 4')
+        self.assertIsInstance(node, basic.NumberNode)
+        self.assertEqual(node.tok.value, 10)
+
+    def test_keeps_failing_folds_for_the_runtime(self):
+        self.assertIsInstance(optimized('1 / 0'), basic.BinOpNode)
+        self.assertEqual(self.run_text('1 / 0'), 'Division by zero')
+
+    def test_drops_dead_branches(self):
+        node = optimized('IF 0 THEN 1 ELIF 1 THEN 2 ELSE 3')
+        self.assertIsInstance(node, basic.NumberNode)
+        self.assertEqual(node.tok.value, 2)
+
+    def test_identities_of_numbers(self):
+        self.assertIsInstance(optimized('(2 * 3 - 1) * 1'), basic.NumberNode)
+        node = optimized('FUNC f(n) -> n * 2 * 1 + 0')
+        self.assertIsInstance(node.body_node, basic.BinOpNode)
+        self.assertEqual(node.body_node.op_tok.type, 'MUL')
+
+    def test_identities_keep_type_errors(self):
+        # x + 0 is no x when x is a function
+        for text in ('(LAMBDA x . x) + 0', '0 + (LAMBDA x . x)', '(LAMBDA x . x) * 1', '1 * (LAMBDA x . x)',
+                     '(LAMBDA x . x) ^ 1', 'FUNC o5(n) -> (VAR f = LAMBDA x . x * n) + 0'):
+            self.assertIsInstance(optimized(text), (basic.BinOpNode, basic.FuncDefNode), text)
+        for text in ('(LAMBDA x . x) + 0', '1 * (LAMBDA x . x)'):
+            self.assertEqual(self.run_text(text), self.run_text(text, optimize=False))
+            self.assertEqual(self.run_text(text), 'Illegal operation')
+
+    def test_same_results_as_unoptimized(self):
+        for text in ('1 + 2 * 3 - 4 / 2', '(LAMBDA x . x * 1 + 0)(5)', 'IF 1 > 2 THEN 1 ELSE 2 * 1',
+                     'NOT 0 + 0'):
+            self.assertEqual(self.run_text(text), self.run_text(text, optimize=False), text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from PartA import basic
+from PartA.Analysis import global_names
+from PartA.Parallel import ParallelBatch, run_command
+from tests.support import scratch_globals
+
+SCRIPT = [
+    'VAR base = 10',
+    'FUNC scale(x) -> x * base',
+    'scale(1) + scale(2)',
+    'FUNC sq(x) -> x * x',
+    'sq(base)',
+    'VAR f = LAMBDA x . x + base',
+    'f(5)',
+    '1 / 0',
+    'undefined_name',
+    'VAR base = 100',
+    'scale(3)',
+    'sq(4) + scale(1)',
+]
+
+
+def names(text):
+    program, error = basic.parse('<test>', text)
+    return global_names(program.node)
+
+
+class GlobalNamesTest(unittest.TestCase):
+    def test_defined_and_read(self):
+        self.assertEqual(names('VAR a = b + 1'), ({'a'}, {'b'}))
+        self.assertEqual(names('FUNC f(x) -> g(x) + y'), ({'f'}, {'g', 'x', 'y'}))
+        self.assertEqual(names('(LAMBDA x . x + z)(1)'), (set(), {'x', 'z'}))
+
+    def test_locals_are_not_defined(self):
+        defined, read = names('FUNC f(x) -> (VAR t = x) + (FUNC g(y) -> y)(t)')
+        self.assertEqual(defined, {'f'})
+
+
+class ParallelBatchTest(unittest.TestCase):
+    def serial(self):
+        outputs = []
+        for line_no, text in enumerate(SCRIPT, 1):
+            output, failed, seconds = run_command('<test>', text, line_no=line_no)
+            outputs.append((line_no, output, failed))
+        return outputs
+
+    def test_same_output_as_serial(self):
+        with scratch_globals():
+            expected = self.serial()
+
+        batch = ParallelBatch('<test>', jobs=2, chunk_size=2)
+        with scratch_globals():
+            outputs = [(line_no, output, failed)
+                       for line_no, output, failed, seconds in batch.run(enumerate(SCRIPT, 1))]
+        self.assertEqual(outputs, expected)
+        self.assertEqual(outputs[10][1], '300')
+        self.assertIn('line 8', outputs[7][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
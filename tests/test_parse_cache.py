@@ -0,0 +1,65 @@
+import unittest
+
+from PartA import basic
+from tests.support import scratch_globals
+
+
+class ParseCacheTest(unittest.TestCase):
+    def setUp(self):
+        basic.parse_cache.clear()
+
+    def test_same_text_is_parsed_once(self):
+        first, error = basic.parse('<test>', '1 + 2 * 3')
+        second, error = basic.parse('<test>', '1 + 2 * 3')
+        self.assertIs(first, second)
+        self.assertEqual(len(basic.parse_cache), 1)
+
+    def test_key_includes_file_name_and_optimize(self):
+        program, error = basic.parse('<a>', '1 + 2')
+        self.assertIsNot(basic.parse('<b>', '1 + 2')[0], program)
+        self.assertIsNot(basic.parse('<a>', '1 + 2', optimize=False)[0], program)
+        self.assertEqual(len(basic.parse_cache), 3)
+
+    def test_errors_name_their_own_file(self):
+        basic.run('<a>', '1 / 0')
+        value, error = basic.run('<b>', '1 / 0')
+        self.assertIn('File <b>, line 1', error.as_string())
+
+    def test_syntax_errors_are_not_cached(self):
+        program, error = basic.parse('<test>', '1 +')
+        self.assertIsNotNone(error)
+        self.assertEqual(len(basic.parse_cache), 0)
+
+    def test_compiled_code_is_kept(self):
+        program, error = basic.parse('<test>', '1 + 2')
+        code = basic.compile_program(program, 'vm')
+        self.assertIs(basic.compile_program(basic.parse('<test>', '1 + 2')[0], 'vm'), code)
+
+    def test_at_line_shares_the_program(self):
+        program, error = basic.parse('<test>', '1 / 0')
+        basic.compile_program(program, 'vm')
+        moved, error = basic.parse('<test>', '1 / 0', first_line=9)
+        self.assertIs(moved.node, program.node)
+        self.assertIs(moved.compiled, program.compiled)
+        self.assertEqual(moved.source.line_number(0), 10)
+        self.assertEqual(program.source.line_number(0), 1)
+
+    def test_resize_to_zero_turns_it_off(self):
+        saved = basic.parse_cache.maxsize
+        basic.parse_cache.resize(0)
+        try:
+            self.assertIsNot(basic.parse('<test>', '1')[0], basic.parse('<test>', '1')[0])
+        finally:
+            basic.parse_cache.resize(saved)
+
+    def test_cached_functions_stay_separate(self):
+        # Each run of a cached FUNC definition makes a new function
+        with scratch_globals():
+            basic.run('<test>', 'FUNC f(x) -> x + 1')
+            first = basic.global_symbol_table.get('f')
+            basic.run('<test>', 'FUNC f(x) -> x + 1')
+            self.assertIsNot(basic.global_symbol_table.get('f'), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
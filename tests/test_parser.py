@@ -0,0 +1,51 @@
+import unittest
+
+from PartA import basic
+from tests.support import scratch_globals
+
+
+def tree(text):
+    program, error = basic.parse('<test>', text, optimize=False)
+    return repr(program.node)
+
+
+class ParserTest(unittest.TestCase):
+    def test_precedence(self):
+        self.assertEqual(tree('1 + 2 * 3'), '(INT:1, PLUS, (INT:2, MUL, INT:3))')
+        self.assertEqual(tree('1 * 2 + 3 < 4'), '(((INT:1, MUL, INT:2), PLUS, INT:3), LT, INT:4)')
+        self.assertEqual(tree('1 < 2 && 3'), '((INT:1, LT, INT:2), AND, INT:3)')
+
+    def test_associativity(self):
+        # The binary operators are left-associative, ^ is right-associative
+        self.assertEqual(tree('1 - 2 - 3'), '((INT:1, MINUS, INT:2), MINUS, INT:3)')
+        self.assertEqual(tree('8 / 4 % 3'), '((INT:8, DIV, INT:4), MODULO, INT:3)')
+        self.assertEqual(tree('4 ^ 3 ^ 2'), '(INT:4, POW, (INT:3, POW, INT:2))')
+
+    def test_operands_of_all_kinds(self):
+        with scratch_globals():
+            value, error = basic.run('<test>', '-2 * (1 + 3) - f(1) + (LAMBDA x . x)(4)')
+            self.assertEqual(error.details, "'f' is not defined")
+            value, error = basic.run('<test>', '-2 * (1 + 3) - 1 + (LAMBDA x . x)(4) + IF 1 THEN 10 ELSE 20')
+            self.assertEqual(repr(value), '5')
+
+    def test_syntax_errors(self):
+        for text, details in (
+            ('1 +', "Expected int, float, identifier, '+', '-', '(', 'IF', 'FUNC', or 'LAMBDA'"),
+            ('1 2', "Expected '+', '-', '*', '/', '^', '==', '!=', '<', '>', '<=', '>=', 'AND(&&)', or 'OR(||)'"),
+            ('(1 + 2', "Expected ')'"),
+            ('FUNC f(x) x', "Expected '->'"),
+        ):
+            with self.subTest(text=text):
+                program, error = basic.parse('<test>', text)
+                self.assertIsNone(program)
+                self.assertIsInstance(error, basic.InvalidSyntaxError)
+                self.assertEqual(error.details, details)
+
+    def test_deep_nesting_is_a_syntax_error(self):
+        program, error = basic.parse('<test>', '(' * 5000 + '1' + ')' * 5000)
+        self.assertIsInstance(error, basic.InvalidSyntaxError)
+        self.assertEqual(error.details, 'Expression is nested too deeply')
+
+
+if __name__ == '__main__':
+    unittest.main()
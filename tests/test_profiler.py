@@ -0,0 +1,53 @@
+import unittest
+
+from PartA import basic
+from PartA.Profiler import Profiler
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        # fib reads a variable, so it is not memoized and makes every call
+        self.enterContext(scratch_globals())
+        basic.run('<test>', 'VAR one = 1')
+        basic.run('<test>', 'FUNC fib(n) -> IF n < 2 THEN n ELSE fib(n - one) + fib(n - 2)')
+
+    def test_counts_calls_and_samples_stacks(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                with Profiler(interval=0.001) as profiler:
+                    value, error = basic.run('<test>', 'fib(16)', engine)
+                self.assertEqual(repr(value), '987')
+                self.assertEqual(profiler.calls['fib'], 3193)
+                self.assertGreater(profiler.samples, 0)
+                for stack in profiler.stacks:
+                    self.assertTrue(stack[0] == '<program>' or stack == ('<outside RPEL code>',), stack)
+
+    def test_output(self):
+        with Profiler(interval=0.001) as profiler:
+            basic.run('<test>', 'fib(16)')
+        for line in profiler.collapsed().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+        report = profiler.report().splitlines()
+        self.assertTrue(report[0].startswith(f'{profiler.samples} samples in '))
+        self.assertIn('fib', ' '.join(report[2:]))
+
+    def test_stop_restores_make_context(self):
+        make_context = basic.Function.make_context
+        Profiler().start().stop()
+        self.assertIs(basic.Function.make_context, make_context)
+
+    def test_one_at_a_time(self):
+        profiler = Profiler().start()
+        try:
+            with self.assertRaises(Exception):
+                Profiler().start()
+        finally:
+            profiler.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from PartA import basic
+from PartA.Resolver import Resolver
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+
+def parse(text):
+    tokens, error = basic.Lexer('<test>', text).make_tokens()
+    return Resolver().resolve(basic.Parser(tokens).parse().node)
+
+
+class ResolverTest(unittest.TestCase):
+    def run_lines(self, lines, engine):
+        with scratch_globals():
+            for text in lines:
+                value, error = basic.run('<test>', text, engine)
+                if error:
+                    return error.details
+        return repr(value)
+
+    def check(self, lines, expected):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(self.run_lines(lines, engine), expected)
+
+    def test_addresses(self):
+        func = parse('FUNC f(a) -> (VAR b = a) + (LAMBDA x . a + x + c)(b)')
+        self.assertEqual(func.frame_size, 2)
+        self.assertEqual(func.cell_slots, ())
+        call = func.body_node.right_node
+        lam = call.node_to_call
+        self.assertEqual(lam.captures, ((basic.LOCAL, 0),))
+        self.assertEqual(call.arg_nodes[0].address, (basic.LOCAL, 1))
+        body = lam.body_node
+        self.assertEqual([body.left_node.left_node.address, body.left_node.right_node.address, body.right_node.address],
+                         [(basic.FREE, 0), (basic.LOCAL, 0), None])
+
+    def test_locals_stay_local(self):
+        self.check(['FUNC f(x) -> (VAR t = x)', 'f(1)', 't'], "'t' is not defined")
+
+    def test_only_runner_parse_resolves(self):
+        tokens, error = basic.Lexer('<test>', 'LAMBDA x . x').make_tokens()
+        self.assertIsNone(basic.Parser(tokens).parse().node.body_node.address)
+        program, error = basic.parse('<test>', 'LAMBDA x . x')
+        self.assertEqual(program.node.body_node.address, (basic.LOCAL, 0))
+
+    def test_read_before_local_assignment(self):
+        # The body reads the enclosing x until it assigns its own
+        self.check(['FUNC o2(x) -> (FUNC inner() -> x + (VAR x = 1))()', 'o2(5)'], '6')
+        self.check(['FUNC a(x) -> (LAMBDA u . (VAR x = x * 2) + x)(0)', 'a(3)'], '12')
+        self.check(['FUNC b(x) -> (FUNC c() -> (VAR x = x + 1) + (LAMBDA v . x)(0))()', 'b(1)'], '4')
+
+    def test_read_before_assignment_of_a_global(self):
+        self.check(['VAR g = 10', 'FUNC d() -> g + (VAR g = 1)', 'd()'], '11')
+        self.check(['FUNC d() -> h + (VAR h = 1)', 'd()'], "'h' is not defined")
+
+    def test_recursive_local_function(self):
+        self.check(['FUNC fact(n) -> (FUNC go(k) -> IF k <= 1 THEN 1 ELSE k * go(k - 1))(n)', 'fact(5)'], '120')
+
+
+if __name__ == '__main__':
+    unittest.main()
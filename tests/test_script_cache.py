@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from PartA import basic, Runner
+from PartA.ScriptCache import ScriptCache, cache_path, encode, decode
+
+PROGRAMS = [
+    '1 + 2 * 3 - 4 / 5 % 6 ^ 2',
+    '2.5 * -3',
+    'VAR a = 10',
+    'a > 5 && a < 20 || NOT a',
+    'a AND 0 OR 1',
+    'IF a == 1 THEN 1 ELIF a == 10 THEN 2 ELSE 3',
+    'FUNC f(n) -> IF n <= 1 THEN 1 ELSE n * f(n - 1)',
+    'f(6)',
+    'FUNC counter(n) -> (VAR c = n) + (LAMBDA u . c + u)(1) + (VAR c = c + 1)',
+    'counter(3)',
+    'FUNC o2(x) -> (FUNC inner() -> x + (VAR x = 1))()',
+    'o2(5)',
+    '(LAMBDA x, y . x * y)(6, 7)',
+    '1 +',
+    '10 / (a - 10)',
+]
+
+
+class ScriptCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'script.rpel')
+        self.write_script(PROGRAMS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_script(self, lines):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def run_script(self, lines, engine='interpreter'):
+        # The output of every line, through a ScriptCache as batch mode uses it
+        environment = basic.Environment()
+        script_cache = ScriptCache(self.path, self.path)
+        outputs = []
+        try:
+            for line_no, text in enumerate(lines, 1):
+                program = script_cache.program(text, line_no - 1)
+                if program is None:
+                    value, error = Runner.run(self.path, text, engine, symbol_table=environment.symbol_table)
+                else:
+                    value, error = Runner.run_program(program, engine, environment.symbol_table)
+                outputs.append(error.as_string() if error else repr(value))
+            script_cache.save()
+        finally:
+            script_cache.close()
+        return outputs, script_cache
+
+    def test_round_trip(self):
+        for text in PROGRAMS:
+            program, error = Runner.parse('<test>', text)
+            if error: continue
+            self.assertEqual(encode(decode(encode(program.node))), encode(program.node), text)
+
+    def test_second_run_reads_the_cache(self):
+        for engine in ('interpreter', 'compiler', 'vm', 'lazy'):
+            with self.subTest(engine=engine):
+                Runner.parse_cache.clear()
+                first, script_cache = self.run_script(PROGRAMS, engine)
+                self.assertTrue(os.path.exists(cache_path(self.path)))
+                second, script_cache = self.run_script(PROGRAMS, engine)
+                self.assertEqual(first, second)
+                self.assertIn('720', first)
+                os.remove(cache_path(self.path))
+
+    def test_changed_script_is_parsed_again(self):
+        self.run_script(PROGRAMS)
+        lines = PROGRAMS[:2] + ['7 * 6']
+        self.write_script(lines)
+        outputs, script_cache = self.run_script(lines)
+        self.assertEqual(outputs[2], '42')
+        outputs, script_cache = self.run_script(lines)
+        self.assertEqual(outputs[2], '42')
+
+    def test_corrupt_cache_is_ignored_and_removed(self):
+        expected, script_cache = self.run_script(PROGRAMS)
+        path = cache_path(self.path)
+        with open(path, 'rb') as file:
+            data = bytearray(file.read())
+        for damaged in (data[:-20], data[:60] + b'\0' * 8 + data[68:], data[:len(data) // 2]):
+            with open(path, 'wb') as file:
+                file.write(damaged)
+            outputs, script_cache = self.run_script(PROGRAMS)
+            self.assertEqual(outputs, expected)
+            self.assertFalse(os.path.exists(path))
+            self.run_script(PROGRAMS)
+            self.assertTrue(os.path.exists(path))
+
+    def test_cache_is_smaller_than_the_script(self):
+        lines = [f'FUNC f{i}(a, b) -> IF a > b THEN a - b ELSE (LAMBDA x . x * a + {i})(b)' for i in range(2000)]
+        self.write_script(lines)
+        self.run_script(lines)
+        self.assertLess(os.path.getsize(cache_path(self.path)), os.path.getsize(self.path))
+
+    def test_unsaved_cache_leaves_nothing_behind(self):
+        script_cache = ScriptCache(self.path, self.path)
+        script_cache.program(PROGRAMS[0])
+        script_cache.close()
+        self.assertEqual(os.listdir(self.directory), ['script.rpel'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from PartA import basic
+from PartA.Server import EvalServer, load_prelude
+
+
+class ServerTest(unittest.TestCase):
+    def serve(self, sessions, **kwargs):
+        # Runs the server on a free port; sessions is a list of command
+        # lists, each sent on a connection of its own, in parallel. Returns
+        # the responses of each session.
+        async def main():
+            server = EvalServer(**kwargs)
+            listener = await server.start(port=0)
+            port = listener.sockets[0].getsockname()[1]
+            try:
+                return await asyncio.gather(*(self.session(port, commands) for commands in sessions))
+            finally:
+                listener.close()
+                await listener.wait_closed()
+                server.close()
+
+        return asyncio.run(main())
+
+    async def session(self, port, commands):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for text in commands:
+            writer.write(text.encode('utf-8') + b'\n')
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        await writer.wait_closed()
+        return responses
+
+    def test_responses(self):
+        [responses] = self.serve([['VAR a = 6', 'a * 7', '1 / 0']])
+        self.assertEqual([(response['ok'], response['output']) for response in responses[:2]],
+                         [(True, '6'), (True, '42')])
+        self.assertFalse(responses[2]['ok'])
+        self.assertIn('Division by zero', responses[2]['output'])
+        self.assertIsInstance(responses[2]['ms'], float)
+
+    def test_sessions_are_isolated(self):
+        first, second = self.serve([['VAR a = 1', 'a'], ['VAR a = 2', 'a']])
+        self.assertEqual(first[1]['output'], '1')
+        self.assertEqual(second[1]['output'], '2')
+        self.assertIsNone(basic.global_symbol_table.get('a'))
+
+    def test_timeout(self):
+        [responses] = self.serve([['FUNC spin(n) -> spin(n + 1)', 'spin(0)']], timeout=0.2)
+        self.assertFalse(responses[1]['ok'])
+        self.assertIn('Time limit', responses[1]['output'])
+
+    def test_prelude(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'prelude.rpel')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('FUNC sq(x) -> x * x\n\nVAR ten = 10\n')
+            prelude, errors = load_prelude(path, 'interpreter')
+
+        self.assertEqual(errors, 0)
+        self.assertTrue(prelude.frozen)
+        first, second = self.serve([['VAR ten = 1', 'sq(ten)'], ['sq(ten)']], prelude=prelude)
+        self.assertEqual(first[1]['output'], '1')
+        self.assertEqual(second[0]['output'], '100')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from PartA import basic, Runner
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+# (program, value or error details, arguments COUNT is called with)
+CASES = [
+    ('0 && COUNT(1)', 0, []),
+    ('zero && COUNT(1)', 0, []),
+    ('one || COUNT(1)', 1, []),
+    ('zero || COUNT(5)', 5, [5]),
+    ('one && COUNT(7)', 7, [7]),
+    ('2.5 || COUNT(1)', 2, []),
+    ('zero AND COUNT(1)', 0, []),
+    ('one OR COUNT(1)', 1, []),
+    ('zero AND 1 / 0', 0, []),
+    ('one OR 1 / 0', 1, []),
+    ('zero && COUNT(1) || COUNT(2)', 2, [2]),
+    ('one || COUNT(1) && COUNT(2)', 2, [2]),
+    ('COUNT(0) && COUNT(1)', 0, [0]),
+    ('COUNT(3) || COUNT(4)', 3, [3]),
+    ('f(3)', 0, [3, 2, 1]),
+    ('g(3)', 1, [3, 2, 1]),
+    ('both(0, 3)', 103, [103]),
+    ('both(1, 3)', 3, [3]),
+    ('one && 1 / 0', 'Division by zero', []),
+    ('zero && (LAMBDA x . x)', 0, []),
+    ('one && (LAMBDA x . x)', 'Illegal operation', []),
+]
+
+
+class ShortCircuitTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.symbol_table = symbol_table = basic.SymbolTable(basic.global_symbol_table)
+        symbol_table.set('COUNT', basic.BuiltInFunction('COUNT', ['x'], self.count).set_context(basic.builtin_context))
+        for text in ('VAR zero = 0', 'VAR one = 1', 'FUNC f(n) -> n > 0 && COUNT(n) && f(n - 1)',
+                     'FUNC g(n) -> n == 0 || (COUNT(n) && g(n - 1))', 'FUNC both(a, b) -> a AND COUNT(b) OR COUNT(b + 100)'):
+            Runner.run('<test>', text, symbol_table=symbol_table)
+        Runner.parse_cache.clear()
+
+    def count(self, args):
+        # COUNT(x) is x, and notes that it was evaluated
+        self.calls.append(args[0].value)
+        return args[0], None
+
+    def run_text(self, text, engine='interpreter', optimize=True):
+        value, error = Runner.run('<test>', text, engine, optimize, self.symbol_table)
+        return error.details if error else value.value
+
+    def test_right_operand_evaluated_only_when_needed(self):
+        for engine in ENGINES:
+            for optimize in (True, False):
+                for text, expected, expected_calls in CASES:
+                    with self.subTest(engine=engine, optimize=optimize, text=text):
+                        self.calls.clear()
+                        self.assertEqual(self.run_text(text, engine, optimize), expected)
+                        self.assertEqual(self.calls, expected_calls)
+
+    def test_functions_defined_by_each_engine(self):
+        # f, g and both above were defined by the interpreter. COUNT is a
+        # built-in, so even the lazy engine evaluates its argument first.
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                Runner.run('<test>', 'FUNC h(n) -> n > 0 && COUNT(h(n - 1))', engine,
+                           symbol_table=self.symbol_table)
+                self.calls.clear()
+                self.assertEqual(self.run_text('h(3)', engine), 0)
+                self.assertEqual(self.calls, [0, 0, 0])
+
+    def test_optimizer_folds_a_deciding_literal(self):
+        for text, value in (('0 && COUNT(1)', 0), ('1 || COUNT(1)', 1), ('0 AND 1 / 0', 0), ('3 OR COUNT(1)', 3)):
+            with self.subTest(text=text):
+                program, error = Runner.parse('<test>', text)
+                self.assertIsInstance(program.node, basic.NumberNode)
+                self.assertEqual(program.node.tok.value, value)
+
+    def test_optimizer_keeps_the_right_operand_it_needs(self):
+        program, error = Runner.parse('<test>', '1 && COUNT(7)')
+        self.assertNotIsInstance(program.node, basic.NumberNode)
+        self.calls.clear()
+        self.assertEqual(self.run_text('1 && COUNT(7)'), 7)
+        self.assertEqual(self.calls, [7])
+
+        program, error = Runner.parse('<test>', '0 || COUNT(5)')
+        self.assertNotIsInstance(program.node, basic.NumberNode)
+        self.calls.clear()
+        self.assertEqual(self.run_text('0 || COUNT(5)'), 5)
+        self.assertEqual(self.calls, [5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+from PartA import basic
+
+
+class SourceTest(unittest.TestCase):
+    def test_line_and_column(self):
+        source = basic.Source('<test>', 'ab\ncd\n\nef')
+        self.assertEqual([(source.line(offset), source.column(offset)) for offset in (0, 2, 3, 4, 6, 7, 8)],
+                         [(0, 0), (0, 2), (1, 0), (1, 1), (2, 0), (3, 0), (3, 1)])
+
+    def test_line_number_counts_the_lines_before(self):
+        source = basic.Source('<test>', 'ab\ncd', first_line=4)
+        self.assertEqual([source.line_number(offset) for offset in (0, 3)], [5, 6])
+
+    def test_tokens_share_the_source(self):
+        lexer = basic.Lexer('<test>', 'VAR a = 1')
+        toks, error = lexer.make_tokens()
+        self.assertEqual([lexer.source.text[tok.pos_start:tok.pos_end] for tok in toks[:-1]], ['VAR', 'a', '=', '1'])
+
+    def test_error_message(self):
+        toks, error = basic.Lexer('<test>', 'VAR a = $').make_tokens()
+        self.assertEqual(error.as_string(), "Illegal Character: '$'\nFile <test>, line 1\n\nVAR a = $\n        ^")
+
+        value, error = basic.run('<test>', '1 + (2 / 0)')
+        self.assertTrue(error.as_string().endswith('Division by zero\n\n1 + (2 / 0)\n         ^'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from PartA import basic
+from tests.support import scratch_globals
+
+ENGINES = ('interpreter', 'compiler', 'vm', 'lazy')
+
+
+def parse(text):
+    tokens, error = basic.Lexer('<test>', text).make_tokens()
+    return basic.Parser(tokens).parse().node
+
+
+class TailCallTest(unittest.TestCase):
+    def run_lines(self, lines, engine, governor=None):
+        with scratch_globals():
+            for text in lines:
+                value, error = basic.run('<test>', text, engine, governor=governor)
+        return value, error
+
+    def test_self_recursion_runs_in_constant_stack(self):
+        # Far deeper than the Python stack
+        lines = ['FUNC count(n, acc) -> IF n == 0 THEN acc ELSE count(n - 1, acc + 2)', 'count(20000, 0)']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                value, error = self.run_lines(lines, engine)
+                self.assertIsNone(error)
+                self.assertEqual(repr(value), '40000')
+
+    def test_mutual_recursion(self):
+        lines = ['FUNC even(n) -> IF n == 0 THEN 1 ELSE odd(n - 1)',
+                 'FUNC odd(n) -> IF n == 0 THEN 0 ELSE even(n - 1)',
+                 'odd(20001)']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                value, error = self.run_lines(lines, engine)
+                self.assertEqual(repr(value), '1')
+
+    def test_lambda_tail_calls(self):
+        lines = ['FUNC loop(f, n) -> IF n == 0 THEN 0 ELSE f(f, n - 1)', 'loop(loop, 20000)',
+                 '(LAMBDA f, n . f(f, n))(loop, 20000)']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                value, error = self.run_lines(lines, engine)
+                self.assertIsNone(error)
+                self.assertEqual(repr(value), '0')
+
+    def test_tail_calls_do_not_count_as_depth(self):
+        governor = basic.Governor(max_depth=10)
+        lines = ['FUNC count(n) -> IF n == 0 THEN 0 ELSE count(n - 1)', 'count(1000)']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                value, error = self.run_lines(lines, engine, governor)
+                self.assertIsNone(error)
+
+    def test_only_calls_in_tail_position_are_marked(self):
+        body = parse('FUNC f(n) -> IF n THEN f(n - 1) ELSE 1 + f(n)').body_node
+        self.assertTrue(body.cases[0][1].is_tail)
+        self.assertFalse(body.else_case.right_node.is_tail)
+        self.assertFalse(parse('f(1)').is_tail)
+
+
+if __name__ == '__main__':
+    unittest.main()
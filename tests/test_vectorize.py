@@ -0,0 +1,72 @@
+import unittest
+
+from PartA import basic
+from tests.support import scratch_globals
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipUnless(np is not None, "needs numpy")
+class VectorizeTest(unittest.TestCase):
+    def vectorize(self, *args, **kwargs):
+        from PartA.Vectorize import vectorize
+        func, error = vectorize(*args, **kwargs)
+        self.assertIsNone(error)
+        return func
+
+    def scalar(self, text, *values):
+        # The same function called once per value by the interpreter
+        args = ', '.join(map(repr, values))
+        with scratch_globals():
+            value, error = basic.run('<test>', f'({text})({args})')
+        return value.value
+
+    def test_lambda(self):
+        text = 'LAMBDA x, y . IF x > y THEN x - y ELSE x * y + 1'
+        func = self.vectorize(text)
+        xs, ys = np.arange(-5, 5), np.array([2, -3, 0, 4, 1, 2, 0, -1, 3, 3])
+        result, error = func(xs, ys)
+        self.assertIsNone(error)
+        self.assertEqual(result.tolist(), [self.scalar(text, int(x), int(y)) for x, y in zip(xs, ys)])
+
+    def test_expression_with_names(self):
+        func = self.vectorize('a * a + b / 2', ['a', 'b'])
+        result, error = func(np.array([1.0, 2.0, 3.0]), 4)
+        self.assertEqual(result.tolist(), [3.0, 6.0, 11.0])
+
+    def test_recursive_function(self):
+        # Defined in the global table, as running the FUNC would
+        func = self.vectorize('FUNC vfact(n) -> IF n < 2 THEN 1 ELSE n * vfact(n - 1)')
+        self.addCleanup(basic.global_symbol_table.remove, 'vfact')
+        result, error = func(np.arange(8))
+        self.assertEqual(result.tolist(), [1, 1, 2, 6, 24, 120, 720, 5040])
+
+    def test_falls_back_per_lane(self):
+        # Division by zero in one lane is the scalar engine's error
+        func = self.vectorize('LAMBDA x . 10 / x')
+        result, error = func(np.array([1, 0, 2]))
+        self.assertIsNone(result)
+        self.assertEqual(error.details, 'Division by zero')
+
+        # int64 would overflow: the lanes are Python ints instead
+        func = self.vectorize('LAMBDA x . x * x * x')
+        result, error = func(np.array([2 ** 40, 3]))
+        self.assertEqual(result.tolist(), [2 ** 120, 27])
+
+    def test_short_circuit_masks_lanes(self):
+        func = self.vectorize('LAMBDA x . x != 0 && 10 / x > 2')
+        result, error = func(np.array([0, 1, 5, 2]))
+        self.assertIsNone(error)
+        self.assertEqual(result.tolist(), [0, 1, 0, 1])
+
+    def test_wrong_number_of_arrays(self):
+        func = self.vectorize('LAMBDA x, y . x')
+        with self.assertRaises(TypeError):
+            func(np.arange(3))
+
+
+if __name__ == '__main__':
+    unittest.main()